@@ -0,0 +1,169 @@
+"""the benchmark suite for the hot paths of the products module,
+the results are written as json to compare them between commits
+
+usage: python -m benchmarks.bench_products [-s 1e3 1e4 1e5]
+       [-o results.json] [--compare old.json]"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+from benchmarks.generate import iter_products, write_catalog
+from src.products import Category, CategoryIter, Product, read_json
+
+
+def best_of(func: Callable[..., Any],
+            repeat: int = 3,
+            setup: Optional[Callable[[], Any]] = None) -> float:
+    """returns the best time of the func in seconds,
+    the result of the setup (not timed) is passed to the func"""
+
+    times = []
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@contextlib.contextmanager
+def no_stdout() -> Any:
+    """redirect the MixinPrint output to os.devnull, so the timings
+    include formatting and writing the reprs but not the terminal"""
+
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def bench_size(products: int, repeat: int = 3) -> dict[str, float]:
+    """returns the timings (in seconds) of the hot paths for the catalog
+    with the products, the per-call paths are normalised per product"""
+
+    results: dict[str, float] = {}
+    rows = list(iter_products(products))
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "catalog.json")
+        with open(filename, "w", encoding="utf-8") as f:
+            write_catalog(f, products)
+        with no_stdout():
+            results["read_json"] = best_of(lambda: read_json(filename),
+                                           repeat)
+            results["new_product_per_call"] = best_of(
+                lambda: [Product.new_product(row) for row in rows],
+                repeat) / max(products, 1)
+        results["bulk_new_per_call"] = best_of(
+            lambda: Product.bulk_new(rows), repeat) / max(products, 1)
+        results["read_json_quiet"] = best_of(
+            lambda: read_json(filename, quiet=True), repeat)
+
+        gc.collect()
+        tracemalloc.start()
+        categories = read_json(filename, quiet=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results["peak_bytes_per_product"] = peak / max(products, 1)
+
+    def add_all(args: tuple[Category, list[Product]]) -> None:
+        category, products = args
+        for product in products:
+            category.add_product(product)
+
+    def new_names() -> tuple[Category, list[Product]]:
+        return Category("bench", "bench", []), Product.bulk_new(rows)
+
+    def same_names() -> tuple[Category, list[Product]]:
+        return (Category("bench", "bench", Product.bulk_new(rows)),
+                Product.bulk_new(rows))
+
+    per_product = max(products, 1)
+    results["add_product_new_per_call"] = best_of(
+        add_all, repeat, new_names) / per_product
+    results["add_product_merge_per_call"] = best_of(
+        add_all, repeat, same_names) / per_product
+    results["add_products_merge_per_row"] = best_of(
+        lambda args: args[0].add_products(args[1]), repeat,
+        same_names) / per_product
+
+    category = Category("bench", "bench", Product.bulk_new(rows))
+    results["middle_price"] = best_of(category.middle_price, repeat)
+    results["str"] = best_of(lambda: str(category), repeat)
+    results["products_cold"] = best_of(
+        lambda category: category.products, repeat,
+        lambda: Category("bench", "bench", Product.bulk_new(rows)))
+    results["products_cached"] = best_of(lambda: category.products, repeat)
+
+    def iterate() -> None:
+        for category in categories:
+            for _ in CategoryIter(category).get_product():
+                pass
+
+    results["category_iter"] = best_of(iterate, repeat)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """returns the current git commit or None"""
+
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> None:
+    """print the ratio new/old of every timing, > 1 is a regression"""
+
+    for size, timings in new["results"].items():
+        old_timings = old["results"].get(size, {})
+        for name, value in timings.items():
+            if old_timings.get(name):
+                ratio = value / old_timings[name]
+                print(f"{size:>10} {name:<28} {ratio:6.2f}x")
+
+
+def main(argv: Optional[list[str]] = None) -> dict[str, Any]:
+    """run the suite and write the results as json"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--sizes", nargs="+", default=["1e3", "1e4"],
+                        help="the numbers of products, 1e3..1e7")
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default="bench_output.json")
+    parser.add_argument("--compare", help="the json of a previous run")
+    args = parser.parse_args(argv)
+    report: dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    for size in args.sizes:
+        products = int(float(size))
+        report["results"][str(products)] = bench_size(products, args.repeat)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
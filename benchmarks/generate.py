@@ -0,0 +1,78 @@
+"""the synthetic catalog generator for the benchmarks,
+writes the Category_json/Product_json data with the given number
+of products
+
+usage: python -m benchmarks.generate products filename [categories]"""
+
+import json
+import random
+import sys
+from collections.abc import Iterator
+from typing import TextIO
+
+from src.products import Category_json, Product_json
+
+WORDS = ["Samsung", "Galaxy", "Iphone", "Xiaomi", "Redmi", "QLED", "Серый",
+         "Синий", "цвет", "камера", "Фоновая", "подсветка", "Ultra", "Pro"]
+
+
+def iter_products(count: int, seed: int = 0) -> Iterator[Product_json]:
+    """the generator returns count random products with unique names"""
+
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+            "description": " ".join(rng.choices(WORDS, k=4)),
+            "price": round(rng.uniform(100.0, 250_000.0), 2),
+            "quantity": rng.randint(1, 100),
+        }
+
+
+def generate_catalog(products: int,
+                     categories: int = 10,
+                     seed: int = 0) -> list[Category_json]:
+    """returns the catalog with the products spread evenly
+    over the categories"""
+
+    items = list(iter_products(products, seed))
+    size = -(-products // categories) if products else 0
+    return [
+        {"name": f"Категория {i}",
+         "description": f"Описание категории {i}",
+         "products": items[i * size:(i + 1) * size]}
+        for i in range(categories)
+    ]
+
+
+def write_catalog(f: TextIO,
+                  products: int,
+                  categories: int = 10,
+                  seed: int = 0) -> None:
+    """writes the catalog to the file without holding all the products
+    in memory, so 1e7 products can be generated"""
+
+    generated = iter_products(products, seed)
+    size = -(-products // categories) if products else 0
+    f.write("[")
+    for i in range(categories):
+        f.write(",\n" if i else "\n")
+        head = json.dumps({"name": f"Категория {i}",
+                           "description": f"Описание категории {i}"},
+                          ensure_ascii=False)
+        f.write(head[:-1] + ', "products": [')
+        for j in range(size):
+            product = next(generated, None)
+            if product is None:
+                break
+            f.write(",\n" if j else "\n")
+            f.write(json.dumps(product, ensure_ascii=False))
+        f.write("]}")
+    f.write("\n]\n")
+
+
+if __name__ == "__main__":
+    count = int(float(sys.argv[1]))
+    with open(sys.argv[2], "w", encoding="utf-8") as out:
+        write_catalog(out, count,
+                      int(sys.argv[3]) if len(sys.argv) > 3 else 10)
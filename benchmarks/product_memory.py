@@ -0,0 +1,96 @@
+"""the benchmark reports the bytes per instance of the products
+before (the attributes in __dict__) and after (__slots__ only)
+
+usage: python -m benchmarks.product_memory [count]"""
+
+import gc
+import json
+import sys
+import tracemalloc
+from abc import ABC
+from typing import Any, Callable
+
+from src.products import LawnGrass, Product, Smartphone, quiet_mode
+
+NAME = "Samsung Galaxy S23 Ultra"
+DESCRIPTION = "256GB, Серый цвет, 200MP камера"
+
+
+class LegacyBaseProduct(ABC):
+    """the layout of the BaseProduct class before the __slots__ fix"""
+
+    __slots__ = ["name", "descriptions", "__price", "quantity"]
+
+
+class LegacyProduct(LegacyBaseProduct):
+    """the layout of the Product class before the __slots__ fix,
+    the class attributes shadow the slots, so every instance
+    keeps its attributes in __dict__"""
+
+    name: str = ""
+    description: str = ""
+    __price: float = 0.0
+    quantity: int = 0
+
+    def __init__(self, name: str, description: str,
+                 price: float, quantity: int) -> None:
+        self.name = name
+        self.__price = price
+        self.quantity = quantity
+        self.description = description
+
+
+class LegacySmartphone(LegacyProduct):
+    """the layout of the Smartphone class before the __slots__ fix"""
+
+    def __init__(self, *args: Any) -> None:
+        self.efficiency, self.model, self.memory, self.color = args[4:]
+        super().__init__(*args[:4])
+
+
+def bytes_per_instance(factory: Callable[[int], object], count: int) -> float:
+    """returns the average number of bytes allocated for one instance"""
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the objects is not a part of the instances
+    list_size = sys.getsizeof(objects)
+    return (after - before - list_size) / count
+
+
+def main(count: int = 100_000) -> dict[str, dict[str, float]]:
+    """measure the products layouts and print the report as json"""
+
+    phone = (NAME, DESCRIPTION, 1.0, 1, 0.9, "S23", 256, "gray")
+    grass = (NAME, DESCRIPTION, 1.0, 1, "Russia", "7 days", "green")
+    with quiet_mode():
+        report = {
+            "Product": {
+                "before": bytes_per_instance(
+                    lambda i: LegacyProduct(NAME, DESCRIPTION, 1.0, i + 1),
+                    count),
+                "after": bytes_per_instance(
+                    lambda i: Product(NAME, DESCRIPTION, 1.0, i + 1),
+                    count),
+            },
+            "Smartphone": {
+                "before": bytes_per_instance(
+                    lambda i: LegacySmartphone(*phone), count),
+                "after": bytes_per_instance(
+                    lambda i: Smartphone(*phone), count),
+            },
+            "LawnGrass": {
+                "after": bytes_per_instance(
+                    lambda i: LawnGrass(*grass), count),
+            },
+        }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,149 @@
+import asyncio
+import contextvars
+import functools
+import json
+import pathlib
+from collections.abc import AsyncIterator, Generator, Iterable
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional, TypeVar
+
+from src.products import (Category, Category_json, Product, ReprSink,
+                          _commit_categories, iter_categories_json)
+from src.registry import CatalogRegistry
+
+# the number of products built by one call in the executor
+CHUNK_SIZE = 1000
+# the number of catalogs loaded at once by aread_catalogs
+CONCURRENCY_LIMIT = 4
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+async def _run(executor: Optional[Executor],
+               func: Callable[..., T], *args: Any) -> T:
+    """run the blocking func in the executor (the default one
+    if it is None) with the context of the caller, so the quiet mode
+    of the caller applies in the executor too"""
+
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(context.run, func, *args))
+
+
+def _build_products(rows: list[Any],
+                    quiet: bool,
+                    sink: Optional[ReprSink]) -> list[Product]:
+    """create the products from the Product_json rows"""
+
+    if quiet:
+        return Product.bulk_new(rows, sink)
+    return [Product.new_product(row) for row in rows]
+
+
+async def aiter_categories(filename: str,
+                           quiet: bool = False,
+                           sink: Optional[ReprSink] = None,
+                           registry: Optional[CatalogRegistry] = None,
+                           executor: Optional[Executor] = None,
+                           chunk_size: int = CHUNK_SIZE
+                           ) -> AsyncIterator[Category]:
+    """the asynchronous generator of the Categories of a Json file:
+    reading and decoding the file and creating the products
+    of every chunk_size rows run in the executor, so the event loop
+    stays responsive between the chunks"""
+
+    items: Generator[Category_json] = iter_categories_json(filename)
+    try:
+        while True:
+            item = await _run(executor, next, items, _DONE)
+            if item is _DONE:
+                return
+            rows = item["products"]
+            products: list[Product] = []
+            for start in range(0, len(rows), chunk_size):
+                products += await _run(executor, _build_products,
+                                       rows[start:start + chunk_size],
+                                       quiet, sink)
+            yield await _run(executor, functools.partial(
+                Category, item["name"], item["description"], products,
+                registry=registry))
+    finally:
+        items.close()
+
+
+async def aread_json(filename: str,
+                     quiet: bool = False,
+                     sink: Optional[ReprSink] = None,
+                     registry: Optional[CatalogRegistry] = None,
+                     executor: Optional[Executor] = None,
+                     chunk_size: int = CHUNK_SIZE) -> list[Category]:
+    """the asynchronous read_json: returns the list of Categories
+    of the Json file (an empty list for a missing or broken file),
+    the blocking work runs in the executor in chunks. As by read_json
+    the categories are counted by a scratch registry and printed
+    only when the whole file is read, so a broken file has
+    no side effects"""
+
+    if not pathlib.Path(filename).exists():
+        return []
+    scratch = CatalogRegistry()
+    try:
+        categories = [category async for category in aiter_categories(
+            filename, True, None, scratch, executor, chunk_size)]
+    except json.JSONDecodeError:
+        return []
+    await _run(executor, _commit_categories, categories, scratch, quiet,
+               sink, registry)
+    return categories
+
+
+async def aread_catalogs(paths: Iterable[str],
+                         limit: int = CONCURRENCY_LIMIT,
+                         quiet: bool = False,
+                         sink: Optional[ReprSink] = None,
+                         registry: Optional[CatalogRegistry] = None,
+                         executor: Optional[Executor] = None
+                         ) -> list[list[Category]]:
+    """load the Json files concurrently, at most limit files at once,
+    returns the categories of every file in the order of the paths"""
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def load(path: str) -> list[Category]:
+        async with semaphore:
+            return await aread_json(path, quiet, sink, registry, executor)
+
+    return list(await asyncio.gather(*(load(path) for path in paths)))
+
+
+class AsyncCategory:
+    """the asynchronous view of the Category: `async for` over
+    the products yields to the event loop every chunk_size products,
+    rendering the products runs in the executor
+        attributes:
+            category - the wrapped Category
+        methods:
+            products - the products str of the category"""
+
+    def __init__(self,
+                 category: Category,
+                 chunk_size: int = CHUNK_SIZE,
+                 executor: Optional[Executor] = None) -> None:
+        """constructor for the AsyncCategory class"""
+
+        self.category = category
+        self.chunk_size = chunk_size
+        self.executor = executor
+
+    async def __aiter__(self) -> AsyncIterator[Product]:
+        for count, product in enumerate(self.category.iter_snapshot(), 1):
+            yield product
+            if count % self.chunk_size == 0:
+                await asyncio.sleep(0)
+
+    async def products(self) -> str:
+        """returns the products str of the category (see
+        Category.products) rendered in the executor"""
+        return await _run(self.executor, lambda: self.category.products)
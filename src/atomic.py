@@ -0,0 +1,33 @@
+import os
+import secrets
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# the mode of the new files before the umask is applied (as by open())
+FILE_MODE = 0o666
+
+
+@contextmanager
+def atomic_write(filename: str) -> Iterator[str]:
+    """the context manager yields the name of a new temporary file
+    in the directory of the filename, the temporary file replaces
+    the filename when the block succeeds and is removed otherwise.
+    Unlike tempfile.mkstemp (mode 0600) the temporary file is created
+    with the mode of open(), 0666 limited by the umask of the process"""
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    while True:
+        temp_name = os.path.join(directory, f"{secrets.token_hex(8)}.tmp")
+        try:
+            fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                         FILE_MODE)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        break
+    try:
+        yield temp_name
+        os.replace(temp_name, filename)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
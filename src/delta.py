@@ -0,0 +1,226 @@
+from collections.abc import Iterable, Mapping
+from typing import Any, Optional, TypedDict, cast
+
+from src.pricing import REPORT_KEYS, PriceDecision, PricePolicy
+from src.products import (PRODUCT_FIELDS, PRODUCT_TYPE_KEY, Category,
+                          Product, Product_json, _product_type_of,
+                          get_product_type, quiet_mode)
+from src.registry import CatalogRegistry
+
+
+# the product of the upsert: the keys of the Product_json and of the json
+# of the subclasses, an existing product keeps the fields which are missing
+# (a new product needs all the keys of its type)
+ProductPatch = TypedDict("ProductPatch", {
+    "name": str,
+    "description": str,
+    "price": float,
+    "quantity": int,
+    "type": str,
+    "efficiency": float,
+    "model": str,
+    "memory": int,
+    "color": str,
+    "country": str,
+    "germination_period": str,
+}, total=False)
+
+
+class DeltaOp(TypedDict, total=False):
+    """the operation of the delta, the keys by op:
+        add_category - name, description
+        upsert - category, product (ProductPatch)
+        set - category, name, price and/or quantity
+        remove - category, name"""
+
+    op: str
+    category: str
+    name: str
+    description: str
+    price: float
+    quantity: int
+    product: ProductPatch
+
+
+class DeltaEvent(TypedDict):
+    """the event of the change made by apply_delta, the event is one of
+    category_added, category_changed, product_added, product_changed,
+    product_removed, price_rejected, price_deferred, missing (the
+    category or the product isn't found) and invalid (the quantity
+    isn't a positive int or the category can't keep the product
+    of the new type, the operation is skipped), the changes
+    are the old and the new values by the field"""
+
+    event: str
+    category: str
+    name: str
+    changes: dict[str, tuple[Any, Any]]
+
+
+def _event(event: str,
+           category: str,
+           name: str = "",
+           changes: Optional[dict[str, tuple[Any, Any]]] = None
+           ) -> DeltaEvent:
+    """returns the new event"""
+    return {"event": event, "category": category, "name": name,
+            "changes": changes or {}}
+
+
+def _valid_quantity(quantity: Any) -> bool:
+    """returns True if the quantity can be set to the product"""
+    return type(quantity) is int and quantity > 0
+
+
+def _set_fields(category: Category,
+                product: Product,
+                fields: Mapping[str, Any],
+                policy: Optional[PricePolicy],
+                events: list[DeltaEvent],
+                changes: Optional[dict[str, tuple[Any, Any]]] = None
+                ) -> None:
+    """set the description, the quantity and the price of the product
+    (the category is notified by the product, the description
+    is indexed again by the category) and add the event
+    of the changes"""
+
+    changes = {} if changes is None else changes
+    if "description" in fields and \
+            fields["description"] != product.description:
+        changes["description"] = (product.description,
+                                  fields["description"])
+        category.update_product(product.name,
+                                description=fields["description"])
+    if "quantity" in fields and fields["quantity"] != product.quantity:
+        changes["quantity"] = (product.quantity, fields["quantity"])
+        product.quantity = fields["quantity"]
+    if "price" in fields and fields["price"] != product.price:
+        old_price = product.price
+        decision = product.apply_price(fields["price"],
+                                       policy or category.price_policy)
+        if decision is PriceDecision.ACCEPT:
+            changes["price"] = (old_price, product.price)
+        else:
+            events.append(_event(
+                "price_" + REPORT_KEYS[decision], category.name,
+                product.name, {"price": (old_price, fields["price"])}))
+    if changes:
+        events.append(_event("product_changed", category.name,
+                             product.name, changes))
+
+
+def _upsert(category: Category,
+            product_dict: ProductPatch,
+            policy: Optional[PricePolicy],
+            events: list[DeltaEvent]) -> None:
+    """update the product with the name of the product_dict
+    or insert the new one"""
+
+    name = product_dict["name"]
+    product = category.get_product(name)
+    if product is None:
+        with quiet_mode():
+            new = Product.new_product(cast(Product_json, product_dict))
+        category.add_product(new)
+        events.append(_event("product_added", category.name, name))
+        return
+    old_type = _product_type_of(type(product))
+    new_type = get_product_type(
+        product_dict.get(PRODUCT_TYPE_KEY, old_type.name))
+    row = {field: getattr(product, field) for field in old_type.fields}
+    changes: dict[str, tuple[Any, Any]] = {
+        field: (row.get(field), product_dict[field])  # type: ignore
+        for field in new_type.fields
+        if (field == "description" or field not in PRODUCT_FIELDS)
+        and field in product_dict
+        and row.get(field) != product_dict[field]  # type: ignore
+    }
+    if new_type.name != old_type.name:
+        # the product of the other type is created (before any change)
+        # with the price and the quantity of the old one and replaces it,
+        # the new price goes through the price policy
+        changes[PRODUCT_TYPE_KEY] = (old_type.name, new_type.name)
+        new_row: dict[str, Any] = {**row, **product_dict}
+        new_row.update({PRODUCT_TYPE_KEY: new_type.name,
+                        "price": row["price"], "quantity": row["quantity"]})
+        with quiet_mode():
+            product = Product.new_product(new_row)  # type: ignore[arg-type]
+        try:
+            # e.g. the ProductTable keeps the base Product only,
+            # so the old product is removed after the check
+            category._check_product(product)
+        except TypeError:
+            events.append(_event("invalid", category.name, name, {
+                PRODUCT_TYPE_KEY: changes[PRODUCT_TYPE_KEY]}))
+            return
+        category.remove_product(name)
+        category.add_product(product)
+    elif changes:
+        # the description and the fields of the subclasses are set
+        # in place, so the product keeps its place and the text
+        # and the hash indexes of the category are updated
+        category.update_product(name, **{field: new for field, (_, new)
+                                         in changes.items()})
+    _set_fields(category, product, product_dict, policy, events, changes)
+
+
+def apply_delta(categories: list[Category],
+                delta: Iterable[DeltaOp],
+                policy: Optional[PricePolicy] = None,
+                registry: Optional[CatalogRegistry] = None
+                ) -> list[DeltaEvent]:
+    """apply the operations of the delta to the categories in place
+    and return the event log of the changes. The products are found
+    by the name index of the category, so every operation costs O(1)
+    regardless of the size of the catalog. Lowering the prices
+    is decided by the policy, the category's policy or the process
+    policy; the new categories are appended to the list"""
+
+    by_name = {category.name: category for category in categories}
+    events: list[DeltaEvent] = []
+    for op in delta:
+        kind = op["op"]
+        if kind == "add_category":
+            name = op["name"]
+            category = by_name.get(name)
+            if category is None:
+                category = by_name[name] = Category(
+                    name, op.get("description", ""), [],
+                    registry=registry)
+                categories.append(category)
+                events.append(_event("category_added", name))
+            elif op.get("description", category.description) != \
+                    category.description:
+                events.append(_event(
+                    "category_changed", name, "",
+                    {"description": (category.description,
+                                     op["description"])}))
+                category.description = op["description"]
+            continue
+        if kind not in ("upsert", "set", "remove"):
+            raise ValueError(f"unknown delta operation {kind!r}")
+        category = by_name.get(op["category"])
+        if kind == "upsert":
+            product_dict = op["product"]
+            name = product_dict["name"]
+            quantity: Optional[int] = product_dict.get("quantity")
+        else:
+            name = op["name"]
+            quantity = op.get("quantity")
+        product = None if category is None else category.get_product(name)
+        if category is None or (product is None and kind != "upsert"):
+            events.append(_event("missing", op["category"], name))
+        elif kind == "remove":
+            category.remove_product(name)
+            events.append(_event("product_removed", category.name, name))
+        elif (quantity is not None or product is None) and \
+                not _valid_quantity(quantity):
+            events.append(_event(
+                "invalid", category.name, name,
+                {"quantity": (getattr(product, "quantity", None),
+                              quantity)}))
+        elif kind == "upsert":
+            _upsert(category, product_dict, policy, events)
+        elif product is not None:
+            _set_fields(category, product, dict(op), policy, events)
+    return events
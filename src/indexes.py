@@ -0,0 +1,151 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Hashable, Iterable
+from math import inf
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from src.products import Product
+
+SORTED_ATTRIBUTES = ("price", "quantity")
+
+
+class CategoryIndex(ABC):
+    """the abstract class of the secondary index over the products
+    of the Category, the index keeps the rows of the products
+    (their positions in the category)"""
+
+    def __init__(self, attribute: str) -> None:
+        self.attribute = attribute
+
+    @abstractmethod
+    def add(self, row: int, product: "Product") -> None:
+        """add the product from the row to the index"""
+
+    @abstractmethod
+    def remove(self, row: int, product: "Product") -> None:
+        """remove the product from the row from the index"""
+
+    def changed(self,
+                row: int,
+                product: "Product",
+                old_price: float,
+                old_quantity: int) -> None:
+        """update the index after the price or the quantity
+        of the product has been changed"""
+
+    def clear(self) -> None:
+        """remove all the rows from the index"""
+
+    def covers(self, field: str) -> bool:
+        """returns True if the index depends on the field
+        of the products"""
+        return field == self.attribute
+
+
+class SortedIndex(CategoryIndex):
+    """the sorted index by the price or the quantity of the products
+    for range queries"""
+
+    def __init__(self, attribute: str) -> None:
+        if attribute not in SORTED_ATTRIBUTES:
+            raise ValueError(f"sorted index by {attribute} isn't supported")
+        super().__init__(attribute)
+        self.__keys: list[tuple[float, int]] = []
+
+    def add(self, row: int, product: "Product") -> None:
+        insort(self.__keys, (getattr(product, self.attribute), row))
+
+    def remove(self, row: int, product: "Product") -> None:
+        self.__discard((getattr(product, self.attribute), row))
+
+    def __discard(self, key: tuple[float, int]) -> None:
+        """remove the key from the sorted keys if it is present"""
+
+        keys = self.__keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            del keys[index]
+
+    def changed(self,
+                row: int,
+                product: "Product",
+                old_price: float,
+                old_quantity: int) -> None:
+        old = old_price if self.attribute == "price" else old_quantity
+        new = getattr(product, self.attribute)
+        if new == old:
+            return
+        self.__discard((old, row))
+        insort(self.__keys, (new, row))
+
+    def clear(self) -> None:
+        self.__keys.clear()
+
+    def range(self,
+              low: Optional[float] = None,
+              high: Optional[float] = None) -> list[int]:
+        """returns the rows with low <= value <= high ordered by value,
+        a missing bound is unlimited"""
+
+        keys = self.__keys
+        start = 0 if low is None else bisect_left(keys, (low, -1))
+        stop = len(keys) if high is None else bisect_right(keys, (high, inf))
+        return [row for _, row in keys[start:stop]]
+
+
+class HashIndex(CategoryIndex):
+    """the hash index by an attribute of the products
+    (e.g. Smartphone.color or LawnGrass.country) for equality queries,
+    the products without the attribute aren't indexed"""
+
+    def __init__(self, attribute: str) -> None:
+        super().__init__(attribute)
+        self.__rows: dict[Hashable, list[int]] = {}
+
+    def add(self, row: int, product: "Product") -> None:
+        value = getattr(product, self.attribute, self)
+        if value is self:
+            return
+        self.__rows.setdefault(value, []).append(row)
+
+    def remove(self, row: int, product: "Product") -> None:
+        value = getattr(product, self.attribute, self)
+        rows = self.__rows.get(value) if value is not self else None
+        if not rows:
+            return
+        rows.remove(row)
+        if not rows:
+            del self.__rows[value]
+
+    def clear(self) -> None:
+        self.__rows.clear()
+
+    def lookup(self, value: Hashable) -> list[int]:
+        """returns the rows of the products with the attribute value"""
+        return self.__rows.get(value, [])
+
+
+def new_index(attribute: str) -> CategoryIndex:
+    """returns the sorted index for the price and the quantity,
+    the full-text index for 'text' and the hash index
+    for other attributes"""
+
+    if attribute == "text":
+        from src.search import TextIndex
+        return TextIndex(attribute)
+    if attribute in SORTED_ATTRIBUTES:
+        return SortedIndex(attribute)
+    return HashIndex(attribute)
+
+
+def intersect_rows(row_lists: Iterable[list[int]]) -> list[int]:
+    """returns the sorted rows present in all the lists"""
+
+    row_lists = sorted(row_lists, key=len)
+    if not row_lists:
+        return []
+    common: set[int] = set(row_lists[0])
+    for rows in row_lists[1:]:
+        common.intersection_update(rows)
+    return sorted(common)
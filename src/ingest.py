@@ -0,0 +1,89 @@
+import json
+from collections.abc import Iterable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, NamedTuple, Optional
+
+from src.products import (PRODUCT_TYPE_KEY, Category, get_product_type,
+                          iter_categories_json, quiet_mode)
+from src.registry import CatalogRegistry
+
+# the product type and the arguments of its constructor
+Row = tuple[str, tuple[Any, ...]]
+CategoryRows = tuple[str, str, list[Row]]
+
+
+class IngestResult(NamedTuple):
+    """the result of read_catalogs
+        categories - the merged categories in the order of their
+        first appearance in the files
+        errors - the error message by the path of every failed file"""
+
+    categories: list[Category]
+    errors: dict[str, str]
+
+
+def parse_catalog(filename: str) -> list[CategoryRows]:
+    """reads the Json file and returns the compact picklable rows
+    (name, description, [(type, constructor arguments)])
+    of its categories, the function runs in the worker processes"""
+
+    result = []
+    for category in iter_categories_json(filename):
+        rows = []
+        for product in category["products"]:
+            product_type = get_product_type(
+                product.get(PRODUCT_TYPE_KEY, "product"))
+            rows.append((product_type.name, product_type.extract(product)))
+        result.append((category["name"], category["description"], rows))
+    return result
+
+
+def read_catalogs(paths: Iterable[str],
+                  workers: Optional[int] = None,
+                  registry: Optional[CatalogRegistry] = None,
+                  executor: Optional[Executor] = None) -> IngestResult:
+    """parses the Json files in the process pool of workers processes
+    (in the current process if workers is 0) and merges the categories
+    with the same name, the products with the same name are merged
+    by Category.add_product: the quantities are summed and the higher
+    price is kept. The order of the categories and the products
+    follows the order of the paths"""
+
+    paths = list(paths)
+    errors: dict[str, str] = {}
+    categories: dict[str, Category] = {}
+    pool: Optional[Executor] = None
+    if executor is None and workers != 0:
+        pool = executor = ProcessPoolExecutor(workers)
+    try:
+        futures: list[Optional[Future[list[CategoryRows]]]] = [
+            None if executor is None
+            else executor.submit(parse_catalog, path)
+            for path in paths
+        ]
+        for path, future in zip(paths, futures):
+            try:
+                if future is None:
+                    batches = parse_catalog(path)
+                else:
+                    batches = future.result()
+                with quiet_mode():
+                    built = [(name, description,
+                              [get_product_type(type_name).cls(*args)
+                               for type_name, args in rows])
+                             for name, description, rows in batches]
+            except (OSError, json.JSONDecodeError, KeyError, TypeError,
+                    ValueError) as e:
+                errors[path] = f"{type(e).__name__}: {e}"
+                continue
+            for name, description, products in built:
+                category = categories.get(name)
+                if category is None:
+                    category = categories[name] = Category(
+                        name, description, [], registry=registry)
+                for product in products:
+                    category.add_product(product)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return IngestResult(list(categories.values()), errors)
@@ -0,0 +1,242 @@
+import functools
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Optional, TypedDict
+
+from src.atomic import atomic_write
+
+# the upper bounds of the latency buckets in seconds
+LATENCY_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1.0, 10.0, math.inf)
+
+HistogramSnapshot = TypedDict("HistogramSnapshot", {
+    "count": int,
+    "sum": float,
+    "buckets": list[tuple[float, int]],
+})
+
+
+MetricsSnapshot = TypedDict("MetricsSnapshot", {
+    "enabled": bool,
+    "counters": dict[str, int],
+    "histograms": dict[str, HistogramSnapshot],
+})
+
+
+class Histogram:
+    """the histogram of the latencies by LATENCY_BUCKETS"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.__buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, value: float) -> None:
+        """add the value to the histogram"""
+
+        self.count += 1
+        self.sum += value
+        self.__buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+
+    def snapshot(self) -> HistogramSnapshot:
+        """returns the count, the sum and the cumulative counts
+        by the upper bound of every bucket"""
+
+        buckets = []
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.__buckets):
+            total += count
+            buckets.append((bound, total))
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class Metrics:
+    """the counters and the latency histograms of the hot paths.
+    The module code checks the enabled flag before counting,
+    the instrumented methods are wrapped only while the metrics
+    are enabled, so the overhead is close to zero when they are off
+        attributes:
+            enabled - whether the metrics are collected
+        methods:
+            count - add the value to the counter
+            observe - add the latency to the histogram
+            instrument - register the method to be timed when enabled
+            enable, disable - turn the metrics on and off
+            snapshot - returns the MetricsSnapshot
+            reset - remove all the values"""
+
+    def __init__(self) -> None:
+        """constructor for the Metrics class"""
+
+        self.enabled = False
+        self.__lock = threading.Lock()
+        self.__counters: dict[str, int] = {}
+        self.__histograms: dict[str, Histogram] = {}
+        self.__instrumented: list[tuple[type, str, str]] = []
+        self.__originals: dict[tuple[type, str], Any] = {}
+
+    def count(self, name: str, value: int = 1) -> None:
+        """add the value to the counter"""
+
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """add the latency in seconds to the histogram"""
+
+        with self.__lock:
+            histogram = self.__histograms.get(name)
+            if histogram is None:
+                histogram = self.__histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def timed(self, func: Callable[..., Any],
+              name: str) -> Callable[..., Any]:
+        """returns the wrapper of the func observing its latency"""
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(name, time.perf_counter() - start)
+
+        return wrapper
+
+    def instrument(self, owner: type, attribute: str, name: str) -> None:
+        """register the method (or the property) of the class
+        to be timed under the name while the metrics are enabled,
+        the getter and the setter of the property are timed
+        as name_get and name_set"""
+
+        self.__instrumented.append((owner, attribute, name))
+        if self.enabled:
+            self.__wrap(owner, attribute, name)
+
+    def __wrap(self, owner: type, attribute: str, name: str) -> None:
+        """replace the attribute of the class with the timed one"""
+
+        original = owner.__dict__[attribute]
+        self.__originals[(owner, attribute)] = original
+        if isinstance(original, property):
+            wrapped: Any = property(
+                self.timed(original.fget, name + "_get")
+                if original.fget else None,
+                self.timed(original.fset, name + "_set")
+                if original.fset else None,
+                original.fdel, original.__doc__)
+        else:
+            wrapped = self.timed(original, name)
+        setattr(owner, attribute, wrapped)
+
+    def enable(self) -> None:
+        """turn the metrics on and wrap the instrumented methods"""
+
+        if self.enabled:
+            return
+        for owner, attribute, name in self.__instrumented:
+            self.__wrap(owner, attribute, name)
+        self.enabled = True
+
+    def disable(self) -> None:
+        """turn the metrics off and restore the instrumented methods,
+        the collected values are kept"""
+
+        self.enabled = False
+        for (owner, attribute), original in self.__originals.items():
+            setattr(owner, attribute, original)
+        self.__originals.clear()
+
+    def snapshot(self) -> MetricsSnapshot:
+        """returns the copy of the counters and the histograms"""
+
+        with self.__lock:
+            return {
+                "enabled": self.enabled,
+                "counters": dict(self.__counters),
+                "histograms": {name: histogram.snapshot()
+                               for name, histogram
+                               in self.__histograms.items()},
+            }
+
+    def reset(self) -> None:
+        """remove all the values, e.g. between tests"""
+
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+
+
+metrics = Metrics()
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    """turn the metrics of the process on or off"""
+
+    if enabled:
+        metrics.enable()
+    else:
+        metrics.disable()
+
+
+def metrics_snapshot() -> MetricsSnapshot:
+    """returns the snapshot of the metrics of the process"""
+    return metrics.snapshot()
+
+
+def _format_bound(bound: float) -> str:
+    """returns the bucket bound in the Prometheus format"""
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def to_prometheus(snapshot: MetricsSnapshot,
+                  prefix: str = "ecommerce_") -> str:
+    """returns the snapshot in the Prometheus text exposition format,
+    the latencies are the histograms in seconds"""
+
+    lines = []
+    for name, value in sorted(snapshot["counters"].items()):
+        metric = f"{prefix}{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, histogram in sorted(snapshot["histograms"].items()):
+        metric = f"{prefix}{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for bound, count in histogram["buckets"]:
+            lines.append(
+                f'{metric}_bucket{{le="{_format_bound(bound)}"}} {count}')
+        lines.append(f"{metric}_sum {histogram['sum']!r}")
+        lines.append(f"{metric}_count {histogram['count']}")
+    return "".join(line + "\n" for line in lines)
+
+
+class MetricsExporter(ABC):
+    """the abstract class of the exporter of the metrics snapshots"""
+
+    @abstractmethod
+    def export(self, snapshot: MetricsSnapshot) -> None:
+        """export the snapshot of the metrics"""
+
+
+class PrometheusFileExporter(MetricsExporter):
+    """the exporter writes the snapshot in the Prometheus text format
+    to the file (e.g. for the textfile collector of node_exporter),
+    the file is replaced atomically"""
+
+    def __init__(self, filename: str, prefix: str = "ecommerce_") -> None:
+        self.filename = filename
+        self.prefix = prefix
+
+    def export(self, snapshot: MetricsSnapshot) -> None:
+        with atomic_write(self.filename) as temp_name, \
+                open(temp_name, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(snapshot, self.prefix))
+
+
+def export_metrics(exporter: MetricsExporter,
+                   snapshot: Optional[MetricsSnapshot] = None) -> None:
+    """export the snapshot (the current one if it isn't given)"""
+    exporter.export(metrics_snapshot() if snapshot is None else snapshot)
@@ -0,0 +1,147 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Literal, Optional, TypedDict
+
+RepriceReport = TypedDict("RepriceReport", {
+    "accepted": list[str],
+    "rejected": list[str],
+    "deferred": list[str],
+    "missing": list[str],
+})
+
+
+class PriceDecision(Enum):
+    """the decision of the price policy about lowering the price"""
+
+    ACCEPT = "accept"
+    REJECT = "reject"
+    DEFER = "defer"
+
+
+REPORT_KEYS: dict[PriceDecision, Literal["accepted", "rejected",
+                                         "deferred"]] = {
+    PriceDecision.ACCEPT: "accepted",
+    PriceDecision.REJECT: "rejected",
+    PriceDecision.DEFER: "deferred",
+}
+
+
+def new_reprice_report() -> RepriceReport:
+    """returns the empty report of the repricing"""
+    return {"accepted": [], "rejected": [], "deferred": [], "missing": []}
+
+
+class PricePolicy(ABC):
+    """the abstract class of the policy which decides
+    whether the price of the product can be lowered"""
+
+    @abstractmethod
+    def decide(self, product: Any, price: float) -> PriceDecision:
+        """returns the decision about lowering the price
+        of the product to the new price"""
+
+
+class InteractivePolicy(PricePolicy):
+    """the policy asks the user in the console,
+    it blocks on stdin and is the default for compatibility"""
+
+    def decide(self, product: Any, price: float) -> PriceDecision:
+        print(f"Новая цена ({price}) ниже чем старая ({product.price})")
+        while True:
+            user_answer = input("Нужно ли понизить цену? (y/n):")
+            user_answer = user_answer.lower()
+            print()
+            if user_answer == "y":
+                return PriceDecision.ACCEPT
+            if user_answer == "n":
+                return PriceDecision.REJECT
+            print("""Выберите нужный вариант нажав кнопу:
+                                'y' - да, цену понижаем
+                                'n' - нет, оставляем старую.""")
+
+
+class AcceptAllPolicy(PricePolicy):
+    """the policy always lowers the price"""
+
+    def decide(self, product: Any, price: float) -> PriceDecision:
+        return PriceDecision.ACCEPT
+
+
+class RejectAllPolicy(PricePolicy):
+    """the policy always keeps the old price"""
+
+    def decide(self, product: Any, price: float) -> PriceDecision:
+        return PriceDecision.REJECT
+
+
+class ThresholdPolicy(PricePolicy):
+    """the policy lowers the price if the drop is within max_drop
+    (the fraction of the old price), otherwise returns
+    the otherwise decision"""
+
+    def __init__(self,
+                 max_drop: float,
+                 otherwise: PriceDecision = PriceDecision.REJECT) -> None:
+        self.max_drop = max_drop
+        self.otherwise = otherwise
+
+    def decide(self, product: Any, price: float) -> PriceDecision:
+        old_price = product.price
+        if old_price - price <= old_price * self.max_drop:
+            return PriceDecision.ACCEPT
+        return self.otherwise
+
+
+class ReviewQueuePolicy(PricePolicy):
+    """the policy defers lowering the price and puts
+    the (product, price) pair to the review queue"""
+
+    def __init__(self) -> None:
+        self.__queue: deque[tuple[Any, float]] = deque()
+        self.__lock = threading.Lock()
+
+    def decide(self, product: Any, price: float) -> PriceDecision:
+        self.__queue.append((product, price))
+        return PriceDecision.DEFER
+
+    @property
+    def pending(self) -> list[tuple[Any, float]]:
+        """returns the pending (product, price) pairs"""
+        return list(self.__queue)
+
+    def review(self,
+               approve: Optional[Callable[[Any, float], bool]] = None
+               ) -> RepriceReport:
+        """apply the pending prices approved by the approve function
+        (all of them if it isn't given) and clear the queue"""
+
+        report = new_reprice_report()
+        with self.__lock:
+            while self.__queue:
+                product, price = self.__queue.popleft()
+                if approve is not None and not approve(product, price):
+                    report["rejected"].append(product.name)
+                    continue
+                decision = product.apply_price(price, ACCEPT_ALL)
+                report[REPORT_KEYS[decision]].append(product.name)
+        return report
+
+
+ACCEPT_ALL = AcceptAllPolicy()
+REJECT_ALL = RejectAllPolicy()
+
+_process_policy: PricePolicy = InteractivePolicy()
+
+
+def get_price_policy() -> PricePolicy:
+    """returns the price policy of the process"""
+    return _process_policy
+
+
+def set_price_policy(policy: PricePolicy) -> None:
+    """set the price policy of the process"""
+
+    global _process_policy
+    _process_policy = policy
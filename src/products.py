@@ -1,23 +1,97 @@
+import functools
+import gzip
 import json
+import math
+import os
 import pathlib
+import re
 import sys
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
-from collections.abc import Generator
-from typing import ClassVar, TypedDict
+from collections.abc import Generator, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from operator import itemgetter
+from typing import (TYPE_CHECKING, Any, Callable, ClassVar, Final,
+                    Literal, NamedTuple, Optional, TextIO, Union)
 
+# typing.TypedDict doesn't know typing_extensions.NotRequired before 3.11
 if sys.version_info < (3, 11):
-    from typing_extensions import Self
+    from typing_extensions import NotRequired, Self, TypedDict
 else:
-    from typing import Self
+    from typing import NotRequired, Self, TypedDict
+
+from src.atomic import atomic_write
+from src.indexes import (CategoryIndex, HashIndex, SortedIndex,
+                         intersect_rows, new_index)
+from src.metrics import metrics
+from src.pricing import (REPORT_KEYS, PriceDecision, PricePolicy,
+                         RepriceReport, get_price_policy, new_reprice_report)
+from src.registry import (CatalogRegistry, RegistryCount, RegistryCountMeta,
+                          default_registry)
+from src.search import SearchHit, TextIndex
+
+if TYPE_CHECKING:
+    from src.table import ProductTable
 
 NEGATIVE_ZERO_PRICE = "Цена не должна быть нулевая или отрицательная"
 VALUE_ERR_MSG = "Товар с нулевым количеством не может быть добавлен"
+READ_CHUNK_SIZE = 1 << 16
+# the first bytes of the gzip-compressed files
+GZIP_MAGIC = b"\x1f\x8b"
+
+# the precision of the inventory value: float, Decimal or integer kopecks
+Precision = Literal["float", "decimal", "kopeck"]
+Value = Union[float, Decimal, int]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decode_json = json.JSONDecoder().raw_decode
+# the error this close to the end of the buffer can be in a cut token,
+# e.g. in "fals" or in a cut unicode escape
+_CUT_TOKEN_SIZE = 8
+
+PRODUCT_TYPE_KEY: Final = "type"
 
 Product_json = TypedDict("Product_json", {
     "name": str,
     "description": str,
     "price": float,
     "quantity": int,
+    "type": NotRequired[str],
+})
+
+
+Smartphone_json = TypedDict("Smartphone_json", {
+    "name": str,
+    "description": str,
+    "price": float,
+    "quantity": int,
+    "type": NotRequired[str],
+    "efficiency": float,
+    "model": str,
+    "memory": int,
+    "color": str,
+})
+
+
+LawnGrass_json = TypedDict("LawnGrass_json", {
+    "name": str,
+    "description": str,
+    "price": float,
+    "quantity": int,
+    "type": NotRequired[str],
+    "country": str,
+    "germination_period": str,
+    "color": str,
+})
+
+
+AddProductsReport = TypedDict("AddProductsReport", {
+    "inserted": int,
+    "merged": int,
 })
 
 
@@ -33,8 +107,7 @@ class BaseProduct(ABC):
 
     __slots__ = [
         "name",
-        "descriptions",
-        "__price",
+        "description",
         "quantity"
     ]
 
@@ -44,24 +117,299 @@ class BaseProduct(ABC):
         pass
 
 
+class ReprSink:
+    """the buffered, rate-limited sink for the reprs of new objects.
+    Objects over the rate limit are counted as dropped
+    and their repr is never formatted"""
+
+    def __init__(self,
+                 stream: Optional[TextIO] = None,
+                 rate: float = 100.0,
+                 buffer_size: int = 64) -> None:
+        """constructor for the ReprSink class.
+        rate - the number of reprs per second written to the stream,
+        buffer_size - the number of reprs buffered before writing"""
+
+        self.stream = stream
+        self.rate = rate
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        self.__buffer: list[str] = []
+        self.__allowance = rate
+        self.__last = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def emit(self, obj: object) -> None:
+        """buffer the repr of the object if the rate limit allows it"""
+
+        with self.__lock:
+            now = time.monotonic()
+            self.__allowance = min(
+                self.rate, self.__allowance + (now - self.__last) * self.rate
+            )
+            self.__last = now
+            if self.__allowance < 1.0:
+                self.dropped += 1
+                return
+            self.__allowance -= 1.0
+            self.__buffer.append(repr(obj))
+            if len(self.__buffer) < self.buffer_size:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """write the buffered reprs to the stream"""
+
+        with self.__lock:
+            if not self.__buffer:
+                return
+            lines = "\n".join(self.__buffer) + "\n"
+            self.__buffer.clear()
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(lines)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.flush()
+
+
+_slot_names_cache: dict[type, tuple[str, ...]] = {}
+
+
+def _slot_names(cls: type) -> tuple[str, ...]:
+    """returns the mangled names of the slots of the class and its bases
+    without the service slots named with a single underscore"""
+
+    names = _slot_names_cache.get(cls)
+    if names is not None:
+        return names
+    result = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for slot in slots:
+            if slot in ("__dict__", "__weakref__"):
+                continue
+            if slot.startswith("__") and not slot.endswith("__"):
+                slot = f"_{klass.__name__.lstrip('_')}{slot}"
+            elif slot.startswith("_"):
+                continue
+            result.append(slot)
+    names = _slot_names_cache[cls] = tuple(result)
+    return names
+
+
+_quiet: ContextVar[bool] = ContextVar("quiet", default=False)
+_repr_sink: ContextVar[Optional[ReprSink]] = ContextVar("repr_sink",
+                                                        default=None)
+
+
+@contextmanager
+def quiet_mode(sink: Optional[ReprSink] = None) -> Iterator[None]:
+    """the context manager turns off printing the repr of new objects
+    to the console, the reprs go to the sink if it is given"""
+
+    quiet_token = _quiet.set(True)
+    sink_token = _repr_sink.set(sink)
+    try:
+        yield
+    finally:
+        _repr_sink.reset(sink_token)
+        _quiet.reset(quiet_token)
+
+
 class MixinPrint:
     """the mixin class
     prints information about the object
-    to the console"""
+    to the console, see quiet_mode for bulk construction"""
+
+    __slots__ = ()
+
+    def _attrs(self) -> Iterator[tuple[str, Any]]:
+        """returns the attributes of the object as (name, value),
+        the slots with a single underscore keep service data
+        and are skipped"""
+
+        for name in _slot_names(type(self)):
+            try:
+                yield name, getattr(self, name)
+            except AttributeError:
+                pass
+        yield from getattr(self, "__dict__", {}).items()
 
     def __repr__(self) -> str:
         """override __repr__ for print info
         to the console"""
 
         type_of_product = type(self)
-        attrs = self.__dict__
-        repr = [f"'{k}'='{v}'" for k, v in sorted(attrs.items())]
+        repr = [f"'{k}'='{v}'" for k, v in sorted(self._attrs())]
         return f"{type_of_product}({', '.join(repr)})"
 
     def __init__(self) -> None:
-        """print repr to the console"""
+        """print repr to the console or send it to the quiet mode sink"""
+        _announce(self)
+
+
+def _announce(obj: object) -> None:
+    """print the repr of the new object to the console or send it
+    to the sink of the quiet mode"""
+
+    if not _quiet.get():
+        print(f"{obj!r}")
+        return
+    sink = _repr_sink.get()
+    if sink is not None:
+        sink.emit(obj)
+
+
+# the weak references to the observers (e.g. the Categories) of the product
+# or of the ProductTable, an observer is referenced once by subscription,
+# the freed observers (e.g. the temporary categories) are dropped
+Observers = list["weakref.ref[Any]"]
+
+
+def _subscribe(observers: Observers, observer: Any) -> None:
+    """add the subscription of the observer"""
+
+    if observers:
+        observers[:] = [ref for ref in observers if ref() is not None]
+    observers.append(weakref.ref(observer))
+
+
+def _unsubscribe(observers: Observers, observer: Any) -> None:
+    """remove one subscription of the observer"""
+
+    for index, ref in enumerate(observers):
+        if ref() is observer:
+            del observers[index]
+            return
+    raise ValueError("the observer isn't subscribed")
+
+
+def _notify(observers: Observers,
+            product: Any,
+            old_price: float,
+            old_quantity: int) -> None:
+    """notify the observers about the change of the price
+    or the quantity of the product"""
+
+    freed = False
+    for ref in observers:
+        observer = ref()
+        if observer is None:
+            freed = True
+            continue
+        observer._product_changed(product, old_price, old_quantity)
+    if freed:
+        observers[:] = [ref for ref in observers if ref() is not None]
+
 
-        print(f"{self!r}")
+class _RenderedSlot:
+    """the data descriptor over the slot of the product,
+    setting the value drops the cached str of the product"""
+
+    __slots__ = ("_slot",)
+
+    def __init__(self, slot: Any) -> None:
+        self._slot = slot
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        if obj is None:
+            return self
+        return self._slot.__get__(obj, owner)
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        obj._str_cache = None
+        self._slot.__set__(obj, value)
+
+
+class _ObservedSlot(_RenderedSlot):
+    """the data descriptor over the slot of the product,
+    setting the value notifies the observers of the product"""
+
+    __slots__ = ()
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        obj._str_cache = None
+        observers = obj._observers
+        if not observers:
+            self._slot.__set__(obj, value)
+            return
+        old_quantity = self._slot.__get__(obj)
+        self._slot.__set__(obj, value)
+        _notify(observers, obj, obj.price, old_quantity)
+
+
+class _NamedSlot(_RenderedSlot):
+    """the data descriptor over the name slot of the product,
+    renaming the product notifies the observers of the product"""
+
+    __slots__ = ()
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        obj._str_cache = None
+        observers = obj._observers
+        if not observers:
+            self._slot.__set__(obj, value)
+            return
+        old_name = self._slot.__get__(obj)
+        self._slot.__set__(obj, value)
+        _notify_renamed(observers, obj, old_name)
+
+
+class _IndexedSlot(_RenderedSlot):
+    """the data descriptor over the slot of the field which can be
+    indexed by the categories (the description or a field
+    of the subclass, e.g. Smartphone.color), setting the value
+    keeps the indexes of the observers of the product"""
+
+    __slots__ = ("_field",)
+
+    def __init__(self, slot: Any, field: str) -> None:
+        super().__init__(slot)
+        self._field = field
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        # the fields of the subclasses are set before Product.__init__
+        observers = getattr(obj, "_observers", None)
+        if not observers:
+            self._slot.__set__(obj, value)
+            return
+        _notify_field(observers, obj, self._field,
+                      functools.partial(self._slot.__set__, obj, value))
+
+
+def _notify_field(observers: Observers,
+                  product: Any,
+                  field: str,
+                  set_field: Callable[[], None]) -> None:
+    """set the field of the product by set_field, the observers take
+    the product out of their indexes by the field before
+    and index it again after"""
+
+    live = [observer for observer in (ref() for ref in observers)
+            if observer is not None]
+    for observer in live:
+        observer._product_field_changing(product, field)
+    try:
+        set_field()
+    finally:
+        for observer in live:
+            observer._product_field_changed(product, field)
+
+
+def _notify_renamed(observers: Observers,
+                    product: Any,
+                    old_name: str) -> None:
+    """notify the observers about the new name of the product"""
+
+    for ref in observers:
+        observer = ref()
+        if observer is not None:
+            observer._product_renamed(product, old_name)
 
 
 class Product(BaseProduct, MixinPrint):
@@ -75,10 +423,15 @@ class Product(BaseProduct, MixinPrint):
             new_product - the classmethod creates the product
             instance"""
 
-    name: str = ""
-    description: str = ""
-    __price: float = 0.0
-    quantity: int = 0
+    __slots__ = ("__price", "_observers", "_str_cache")
+
+    name = _NamedSlot(BaseProduct.__dict__["name"])
+    description = _IndexedSlot(BaseProduct.__dict__["description"],
+                               "description")
+    __price: float
+    quantity = _ObservedSlot(BaseProduct.__dict__["quantity"])
+    _observers: Optional[Observers]
+    _str_cache: Optional[str]
 
     def __init__(self,
                  name: str,
@@ -90,12 +443,23 @@ class Product(BaseProduct, MixinPrint):
 
         if quantity <= 0:
             raise ValueError(VALUE_ERR_MSG)
+        self._observers = None
         self.name = name
         self.__price = price
         self.quantity = quantity
         self.description = description
         super().__init__()
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """the fields kept in the slots of the subclass notify
+        the observers when they are set (see _IndexedSlot)"""
+
+        super().__init_subclass__(**kwargs)
+        slots = cls.__dict__.get("__slots__", ())
+        for slot in (slots,) if isinstance(slots, str) else slots:
+            if not slot.startswith("_"):
+                setattr(cls, slot, _IndexedSlot(cls.__dict__[slot], slot))
+
     @property
     def price(self) -> float:
         """returns the value of the __price attribute"""
@@ -103,187 +467,1157 @@ class Product(BaseProduct, MixinPrint):
 
     @price.setter
     def price(self, price: float) -> None:
-        """set the value of the __price attribute"""
+        """set the value of the __price attribute,
+        lowering the price is decided by the price policy
+        of the process"""
         if price <= 0:
             print(NEGATIVE_ZERO_PRICE)
             return
-        if price > self.__price:
-            self.__price = price
-            return
-        if price < self.__price:
-            print(f"Новая цена ({price}) ниже чем старая ({self.__price})")
-            while True:
-                user_answer = input("Нужно ли понизить цену? (y/n):")
-                user_answer = user_answer.lower()
-                print()
-                if user_answer == "y":
-                    self.__price = price
-                    return
-                if user_answer == "n":
-                    return
-                print("""Выберите нужный вариант нажав кнопу:
-                                'y' - да, цену понижаем
-                                'n' - нет, оставляем старую.""")
+        self.apply_price(price)
+
+    def apply_price(self,
+                    price: float,
+                    policy: Optional[PricePolicy] = None) -> PriceDecision:
+        """set the new price and return the decision about it:
+        a higher price is always accepted, a non-positive one
+        is rejected, lowering the price is decided by the policy
+        (the price policy of the process if it isn't given)"""
+
+        if price <= 0:
+            return PriceDecision.REJECT
+        if price >= self.__price:
+            if price > self.__price:
+                self.__set_price(price)
+            return PriceDecision.ACCEPT
+        if policy is None:
+            policy = get_price_policy()
+        decision = policy.decide(self, price)
+        if decision is PriceDecision.ACCEPT:
+            self.__set_price(price)
+        return decision
+
+    def __set_price(self, price: float) -> None:
+        """set the price and notify the observers of the product"""
+
+        old_price = self.__price
+        self.__price = price
+        self._str_cache = None
+        observers = self._observers
+        if observers:
+            _notify(observers, self, old_price, self.quantity)
+
+    def _add_observer(self, observer: Any) -> None:
+        """subscribe the observer (e.g. the Category) to the changes
+        of the price and the quantity of the product"""
+
+        if self._observers is None:
+            self._observers = [weakref.ref(observer)]
+        else:
+            _subscribe(self._observers, observer)
+
+    def _remove_observer(self, observer: Any) -> None:
+        """unsubscribe the observer from the changes of the product"""
+
+        if self._observers is not None:
+            _unsubscribe(self._observers, observer)
 
     @classmethod
     def new_product(cls, product_dict: Product_json) -> Self:
-        """create the new product from dictionary"""
+        """create the new product from dictionary,
+        the "type" key of the dictionary selects the registered
+        product class (see register_product_type), without it
+        the product of the cls is created"""
+
+        type_name = product_dict.get(PRODUCT_TYPE_KEY)
+        if type_name is None:
+            product_type = _class_types.get(cls) or _product_type_of(cls)
+        else:
+            product_type = get_product_type(type_name)
+            if not issubclass(product_type.cls, cls):
+                raise TypeError(f"{type_name} isn't a {cls.__name__}")
+        return product_type.cls(  # type: ignore[return-value]
+            *product_type.extract(product_dict))
 
-        return cls(product_dict["name"],
-                   product_dict["description"],
-                   product_dict["price"],
-                   product_dict["quantity"])
+    @classmethod
+    def bulk_new(cls,
+                 rows: Iterable[Product_json],
+                 sink: Optional[ReprSink] = None) -> list[Self]:
+        """create the products from dictionaries in the quiet mode,
+        the reprs go to the sink if it is given"""
+
+        new_product = cls.new_product
+        with quiet_mode(sink):
+            return [new_product(row) for row in rows]
 
     def __str__(self) -> str:
         """override __str__ method for return str by format:
-        'Название продукта, X руб. Остаток: X шт'"""
+        'Название продукта, X руб. Остаток: X шт',
+        the str is cached until the product is changed"""
 
-        return f"{self.name}, {self.__price} руб, Остаток: {self.quantity} шт"
+        rendered = self._str_cache
+        if rendered is None:
+            rendered = f"{self.name}, {self.__price} руб, " \
+                       f"Остаток: {self.quantity} шт"
+            self._str_cache = rendered
+        return rendered
 
     def __add__(self, product: Self) -> float:
         """override the __add__ method to return
         the sum of multiplying the price by the quantity of each product"""
         if not isinstance(product, type(self)):
             raise TypeError
-        result = self.__price * self.quantity
+        result: float = self.__price * self.quantity
         result += product.price * product.quantity
         return result
 
+    @classmethod
+    def total_value(cls,
+                    products: Iterable["Product"],
+                    precision: Precision = "float") -> Value:
+        """returns the sum of price * quantity of the products in one pass,
+        all the products must be of the type of the first one (as for
+        __add__). The precision is "float", "decimal" (the Decimal
+        of the prices as they are printed) or "kopeck" (the int number
+        of kopecks). The ProductTable is summed over its columns"""
+
+        from src.table import ProductTable
+
+        if isinstance(products, ProductTable):
+            if precision == "float":
+                return products.inventory_value()
+            return _sum_values(products.price_quantity(), precision)
+        kind: Optional[type] = None
+
+        def checked() -> Iterator[tuple[float, int]]:
+            nonlocal kind
+            for product in products:
+                if kind is None:
+                    if not isinstance(product, cls):
+                        raise TypeError
+                    kind = type(product)
+                elif not isinstance(product, kind):
+                    raise TypeError
+                yield product.__price, product.quantity
+
+        return _sum_values(checked(), precision)
+
     def __repr__(self) -> str:
         "override __repr__ in the MixinPrint class"
 
         return super().__repr__()
 
 
-class Category:
+def _sum_values(pairs: Iterable[tuple[float, int]],
+                precision: Precision) -> Value:
+    """returns the sum of price * quantity of the (price, quantity)
+    pairs with the precision"""
+
+    if precision == "float":
+        return float(sum([price * quantity for price, quantity in pairs]))
+    if precision == "decimal":
+        return sum([Decimal(repr(price)) * quantity
+                    for price, quantity in pairs], Decimal(0))
+    if precision == "kopeck":
+        return sum([round(price * 100) * quantity
+                    for price, quantity in pairs])
+    raise ValueError(f"unknown precision: {precision}")
+
+
+def _render_line(product: Product) -> str:
+    """returns the line of the Category.products str for the product"""
+    return f"{product.name}, {product.price} руб. " \
+           f"Остаток: {product.quantity} шт.\n"
+
+
+class Category(metaclass=RegistryCountMeta):
     """class Category
         attributes:
             name - the name of the category
             description - the description of the category
-            products - the list of the products"""
+            products - the list of the products or the ProductTable
+            total_quantity - the running total of the products quantity
+            total_value - the running total of price * quantity
+            validate_totals - the class attribute turns on checking
+            the running totals on every read
+            price_policy - the policy for lowering the prices
+            of the category's products, the price policy of the process
+            if it is None
+            registry - the CatalogRegistry which counts the categories
+            and products of the catalog
+            version - the counter of the changes of the products
+            category_count, product_count - the counters of the default
+            registry (of the category's registry for an instance)
+        the optional secondary indexes (see add_index) speed up
+        find_by_price, find_by_quantity and find_by"""
 
     name: str = ""
     description: str = ""
-    __products: list[Product] = []
+    __products: Union[list[Product], "ProductTable"] = []
     __product_names: dict[str, int] = dict()
-    category_count: ClassVar[int] = 0
-    product_count: ClassVar[int] = 0
+    __quantity_total: int = 0
+    __value_total: float = 0.0
+    __indexes: dict[str, CategoryIndex] = dict()
+    __lines: Optional[list[Optional[str]]] = None
+    __products_str: Optional[str] = None
+    __str_cache: Optional[tuple[str, str]] = None
+    __version: int = 0
+    price_policy: Optional[PricePolicy] = None
+    registry: CatalogRegistry = default_registry
+    category_count = RegistryCount("category_count")
+    product_count = RegistryCount("product_count")
+    validate_totals: ClassVar[bool] = False
 
     def __init__(self,
                  name: str,
                  description: str,
-                 products: list[Product]) -> None:
+                 products: Union[list[Product], "ProductTable"],
+                 price_policy: Optional[PricePolicy] = None,
+                 registry: Optional[CatalogRegistry] = None) -> None:
         """constructor for the Category class.
         Init the name, description and products attributes"""
 
         self.name = name
         self.description = description
+        self.price_policy = price_policy
+        self.registry = registry or default_registry
         self.__products = products
-        self.__product_names = {v.name: i for i, v in enumerate(products)}
-        Category.category_count += 1
-        Category.product_count += len(products)
+        if isinstance(products, list):
+            names = [p.name for p in products]
+        else:
+            names = products.names
+        self.__product_names = {v: i for i, v in enumerate(names)}
+        self.__quantity_total = self.__total_quantity()
+        self.__value_total = self.__inventory_value()
+        self.__indexes = {}
+        if isinstance(products, list):
+            for product in products:
+                product._add_observer(self)
+        else:
+            products._add_observer(self)
+        self.registry._categories.add()
+        self.registry._products.add(len(products))
+
+    @classmethod
+    def new_category(cls,
+                     category_dict: Category_json,
+                     quiet: bool = False,
+                     sink: Optional[ReprSink] = None,
+                     registry: Optional[CatalogRegistry] = None) -> Self:
+        """create the new category with its products from dictionary,
+        in the quiet mode the products don't print their repr"""
+
+        if quiet:
+            products = Product.bulk_new(category_dict["products"], sink)
+        else:
+            products = [Product.new_product(product)
+                        for product in category_dict["products"]]
+        return cls(category_dict["name"],
+                   category_dict["description"],
+                   products,
+                   registry=registry)
 
     @property
     def products(self) -> str:
         """returns str by format:
-        f'{name}, {price} руб. Остаток: {quantity} шт.\n'"""
-        products_str = "".join(
-            [f"{p.name}, {p.price} руб. Остаток: {p.quantity} шт.\n"
-             for p in self.__products]
+        f'{name}, {price} руб. Остаток: {quantity} шт.\n',
+        the str is cached until a product of the category is changed"""
+
+        products_str = self.__products_str
+        if products_str is not None:
+            return products_str
+        lines = self.__lines
+        if lines is None:
+            lines = self.__lines = [None] * len(self.__products)
+        products = self.__products
+        for row, line in enumerate(lines):
+            if line is None:
+                lines[row] = _render_line(products[row])
+        products_str = self.__products_str = "".join(
+            lines  # type: ignore[arg-type]
         )
         return products_str
 
+    def write_products(self, fp: TextIO, chunk_size: int = 1024) -> None:
+        """write the products to the file-like object by format:
+        f'{name}, {price} руб. Остаток: {quantity} шт.\n'
+        in chunks of chunk_size lines without building one big str"""
+
+        products = self.__products
+        for start in range(0, len(products), chunk_size):
+            fp.write("".join([
+                _render_line(p)
+                for p in self.iter_range(start, start + chunk_size)
+            ]))
+
     def add_product(self, product: Product) -> None:
         """add the product to the __products list of the Category's instance"""
         if not isinstance(product, Product):
             raise TypeError
         if product.name in self.__product_names:
             index = self.__product_names[product.name]
+            if metrics.enabled:
+                metrics.count("products_merged")
             self.__products[index].quantity += product.quantity
             if product.price > self.__products[index].price:
-                self.__products[index].price = product.price
+                self.__products[index].apply_price(product.price,
+                                                   self.price_policy)
             return
-        index = len(self.__products)
-        self.__product_names[product.name] = index
-        self.__products.append(product)
-        Category.product_count += 1
+        self.__insert([product])
+
+    def add_products(self,
+                     items: Iterable[Union[Product, Product_json]]
+                     ) -> AddProductsReport:
+        """add many products (or Product_json rows) at once:
+        the items are grouped by name first (the quantities are summed,
+        the highest price is kept), then every distinct product is
+        updated or inserted once. The new products are created before
+        any change, so the category isn't changed if an item is bad.
+        Returns the numbers of the inserted products and of the merged
+        items"""
+
+        groups: dict[str, list[Any]] = {}
+        count = 0
+        for item in items:
+            if isinstance(item, Product):
+                name, price, quantity = item.name, item.price, item.quantity
+            elif isinstance(item, dict):
+                name, price, quantity = (item["name"], item["price"],
+                                         item["quantity"])
+            else:
+                raise TypeError
+            count += 1
+            group = groups.get(name)
+            if group is None:
+                groups[name] = [quantity, price, item]
+                continue
+            group[0] += quantity
+            if price > group[1]:
+                group[1] = price
+        names = self.__product_names
+        products = self.__products
+        merged = []
+        new_items = []
+        new_products = []
+        # the new products are created and checked before any change,
+        # so a bad item leaves the category as it was
+        for name, (quantity, price, item) in groups.items():
+            index = names.get(name)
+            if index is not None:
+                merged.append((products[index], quantity, price))
+                continue
+            if quantity <= 0:
+                raise ValueError(VALUE_ERR_MSG)
+            if isinstance(item, Product):
+                product = item
+                new_items.append((product, quantity, price))
+            else:
+                row = item.copy()
+                row["price"] = price
+                row["quantity"] = quantity
+                with quiet_mode():
+                    product = Product.new_product(row)
+            self._check_product(product)
+            new_products.append(product)
+        for product, quantity, price in new_items:
+            product.quantity = quantity
+            if price > product.price:
+                product.apply_price(price, self.price_policy)
+        for product, quantity, price in merged:
+            product.quantity += quantity
+            if price > product.price:
+                product.apply_price(price, self.price_policy)
+        self.__insert(new_products)
+        if metrics.enabled:
+            metrics.count("products_merged", count - len(new_products))
+        return {"inserted": len(new_products),
+                "merged": count - len(new_products)}
+
+    def _check_product(self, product: Product) -> None:
+        """raise TypeError if the storage of the products can't keep
+        the product (see ProductTable._check_product)"""
+
+        products = self.__products
+        if not isinstance(products, list):
+            products._check_product(product)
+
+    def __insert(self, new_products: list[Product]) -> None:
+        """append the products with the new names and update
+        the name index, the totals, the caches and the counters"""
+
+        if not new_products:
+            return
+        for product in new_products:
+            self._check_product(product)
+        products = self.__products
+        names = self.__product_names
+        start = len(products)
+        for index, product in enumerate(new_products, start):
+            names[product.name] = index
+        if isinstance(products, list):
+            products.extend(new_products)
+            for product in new_products:
+                product._add_observer(self)
+        else:
+            for product in new_products:
+                products.append(product)
+        for product in new_products:
+            self.__quantity_total += product.quantity
+            self.__value_total += product.price * product.quantity
+        self.__str_cache = None
+        self.__version += 1
+        if self.__lines is not None:
+            lines = [_render_line(product) for product in new_products]
+            self.__lines.extend(lines)
+            if self.__products_str is not None:
+                self.__products_str += "".join(lines)
+        for category_index in self.__indexes.values():
+            for index, product in enumerate(new_products, start):
+                category_index.add(index, product)
+        self.registry._products.add(len(new_products))
+        if metrics.enabled:
+            metrics.count("products_inserted", len(new_products))
+
+    def get_product(self, name: str) -> Optional[Product]:
+        """returns the product by the name or None"""
+
+        row = self.__product_names.get(name)
+        if row is None:
+            return None
+        return self.__products[row]
+
+    def update_product(self, name: str, **fields: Any) -> Optional[Product]:
+        """set the fields of the product other than the name, the price
+        and the quantity (e.g. the description or Smartphone.color)
+        in place keeping its row: the product is taken out of
+        the secondary indexes, changed and indexed again.
+        Returns the product or None if there is no such product"""
+
+        for field in fields:
+            if field in ("name", "price", "quantity"):
+                raise ValueError(f"{field} isn't set by update_product")
+        row = self.__product_names.get(name)
+        if row is None:
+            return None
+        product = self.__products[row]
+        for field, value in fields.items():
+            # the product notifies the category (see _IndexedSlot)
+            setattr(product, field, value)
+        return product
+
+    def remove_product(self, name: str) -> Optional[Product]:
+        """remove the product by the name in O(1) and return it
+        (None if there is no such product). The last product
+        of the category takes the place of the removed one,
+        so the order of the products isn't preserved"""
+
+        names = self.__product_names
+        row = names.pop(name, None)
+        if row is None:
+            return None
+        products = self.__products
+        last = len(products) - 1
+        product = products[row]
+        moved = products[last]
+        for category_index in self.__indexes.values():
+            category_index.remove(row, product)
+            if row != last:
+                category_index.remove(last, moved)
+        self.__quantity_total -= product.quantity
+        self.__value_total -= product.price * product.quantity
+        if isinstance(products, list):
+            product._remove_observer(self)
+            products[row] = moved
+            products.pop()
+        else:
+            with quiet_mode():
+                product = Product(product.name, product.description,
+                                  product.price, product.quantity)
+            products.swap_remove(row)
+            moved = products[row] if row != last else moved
+        if row != last:
+            if names.get(moved.name) == last:
+                names[moved.name] = row
+            for category_index in self.__indexes.values():
+                category_index.add(row, moved)
+        self.__str_cache = None
+        self.__products_str = None
+        self.__version += 1
+        if self.__lines is not None:
+            self.__lines[row] = self.__lines[last]
+            self.__lines.pop()
+        self.registry._products.add(-1)
+        return product
+
+    def add_index(self, *attributes: str) -> None:
+        """create the secondary indexes by the attributes of the products:
+        the sorted index for 'price' and 'quantity' and the hash index
+        for other attributes (e.g. 'color', 'memory', 'country')"""
+
+        for attribute in attributes:
+            if attribute in self.__indexes:
+                continue
+            category_index = new_index(attribute)
+            for row, product in enumerate(self.__products):
+                category_index.add(row, product)
+            self.__indexes[attribute] = category_index
+
+    def get_index(self, attribute: str) -> Optional[CategoryIndex]:
+        """returns the secondary index by the attribute or None"""
+        return self.__indexes.get(attribute)
+
+    def set_index(self,
+                  attribute: str,
+                  category_index: CategoryIndex) -> None:
+        """set the prebuilt (e.g. loaded from disk) secondary index
+        by the attribute, the index must match the products"""
+        self.__indexes[attribute] = category_index
+
+    def search(self,
+               query: str,
+               limit: Optional[int] = None,
+               prefix: bool = True) -> list[SearchHit]:
+        """returns the products matching all the words of the query
+        by the name or the description, ranked by the score
+        (the full-text index is created on the first search)"""
+
+        self.add_index("text")
+        text_index: TextIndex = self.__indexes["text"]  # type: ignore
+        products = self.__products
+        return [SearchHit(score, products[row])
+                for score, row in text_index.search(query, prefix)[:limit]]
+
+    def __find_range(self,
+                     attribute: str,
+                     low: Optional[float],
+                     high: Optional[float]) -> list[Product]:
+        """returns the products with low <= attribute <= high"""
+
+        products = self.__products
+        category_index = self.__indexes.get(attribute)
+        if isinstance(category_index, SortedIndex):
+            return [products[row]
+                    for row in category_index.range(low, high)]
+        low = -math.inf if low is None else low
+        high = math.inf if high is None else high
+        found = [p for p in products
+                 if low <= getattr(p, attribute) <= high]
+        found.sort(key=lambda p: getattr(p, attribute))
+        return found
+
+    def find_by_price(self,
+                      low: Optional[float] = None,
+                      high: Optional[float] = None) -> list[Product]:
+        """returns the products with low <= price <= high
+        ordered by the price"""
+        return self.__find_range("price", low, high)
+
+    def find_by_quantity(self,
+                         low: Optional[int] = None,
+                         high: Optional[int] = None) -> list[Product]:
+        """returns the products with low <= quantity <= high
+        ordered by the quantity"""
+        return self.__find_range("quantity", low, high)
+
+    def find_by(self, **attributes: Any) -> list[Product]:
+        """returns the products with all the attributes equal
+        to the given values, e.g. find_by(memory=512, color='gold')"""
+
+        products = self.__products
+        row_lists = []
+        rest = {}
+        for attribute, value in attributes.items():
+            category_index = self.__indexes.get(attribute)
+            if isinstance(category_index, HashIndex):
+                row_lists.append(category_index.lookup(value))
+            else:
+                rest[attribute] = value
+        if row_lists:
+            candidates: Iterable[Product] = [
+                products[row] for row in intersect_rows(row_lists)
+            ]
+        else:
+            candidates = products
+        missing = object()
+        return [p for p in candidates
+                if all(getattr(p, k, missing) == v for k, v in rest.items())]
+
+    def reprice(self,
+                updates: Union[Mapping[str, float],
+                               Iterable[tuple[str, float]]],
+                policy: Optional[PricePolicy] = None) -> RepriceReport:
+        """apply the new prices by the product names and return
+        the report with the names of accepted, rejected, deferred
+        and missing products. Lowering the prices is decided by
+        the policy, the category's policy or the process policy"""
+
+        if policy is None:
+            policy = self.price_policy or get_price_policy()
+        if isinstance(updates, Mapping):
+            updates = updates.items()
+        report = new_reprice_report()
+        names = self.__product_names
+        products = self.__products
+        for name, price in updates:
+            index = names.get(name)
+            if index is None:
+                report["missing"].append(name)
+                continue
+            decision = products[index].apply_price(price, policy)
+            report[REPORT_KEYS[decision]].append(name)
+        return report
+
+    def _product_changed(self,
+                         product: Product,
+                         old_price: float,
+                         old_quantity: int) -> None:
+        """update the running totals after the price or the quantity
+        of the product has been changed"""
+
+        quantity = product.quantity
+        self.__quantity_total += quantity - old_quantity
+        self.__value_total += product.price * quantity
+        self.__value_total -= old_price * old_quantity
+        self.__str_cache = None
+        self.__version += 1
+        if not self.__indexes and self.__lines is None:
+            return
+        row = self.__row_of(product)
+        if row is None:
+            # the product shares the name with another one of the category
+            self.__lines = None
+            self.__products_str = None
+            self.__rebuild_indexes()
+            return
+        if self.__lines is not None:
+            self.__lines[row] = None
+            self.__products_str = None
+        for category_index in self.__indexes.values():
+            category_index.changed(row, product, old_price, old_quantity)
+
+    def _product_renamed(self, product: Product, old_name: str) -> None:
+        """update the name index, the cached str and the indexes
+        by the name after the product has been renamed"""
+
+        names = self.__product_names
+        row = self.__row_of(product, old_name)
+        if row is None:
+            # the product shares the name with another one of the category
+            self.__lines = None
+        else:
+            del names[old_name]
+            names.setdefault(product.name, row)
+            if self.__lines is not None:
+                self.__lines[row] = None
+        self.__products_str = None
+        self.__version += 1
+        self.__rebuild_indexes("name", "text")
+
+    def _product_field_changing(self, product: Product, field: str) -> None:
+        """take the product out of the indexes by the field
+        before the field is changed"""
+
+        row = self.__row_of(product)
+        if row is None:
+            return
+        for category_index in self.__indexes.values():
+            if category_index.covers(field):
+                category_index.remove(row, product)
+
+    def _product_field_changed(self, product: Product, field: str) -> None:
+        """index the product by the field again after it has been
+        changed"""
+
+        self.__version += 1
+        row = self.__row_of(product)
+        if row is None:
+            # the product shares the name with another one of the category
+            attributes = [attribute for attribute, category_index
+                          in self.__indexes.items()
+                          if category_index.covers(field)]
+            if attributes:
+                self.__rebuild_indexes(*attributes)
+            return
+        for category_index in self.__indexes.values():
+            if category_index.covers(field):
+                category_index.add(row, product)
+
+    def __row_of(self,
+                 product: Product,
+                 name: Optional[str] = None) -> Optional[int]:
+        """returns the row of the product in the category by its name
+        (or by the given name) or None if the name index points
+        to another product"""
+
+        row = self.__product_names.get(product.name if name is None
+                                       else name)
+        if row is None:
+            return None
+        if isinstance(self.__products, list):
+            return row if self.__products[row] is product else None
+        return row if getattr(product, "_row", None) == row else None
+
+    def __rebuild_indexes(self, *attributes: str) -> None:
+        """fill the secondary indexes (by the attributes or all)
+        from scratch"""
+
+        for attribute, category_index in self.__indexes.items():
+            if attributes and attribute not in attributes:
+                continue
+            category_index.clear()
+            for row, item in enumerate(self.__products):
+                category_index.add(row, item)
+
+    def inventory_value(self, precision: Precision = "float") -> Value:
+        """returns the sum of price * quantity of the products,
+        the float value is the running total (O(1)), the "decimal"
+        and "kopeck" precisions are summed in one pass
+        (see Product.total_value)"""
+
+        if precision == "float":
+            return self.total_value
+        products = self.__products
+        if isinstance(products, list):
+            return _sum_values([(p.price, p.quantity) for p in products],
+                               precision)
+        return _sum_values(products.price_quantity(), precision)
+
+    @property
+    def version(self) -> int:
+        """returns the counter of the changes of the products,
+        it grows on every added, removed or changed product"""
+        return self.__version
+
+    @property
+    def total_quantity(self) -> int:
+        """returns the total quantity of the products in stock"""
+
+        if Category.validate_totals:
+            self.check_totals()
+        return self.__quantity_total
+
+    @property
+    def total_value(self) -> float:
+        """returns the total price * quantity of the products in stock"""
+
+        if Category.validate_totals:
+            self.check_totals()
+        return self.__value_total
+
+    def check_totals(self) -> None:
+        """recompute the totals from scratch and
+        raise AssertionError if the running totals don't match"""
+
+        quantity = self.__total_quantity()
+        value = self.__inventory_value()
+        if quantity != self.__quantity_total or not math.isclose(
+                value, self.__value_total, rel_tol=1e-9, abs_tol=1e-6):
+            raise AssertionError(
+                f"running totals ({self.__quantity_total}, "
+                f"{self.__value_total}) != ({quantity}, {value})"
+            )
 
     def __str__(self) -> str:
         """override the __str__ method for return str by format:
         'Название категории, количество продуктов: X шт',
         где количество продуктов - общее количество товаров
-        на складе (quantity) всех продуктов данной категории"""
+        на складе (quantity) всех продуктов данной категории,
+        the str is cached until the category is changed"""
 
-        quantity = sum([p.quantity for p in self.__products])
-        return f"{self.name}, количество продуктов: {quantity} шт"
+        rendered = self.__str_cache
+        if rendered is not None and rendered[0] == self.name:
+            return rendered[1]
+        quantity = self.total_quantity
+        result = f"{self.name}, количество продуктов: {quantity} шт"
+        self.__str_cache = (self.name, result)
+        return result
 
-    def __iter__(self) -> Self:
-        """iterator for the __products"""
-        self.__current_index = 0
-        return self
+    def __iter__(self) -> Iterator[Product]:
+        """returns the new independent iterator over the __products,
+        so nested loops and threads don't share the position"""
+        return iter(self.__products)
 
-    def __next__(self) -> Product:
-        """get next item of the __products"""
-        if self.__current_index >= len(self.__products):
-            raise StopIteration
-        product = self.__products[self.__current_index]
-        self.__current_index += 1
-        return product
+    def iter_range(self,
+                   start: int,
+                   stop: Optional[int] = None) -> Iterator[Product]:
+        """returns the iterator over the products from start to stop
+        (the same as the slice [start:stop] without copying)"""
+
+        products = self.__products
+        rows = range(*slice(start, stop).indices(len(products)))
+        return map(products.__getitem__, rows)
+
+    def iter_snapshot(self) -> Iterator[Product]:
+        """returns the iterator over the products of the category
+        at the moment of the call, the products added later
+        by add_product (e.g. from another thread) aren't returned"""
+        return iter(tuple(self.__products))
+
+    def __total_quantity(self) -> int:
+        """returns the total quantity of the products in stock"""
+
+        if isinstance(self.__products, list):
+            return sum([p.quantity for p in self.__products])
+        return self.__products.total_quantity()
+
+    def __inventory_value(self) -> float:
+        """returns the sum of price * quantity of the products"""
+
+        if isinstance(self.__products, list):
+            value: float = sum([p.price * p.quantity
+                                for p in self.__products])
+            return value
+        return self.__products.inventory_value()
 
     def middle_price(self) -> float:
         """return the average price of products"""
 
         average_price = 0.0
         try:
-            quantity = sum([p.quantity for p in self.__products])
-            pr = sum([p.price * p.quantity for p in self.__products])
+            quantity = self.total_quantity
+            pr = self.total_value
             average_price = pr / quantity
         except ZeroDivisionError:
             return 0.0
         return average_price
 
 
-def read_json(filename: str) -> list[Category]:
+def _incomplete(error: json.JSONDecodeError) -> bool:
+    """returns True if the error can be caused by the end of the buffer
+    in the middle of the json item: an unterminated string or an error
+    in the last (cut) token, otherwise the item is broken"""
+
+    return error.msg.startswith("Unterminated string") or \
+        len(error.doc) - error.pos <= _CUT_TOKEN_SIZE
+
+
+def _iter_json_array(f: TextIO,
+                     chunk_size: int = READ_CHUNK_SIZE
+                     ) -> Generator[Any]:
+    """the generator decodes the top-level json array of objects
+    item by item, so only about one item is held in memory at a time.
+    The chunks of the item are joined and decoded when the size
+    of the buffer has doubled since the last try, so every char
+    is decoded a constant number of times however big the item is"""
+
+    buf = ""
+    pos = 0
+
+    def read() -> str:
+        """returns the next chunk of the file ("" at the end)"""
+        chunk = f.read(chunk_size)
+        if chunk and metrics.enabled:
+            metrics.count("json_bytes_parsed", len(chunk.encode("utf-8")))
+        return chunk
+
+    def skip_whitespace() -> str:
+        """skip whitespace and return the next significant char"""
+        nonlocal buf, pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()  # type: ignore[union-attr]
+            if pos < len(buf):
+                return buf[pos]
+            chunk = read()
+            if not chunk:
+                raise json.JSONDecodeError("Unexpected end of data",
+                                           buf, pos)
+            buf, pos = chunk, 0
+
+    if skip_whitespace() != "[":
+        raise json.JSONDecodeError("Expecting '['", buf, pos)
+    pos += 1
+    if skip_whitespace() == "]":
+        return
+    while True:
+        if buf[pos] != "{":
+            raise json.JSONDecodeError("Expecting '{'", buf, pos)
+        pieces = [buf]
+        size = len(buf) - pos
+        tried = 0
+        end_of_file = False
+        while True:
+            if end_of_file or size >= 2 * tried:
+                if len(pieces) > 1:
+                    buf = "".join(pieces)
+                    pieces = [buf]
+                try:
+                    item, pos = _decode_json(buf, pos)
+                    break
+                except json.JSONDecodeError as e:
+                    if end_of_file or not _incomplete(e):
+                        raise
+                tried = size
+            chunk = read()
+            if not chunk:
+                end_of_file = True
+                continue
+            pieces.append(chunk)
+            size += len(chunk)
+        yield item
+        char = skip_whitespace()
+        pos += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter",
+                                       buf, pos - 1)
+        skip_whitespace()
+
+
+def iter_categories_json(filename: str,
+                         chunk_size: int = READ_CHUNK_SIZE
+                         ) -> Generator[Category_json]:
+    """the generator reads a Json file incrementally and returns
+    the Category_json dictionaries one by one, the gzip-compressed
+    file is detected by its first bytes whatever its name is"""
+
+    with open(filename, "rb") as f:
+        compressed = f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    if compressed:
+        with gzip.open(filename, "rt", encoding="utf-8") as f:
+            yield from _iter_json_array(f, chunk_size)
+        return
+    with open(filename, encoding="utf-8") as f:
+        yield from _iter_json_array(f, chunk_size)
+
+
+def iter_categories(filename: str,
+                    chunk_size: int = READ_CHUNK_SIZE,
+                    quiet: bool = False,
+                    sink: Optional[ReprSink] = None,
+                    registry: Optional[CatalogRegistry] = None
+                    ) -> Generator[Category]:
+    """the generator reads a Json file incrementally and returns
+    Categories one by one"""
+
+    for category in iter_categories_json(filename, chunk_size):
+        yield Category.new_category(category, quiet, sink, registry)
+
+
+def iter_products(filename: str,
+                  chunk_size: int = READ_CHUNK_SIZE,
+                  quiet: bool = False,
+                  sink: Optional[ReprSink] = None
+                  ) -> Generator[Product]:
+    """the generator reads a Json file incrementally and returns
+    the products of all categories one by one"""
+
+    for category in iter_categories_json(filename, chunk_size):
+        if quiet:
+            yield from Product.bulk_new(category["products"], sink)
+            continue
+        for product in category["products"]:
+            yield Product.new_product(product)
+
+
+def read_json(filename: str,
+              quiet: bool = False,
+              sink: Optional[ReprSink] = None,
+              registry: Optional[CatalogRegistry] = None) -> list[Category]:
     """receives data from an Json file and returns
-    list of Category"""
+    list of Category, in the quiet mode the products don't print
+    their repr to the console, the categories are counted
+    by the registry (the default one if it isn't given)"""
+
+    if metrics.enabled:
+        start = time.perf_counter()
+        try:
+            return _read_json(filename, quiet, sink, registry)
+        finally:
+            metrics.observe("read_json", time.perf_counter() - start)
+    return _read_json(filename, quiet, sink, registry)
+
+
+def _read_json(filename: str,
+               quiet: bool,
+               sink: Optional[ReprSink],
+               registry: Optional[CatalogRegistry]) -> list[Category]:
+    """the body of read_json: the categories are created one by one
+    as the file is decoded, silently and counted by a scratch registry,
+    so a broken file has no side effects (no printed products,
+    no counted categories) and the decoded file isn't kept in memory"""
 
-    categories: list[Category] = []
-    categories_json: list[Category_json] = []
     if not pathlib.Path(filename).exists():
         return []
+    scratch = CatalogRegistry()
     try:
-        with open(filename, encoding="utf-8") as f:
-            categories_json = json.load(f)
+        categories = [Category.new_category(row, True, None, scratch)
+                      for row in iter_categories_json(filename)]
     except json.JSONDecodeError:
         return []
-    for category in categories_json:
-        products: list[Product] = []
-        for product in category["products"]:
-            products.append(Product(
-                name=product["name"],
-                description=product["description"],
-                price=product["price"],
-                quantity=product["quantity"]
-            ))
-        categories.append(Category(
-            name=category["name"],
-            description=category["description"],
-            products=products
-        ))
+    _commit_categories(categories, scratch, quiet, sink, registry)
     return categories
 
 
+def _commit_categories(categories: list[Category],
+                       scratch: CatalogRegistry,
+                       quiet: bool,
+                       sink: Optional[ReprSink],
+                       registry: Optional[CatalogRegistry]) -> None:
+    """the side effects of the loaded categories, deferred until
+    the whole file is read: the categories are moved from the scratch
+    registry to the registry and the reprs of the products are printed
+    (or sent to the sink in the quiet mode)"""
+
+    registry = registry or default_registry
+    for category in categories:
+        category.registry = registry
+    registry.merge(scratch)
+    if not quiet:
+        emit = _announce
+    elif sink is not None:
+        emit = sink.emit
+    else:
+        return
+    for category in categories:
+        for product in category:
+            emit(product)
+
+
+def _product_dict(product: Product) -> dict[str, Any]:
+    """returns the Product_json of the product with the "type" key
+    and the fields of its registered type (the "type" key
+    is omitted for the base Product)"""
+
+    product_type = _product_type_of(type(product))
+    result: dict[str, Any] = {}
+    if product_type.name != "product":
+        result[PRODUCT_TYPE_KEY] = product_type.name
+    for field in product_type.fields:
+        result[field] = getattr(product, field)
+    return result
+
+
+def _write_categories(f: TextIO,
+                      categories: Iterable[Category],
+                      chunk_size: int) -> None:
+    """write the Json array of the categories to the file
+    in chunks of chunk_size products"""
+
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    f.write("[")
+    for i, category in enumerate(categories):
+        f.write(f'{"," if i else ""}\n{{"name": {dumps(category.name)}, '
+                f'"description": {dumps(category.description)}, '
+                '"products": [')
+        products = iter(category)
+        separator = "\n"
+        while True:
+            chunk = [dumps(_product_dict(product))
+                     for _, product in zip(range(chunk_size), products)]
+            if not chunk:
+                break
+            f.write(separator + ",\n".join(chunk))
+            separator = ",\n"
+        f.write("]}")
+    f.write("\n]\n")
+
+
+def write_json(categories: Iterable[Category],
+               path_or_fp: Union[str, "os.PathLike[str]", TextIO],
+               compress: Optional[bool] = None,
+               chunk_size: int = 1024) -> None:
+    """write the categories to the Json file (or the text file-like
+    object) in the format of read_json incrementally, chunk_size
+    products at a time; the products of the registered subclasses
+    have the "type" key and their fields. The file is written
+    to a temporary file and renamed, it is compressed by gzip
+    if compress is True or the name ends with '.gz'"""
+
+    if not isinstance(path_or_fp, (str, os.PathLike)):
+        _write_categories(path_or_fp, categories, chunk_size)
+        return
+    filename = os.fspath(path_or_fp)
+    if compress is None:
+        compress = filename.endswith(".gz")
+    with atomic_write(filename) as temp_name:
+        if compress:
+            with gzip.open(temp_name, "wt", encoding="utf-8") as f:
+                _write_categories(f, categories, chunk_size)
+        else:
+            with open(temp_name, "w", encoding="utf-8") as f:
+                _write_categories(f, categories, chunk_size)
+
+
 class CategoryIter:
-    """iterator for products of category"""
-    def __init__(self, category: Category) -> None:
+    """iterator for products of category,
+    in the snapshot mode the products added after the start
+    of the iteration aren't returned"""
+    def __init__(self, category: Category, snapshot: bool = False) -> None:
         self.__category = category
+        self.__snapshot = snapshot
 
     def get_product(self) -> Generator[Product]:
         """generator for the products of the category"""
+        if self.__snapshot:
+            yield from self.__category.iter_snapshot()
+            return
         for product in self.__category:
             yield product
 
 
+class ProductType(NamedTuple):
+    """the registered product type
+        name - the value of the "type" key in the Json
+        cls - the product class
+        fields - the names of the constructor arguments
+        extract - the precompiled function returns the tuple of
+        the constructor arguments from the dictionary"""
+
+    name: str
+    cls: type[Product]
+    fields: tuple[str, ...]
+    extract: Callable[[Mapping[str, Any]], tuple[Any, ...]]
+
+
+_product_types: dict[str, ProductType] = {}
+_class_types: dict[type, ProductType] = {}
+
+
+def register_product_type(name: str,
+                          cls: type[Product],
+                          fields: Iterable[str]) -> ProductType:
+    """register the product class for the "type" key of the Json,
+    fields are the keys of the dictionary in the order
+    of the constructor arguments"""
+
+    fields = tuple(fields)
+    getter = itemgetter(*fields)
+    if len(fields) == 1:
+        def extract(row: Mapping[str, Any]) -> tuple[Any, ...]:
+            return (getter(row),)
+    else:
+        extract = getter  # type: ignore[assignment]
+    product_type = ProductType(name, cls, fields, extract)
+    _product_types[name] = product_type
+    _class_types[cls] = product_type
+    return product_type
+
+
+def get_product_type(name: str) -> ProductType:
+    """returns the registered product type by the "type" key"""
+
+    try:
+        return _product_types[name]
+    except KeyError:
+        raise ValueError(f"unknown product type: {name}") from None
+
+
+def _product_type_of(cls: type) -> ProductType:
+    """returns the product type of the class or of its nearest
+    registered base class"""
+
+    for klass in cls.__mro__:
+        product_type = _class_types.get(klass)
+        if product_type is not None:
+            return product_type._replace(cls=cls)
+    raise TypeError(f"{cls.__name__} isn't a product type")
+
+
+def product_type_name(product: Product) -> str:
+    """returns the "type" key of the product's class"""
+    return _product_type_of(type(product)).name
+
+
 class Smartphone(Product):
     """class Smartphone
         attributes:
@@ -299,6 +1633,8 @@ class Smartphone(Product):
             new_product - the classmethod creates the product
             instance"""
 
+    __slots__ = ("efficiency", "model", "memory", "color")
+
     def __init__(self, name, description, price, quantity,
                  efficiency, model, memory, color) -> None:
         """the constructor of the Smartphone class"""
@@ -324,6 +1660,8 @@ class LawnGrass(Product):
                 new_product - the classmethod creates the product
                 instance"""
 
+    __slots__ = ("country", "germination_period", "color")
+
     def __init__(self, name, description, price, quantity,
                  country, germination_period, color):
         """the constructor of the LawnGrass class"""
@@ -332,3 +1670,17 @@ class LawnGrass(Product):
         self.germination_period = germination_period
         self.color = color
         super().__init__(name, description, price, quantity)
+
+
+PRODUCT_FIELDS = ("name", "description", "price", "quantity")
+
+register_product_type("product", Product, PRODUCT_FIELDS)
+register_product_type("smartphone", Smartphone, PRODUCT_FIELDS + (
+    "efficiency", "model", "memory", "color"))
+register_product_type("lawn_grass", LawnGrass, PRODUCT_FIELDS + (
+    "country", "germination_period", "color"))
+
+metrics.instrument(Product, "price", "product_price")
+metrics.instrument(Category, "add_product", "category_add_product")
+metrics.instrument(Category, "add_products", "category_add_products")
+metrics.instrument(Category, "middle_price", "category_middle_price")
@@ -0,0 +1,125 @@
+import threading
+from typing import Any, Optional
+
+
+class ShardedCounter:
+    """the thread-safe counter: every thread increments its own shard
+    without locking, reading sums the shards of all the threads"""
+
+    def __init__(self) -> None:
+        self.__local = threading.local()
+        self.__shards: list[list[int]] = []
+        self.__lock = threading.Lock()
+
+    def add(self, value: int = 1) -> None:
+        """add the value to the shard of the current thread"""
+
+        try:
+            shard = self.__local.shard
+        except AttributeError:
+            shard = self.__local.shard = [0]
+            with self.__lock:
+                self.__shards.append(shard)
+        shard[0] += value
+
+    @property
+    def value(self) -> int:
+        """returns the sum of the shards"""
+        return sum([shard[0] for shard in self.__shards])
+
+    def reset(self) -> None:
+        """set all the shards to zero"""
+
+        with self.__lock:
+            for shard in self.__shards:
+                shard[0] = 0
+
+
+class CatalogRegistry:
+    """the registry of a catalog owns the counters of its categories
+    and products, every catalog of the process can have its own registry
+        attributes:
+            name - the name of the catalog
+            category_count - the count of the categories
+            product_count - the count of the products
+        methods:
+            reset - set the counters to zero
+            merge - add the counters of the other registry"""
+
+    def __init__(self, name: str = "") -> None:
+        """constructor for the CatalogRegistry class"""
+
+        self.name = name
+        self._categories = ShardedCounter()
+        self._products = ShardedCounter()
+
+    @property
+    def category_count(self) -> int:
+        """returns the count of the categories"""
+        return self._categories.value
+
+    @property
+    def product_count(self) -> int:
+        """returns the count of the products"""
+        return self._products.value
+
+    def reset(self) -> None:
+        """set the counters to zero, e.g. between tests"""
+
+        self._categories.reset()
+        self._products.reset()
+
+    def merge(self, other: "CatalogRegistry") -> None:
+        """add the counters of the other registry (e.g. the scratch
+        registry of a load which has succeeded) to the counters"""
+
+        self._categories.add(other.category_count)
+        self._products.add(other.product_count)
+
+
+default_registry = CatalogRegistry("default")
+
+
+class RegistryCount:
+    """the descriptor for the Category.category_count and
+    Category.product_count compatibility attributes: the class attribute
+    reads the default registry, the instance attribute reads
+    the registry of the category. Assigning the attribute sets
+    the counter (e.g. the old `Category.category_count = 0` resets it),
+    the class needs the RegistryCountMeta metaclass for that"""
+
+    def __init__(self, counter: str) -> None:
+        self.counter = counter
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> int:
+        registry = default_registry if obj is None else obj.registry
+        count: int = getattr(registry, self.counter)
+        return count
+
+    def __set__(self, obj: Any, value: int) -> None:
+        self.set(obj.registry, value)
+
+    def set(self, registry: CatalogRegistry, value: int) -> None:
+        """set the counter of the registry to the value"""
+
+        counter: ShardedCounter = getattr(
+            registry, "_categories" if self.counter == "category_count"
+            else "_products")
+        counter.reset()
+        counter.add(value)
+
+
+class RegistryCountMeta(type):
+    """the metaclass routes the assignment of the RegistryCount class
+    attributes to the default registry instead of replacing
+    the descriptor (which would stop the counting silently)"""
+
+    def __setattr__(cls, name: str, value: Any) -> None:
+        for klass in cls.__mro__:
+            attribute = klass.__dict__.get(name)
+            if isinstance(attribute, RegistryCount):
+                attribute.set(default_registry, value)
+                return
+            if name in klass.__dict__:
+                break
+        super().__setattr__(name, value)
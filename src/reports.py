@@ -0,0 +1,143 @@
+import heapq
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from src.products import Category
+
+TOP_N = 10
+LOW_STOCK = 5
+
+
+class CategoryTotals(NamedTuple):
+    """the totals of the category"""
+
+    name: str
+    products: int
+    quantity: int
+    value: float
+    middle_price: float
+
+
+class ProductValue(NamedTuple):
+    """the product of the report, value is price * quantity"""
+
+    value: float
+    category: str
+    name: str
+    price: float
+    quantity: int
+
+
+class CatalogReport(NamedTuple):
+    """the report over the catalog
+        categories - the totals of every category
+        quantity, value, middle_price - the totals of the catalog
+        top - the top_n most valuable products, the most valuable first
+        low_stock - the products with quantity <= low_stock,
+        the lowest quantity first
+        low_stock_categories - the names of the categories with
+        the total quantity <= low_stock"""
+
+    categories: list[CategoryTotals]
+    quantity: int
+    value: float
+    middle_price: float
+    top: list[ProductValue]
+    low_stock: list[ProductValue]
+    low_stock_categories: list[str]
+
+
+class _CategoryPart(NamedTuple):
+    """the cached result of the pass over one category"""
+
+    key: tuple[str, int]
+    totals: CategoryTotals
+    top: list[ProductValue]
+    low_stock: list[ProductValue]
+
+
+def _middle_price(value: float, quantity: int) -> float:
+    """returns the average price weighted by the quantity"""
+    return value / quantity if quantity else 0.0
+
+
+class ReportEngine:
+    """the aggregation over the catalog: the totals by category,
+    the weighted average prices, the top-N most valuable products
+    and the low stock are computed in one pass over the products.
+    The result of every category is cached by the version
+    of the category, so only the changed categories are scanned again
+        methods:
+            report - returns the CatalogReport"""
+
+    def __init__(self,
+                 categories: Iterable[Category],
+                 top_n: int = TOP_N,
+                 low_stock: int = LOW_STOCK) -> None:
+        """constructor for the ReportEngine class"""
+
+        self.categories = list(categories)
+        self.top_n = top_n
+        self.low_stock = low_stock
+        self.__parts: dict[int, _CategoryPart] = {}
+        self.scans = 0
+
+    def __scan(self, category: Category) -> _CategoryPart:
+        """returns the result of the pass over the products
+        of the category, the cached one if the category isn't changed"""
+
+        key = (category.name, category.version)
+        part = self.__parts.get(id(category))
+        if part is not None and part.key == key:
+            return part
+        self.scans += 1
+        name = category.name
+        top_n = self.top_n
+        low_stock = self.low_stock
+        top: list[ProductValue] = []
+        low: list[ProductValue] = []
+        count = quantity_total = 0
+        value_total = 0.0
+        for product in category:
+            price = product.price
+            quantity = product.quantity
+            value = price * quantity
+            count += 1
+            quantity_total += quantity
+            value_total += value
+            if len(top) < top_n:
+                heapq.heappush(top, ProductValue(value, name, product.name,
+                                                 price, quantity))
+            elif top_n and value > top[0].value:
+                heapq.heapreplace(top, ProductValue(value, name,
+                                                    product.name, price,
+                                                    quantity))
+            if quantity <= low_stock:
+                low.append(ProductValue(value, name, product.name, price,
+                                        quantity))
+        totals = CategoryTotals(name, count, quantity_total, value_total,
+                                _middle_price(value_total, quantity_total))
+        part = self.__parts[id(category)] = _CategoryPart(
+            key, totals, top, low)
+        return part
+
+    def report(self) -> CatalogReport:
+        """returns the report over the categories"""
+
+        parts = [self.__scan(category) for category in self.categories]
+        live = {id(category) for category in self.categories}
+        for stale in set(self.__parts) - live:
+            del self.__parts[stale]
+        quantity = sum(part.totals.quantity for part in parts)
+        value = sum(part.totals.value for part in parts)
+        top = heapq.nlargest(self.top_n,
+                             (item for part in parts for item in part.top),
+                             key=lambda item: item.value)
+        low_stock = sorted((item for part in parts
+                            for item in part.low_stock),
+                           key=lambda item: item.quantity)
+        return CatalogReport(
+            [part.totals for part in parts], quantity, value,
+            _middle_price(value, quantity), top, low_stock,
+            [part.totals.name for part in parts
+             if part.totals.quantity <= self.low_stock])
@@ -0,0 +1,184 @@
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from typing import Callable, NamedTuple, Optional
+
+from src.products import Category, Product
+
+# the time to live of a reservation in seconds
+RESERVATION_TTL = 15 * 60.0
+
+# the category name and the product name
+Key = tuple[str, str]
+
+
+class ReservationLine(NamedTuple):
+    """the reserved quantity of the product of the category"""
+
+    category: str
+    name: str
+    quantity: int
+
+
+class Reservation(NamedTuple):
+    """the reservation of the products of an order
+        id - the id of the reservation
+        lines - the reserved products ordered by (category, name)
+        expires_at - the time (of the engine's clock) of the expiry"""
+
+    id: int
+    lines: tuple[ReservationLine, ...]
+    expires_at: float
+
+
+class InsufficientStock(ValueError):
+    """the quantity in stock of some products is less than requested,
+    shortages are (requested, in stock) by (category, name)"""
+
+    def __init__(self, shortages: dict[Key, tuple[int, int]]) -> None:
+        super().__init__(f"insufficient stock: {shortages}")
+        self.shortages = shortages
+
+
+class ReservationEngine:
+    """the all-or-nothing reservation of the products of the categories:
+    the reserved quantity is taken from the quantity of the product
+    at once (so the running totals of the categories show the stock
+    available for sale) and is given back by release or on expiry.
+    Every product has its own lock, the locks of an order are taken
+    in the order of (category, name), so the concurrent orders don't
+    deadlock and the orders of different products don't wait
+    for each other
+        methods:
+            reserve - reserve the quantities of many products
+            release - give the reserved quantities back
+            commit - keep the quantities sold
+            expire - release the expired reservations"""
+
+    def __init__(self,
+                 categories: Iterable[Category],
+                 ttl: float = RESERVATION_TTL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """constructor for the ReservationEngine class"""
+
+        self.__categories = {c.name: c for c in categories}
+        self.ttl = ttl
+        self.clock = clock
+        self.__ids = itertools.count(1)
+        self.__locks: dict[Key, threading.Lock] = {}
+        # the running totals of a category are updated under its lock
+        self.__category_locks = {name: threading.Lock()
+                                 for name in self.__categories}
+        self.__reservations: dict[int, Reservation] = {}
+        self.__expiry: list[tuple[float, int]] = []
+        self.__expiry_lock = threading.Lock()
+
+    def __product(self, key: Key) -> Product:
+        """returns the product by the key, KeyError if it is unknown"""
+
+        category = self.__categories.get(key[0])
+        product = None if category is None else category.get_product(key[1])
+        if product is None:
+            raise KeyError(key)
+        return product
+
+    @contextmanager
+    def __locked(self, keys: Iterable[Key]) -> Iterator[None]:
+        """hold the locks of the products in the order of the keys"""
+
+        with ExitStack() as stack:
+            for key in sorted(keys):
+                lock = self.__locks.get(key)
+                if lock is None:
+                    lock = self.__locks.setdefault(key, threading.Lock())
+                stack.enter_context(lock)
+            yield
+
+    def __add_quantity(self, key: Key, quantity: int) -> None:
+        """change the quantity of the product, the category is notified
+        by the product under the lock of the category"""
+
+        product = self.__product(key)
+        with self.__category_locks[key[0]]:
+            product.quantity += quantity
+
+    def reserve(self,
+                items: Iterable[tuple[str, str, int]],
+                ttl: Optional[float] = None) -> Reservation:
+        """reserve the quantities of the (category, name, quantity) items
+        all-or-nothing and return the reservation, InsufficientStock
+        is raised if any product hasn't enough quantity and KeyError
+        for an unknown product"""
+
+        self.expire()
+        wanted: dict[Key, int] = {}
+        for category, name, quantity in items:
+            if quantity <= 0:
+                raise ValueError(f"quantity must be positive: {quantity}")
+            key = (category, name)
+            wanted[key] = wanted.get(key, 0) + quantity
+        keys = sorted(wanted)
+        with self.__locked(keys):
+            products = [self.__product(key) for key in keys]
+            shortages = {key: (wanted[key], product.quantity)
+                         for key, product in zip(keys, products)
+                         if product.quantity < wanted[key]}
+            if shortages:
+                raise InsufficientStock(shortages)
+            for key in keys:
+                self.__add_quantity(key, -wanted[key])
+        reservation = Reservation(
+            next(self.__ids),
+            tuple(ReservationLine(*key, wanted[key]) for key in keys),
+            self.clock() + (self.ttl if ttl is None else ttl))
+        self.__reservations[reservation.id] = reservation
+        with self.__expiry_lock:
+            heapq.heappush(self.__expiry,
+                           (reservation.expires_at, reservation.id))
+        return reservation
+
+    def release(self, reservation_id: int) -> bool:
+        """give the reserved quantities back to the products,
+        returns False if the reservation is already released,
+        committed or expired"""
+
+        reservation = self.__reservations.pop(reservation_id, None)
+        if reservation is None:
+            return False
+        keys = [(line.category, line.name) for line in reservation.lines]
+        with self.__locked(keys):
+            for line, key in zip(reservation.lines, keys):
+                try:
+                    self.__add_quantity(key, line.quantity)
+                except KeyError:
+                    # the product has been removed from the category
+                    continue
+        return True
+
+    def commit(self, reservation_id: int) -> bool:
+        """keep the reserved quantities sold, returns False
+        if the reservation is already released, committed or expired"""
+        return self.__reservations.pop(reservation_id, None) is not None
+
+    def get(self, reservation_id: int) -> Optional[Reservation]:
+        """returns the active reservation by the id or None"""
+        return self.__reservations.get(reservation_id)
+
+    def expire(self, now: Optional[float] = None) -> list[int]:
+        """release the reservations expired by now (the engine's clock
+        if it isn't given) and return their ids"""
+
+        now = self.clock() if now is None else now
+        expired = []
+        with self.__expiry_lock:
+            while self.__expiry and self.__expiry[0][0] <= now:
+                expired.append(heapq.heappop(self.__expiry)[1])
+        return [reservation_id for reservation_id in expired
+                if self.release(reservation_id)]
+
+    def __len__(self) -> int:
+        """returns the number of the active reservations"""
+        return len(self.__reservations)
@@ -0,0 +1,188 @@
+import heapq
+import json
+import math
+import re
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+from src.atomic import atomic_write
+from src.indexes import CategoryIndex
+
+if TYPE_CHECKING:
+    from src.products import Category, Product
+
+TEXT_ATTRIBUTE = "text"
+# the weights of the tokens of the name and of the description
+NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+INDEX_VERSION = 1
+
+_TOKEN = re.compile(r"\w+")
+_QUERY_TERM = re.compile(r"(\w+)(\*?)")
+
+
+def normalize(text: str) -> str:
+    """returns the case-folded text with 'ё' replaced by 'е'"""
+    return text.casefold().replace("ё", "е")
+
+
+def tokenize(text: str) -> list[str]:
+    """returns the normalized words (Cyrillic, Latin and digits)
+    of the text, e.g. 'Серый цвет, 200MP камера' gives
+    ['серый', 'цвет', '200mp', 'камера']"""
+    return _TOKEN.findall(normalize(text))
+
+
+def _product_terms(product: "Product") -> dict[str, int]:
+    """returns the weight of every term of the name and the description"""
+
+    terms: dict[str, int] = {}
+    for text, weight in ((product.name, NAME_WEIGHT),
+                         (product.description, DESCRIPTION_WEIGHT)):
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) + weight
+    return terms
+
+
+class SearchHit(NamedTuple):
+    """the found product and its score, the higher is the better"""
+
+    score: float
+    product: "Product"
+
+
+class TextIndex(CategoryIndex):
+    """the inverted full-text index over the names and the descriptions
+    of the products of the Category: every term keeps the rows
+    of the products with the weight of the term in the product.
+    The queries are the AND of the terms, a term ending with '*'
+    (and the last term with prefix=True) matches by the prefix,
+    the results are ranked by the sum of weight * idf of the terms"""
+
+    def __init__(self, attribute: str = TEXT_ATTRIBUTE) -> None:
+        super().__init__(attribute)
+        self.__postings: dict[str, dict[int, int]] = {}
+        self.__rows = 0
+        self.__terms: Optional[list[str]] = None
+
+    def add(self, row: int, product: "Product") -> None:
+        postings = self.__postings
+        for term, weight in _product_terms(product).items():
+            rows = postings.get(term)
+            if rows is None:
+                rows = postings[term] = {}
+                self.__terms = None
+            rows[row] = weight
+        self.__rows += 1
+
+    def remove(self, row: int, product: "Product") -> None:
+        postings = self.__postings
+        for term in _product_terms(product):
+            rows = postings.get(term)
+            if rows is None or rows.pop(row, None) is None:
+                continue
+            if not rows:
+                del postings[term]
+                self.__terms = None
+        self.__rows -= 1
+
+    def clear(self) -> None:
+        self.__postings.clear()
+        self.__rows = 0
+        self.__terms = None
+
+    def covers(self, field: str) -> bool:
+        return field in ("name", "description")
+
+    def __expand(self, term: str, prefix: bool) -> Iterator[str]:
+        """returns the indexed terms equal to the term
+        or starting with it for the prefix"""
+
+        if not prefix:
+            if term in self.__postings:
+                yield term
+            return
+        terms = self.__terms
+        if terms is None:
+            terms = self.__terms = sorted(self.__postings)
+        for i in range(bisect_left(terms, term), len(terms)):
+            if not terms[i].startswith(term):
+                break
+            yield terms[i]
+
+    def search(self, query: str,
+               prefix: bool = True) -> list[tuple[float, int]]:
+        """returns the (score, row) of the products matching all the terms
+        of the query ordered by the score descending"""
+
+        parsed = _QUERY_TERM.findall(normalize(query))
+        if not parsed:
+            return []
+        scores: Optional[dict[int, float]] = None
+        for i, (term, star) in enumerate(parsed):
+            is_prefix = bool(star) or (prefix and i == len(parsed) - 1)
+            term_scores: dict[int, float] = {}
+            for indexed in self.__expand(term, is_prefix):
+                rows = self.__postings[indexed]
+                idf = math.log(1 + self.__rows / len(rows))
+                for row, weight in rows.items():
+                    score = weight * idf
+                    if score > term_scores.get(row, 0.0):
+                        term_scores[row] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {row: score + term_scores[row]
+                          for row, score in scores.items()
+                          if row in term_scores}
+            if not scores:
+                return []
+        assert scores is not None
+        return sorted(((score, row) for row, score in scores.items()),
+                      key=lambda hit: (-hit[0], hit[1]))
+
+    def save(self, filename: str, products: Iterable["Product"]) -> None:
+        """write the index with the names of the indexed products
+        (in the order of the rows) to the Json file atomically"""
+
+        data = {
+            "version": INDEX_VERSION,
+            "names": [product.name for product in products],
+            "postings": {term: list(rows.items())
+                         for term, rows in self.__postings.items()},
+        }
+        with atomic_write(filename) as temp_name, \
+                open(temp_name, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, filename: str,
+             products: Iterable["Product"]) -> "TextIndex":
+        """read the index saved by save, ValueError is raised
+        if the products (in the order of the rows) don't match
+        the products of the saved index"""
+
+        with open(filename, encoding="utf-8") as f:
+            data: dict[str, Any] = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError("unsupported search index version")
+        if data["names"] != [product.name for product in products]:
+            raise ValueError("search index doesn't match the products")
+        index = cls()
+        index.__postings = {term: dict(map(tuple, rows))
+                            for term, rows in data["postings"].items()}
+        index.__rows = len(data["names"])
+        return index
+
+
+def search_catalog(categories: Iterable["Category"],
+                   query: str,
+                   limit: int = 10,
+                   prefix: bool = True) -> list[tuple["Category", SearchHit]]:
+    """returns the best limit hits of the query over all the categories
+    ordered by the score descending"""
+
+    hits = ((category, hit) for category in categories
+            for hit in category.search(query, prefix=prefix))
+    return heapq.nlargest(limit, hits, key=lambda found: found[1].score)
@@ -0,0 +1,269 @@
+import mmap
+import struct
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import Any, Optional, Union, overload
+
+from src.atomic import atomic_write
+from src.products import Category, Product, quiet_mode
+from src.registry import CatalogRegistry
+from src.table import ProductTable, _is_plain
+
+MAGIC = b"ECSNAP01"
+# magic, category count, product count, string count and the offsets
+# of the category table, the price, quantity, name and description
+# columns, the string offsets and the string data
+_HEADER = struct.Struct("<8sIQI8Q")
+# name id, description id, first product row, product count
+_CATEGORY = struct.Struct("<IIQQ")
+
+
+def _pad(size: int) -> int:
+    """returns the size aligned to 8 bytes"""
+    return (size + 7) & ~7
+
+
+class _StringTable:
+    """the interned utf-8 strings of the snapshot"""
+
+    def __init__(self) -> None:
+        self.ids: dict[str, int] = {}
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+
+    def add(self, value: str) -> int:
+        """returns the id of the string"""
+
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return string_id
+
+
+def save_snapshot(categories: Iterable[Category], filename: str) -> None:
+    """writes the categories to the binary snapshot file:
+    the fixed-width price and quantity columns, the string table
+    of the names and descriptions and the row range of every category.
+    The snapshot keeps the base Product columns only, TypeError
+    is raised for the subclasses of the Product before the file
+    is written. The file is replaced atomically"""
+
+    strings = _StringTable()
+    category_rows = array("Q")
+    prices = array("d")
+    quantities = array("q")
+    name_ids = array("I")
+    description_ids = array("I")
+    for category in categories:
+        first = len(prices)
+        for product in category:
+            if not _is_plain(product):
+                raise TypeError(f"{type(product).__name__} can't be kept "
+                                "by the snapshot, only Product can")
+            prices.append(product.price)
+            quantities.append(product.quantity)
+            name_ids.append(strings.add(product.name))
+            description_ids.append(strings.add(product.description))
+        category_rows.extend((strings.add(category.name),
+                              strings.add(category.description),
+                              first, len(prices) - first))
+    category_count = len(category_rows) // 4
+    product_count = len(prices)
+    sections: list[bytes] = [
+        b"".join(_CATEGORY.pack(*category_rows[i:i + 4])
+                 for i in range(0, len(category_rows), 4)),
+        prices.tobytes(),
+        quantities.tobytes(),
+        name_ids.tobytes(),
+        description_ids.tobytes(),
+        strings.offsets.tobytes(),
+        bytes(strings.data),
+    ]
+    offsets = []
+    position = _pad(_HEADER.size)
+    for section in sections:
+        offsets.append(position)
+        position = _pad(position + len(section))
+    header = _HEADER.pack(MAGIC, category_count, product_count,
+                          len(strings.ids), *offsets,
+                          len(strings.data))
+    with atomic_write(filename) as temp_name, open(temp_name, "wb") as f:
+        f.write(header)
+        for offset, section in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(section)
+
+
+class SnapshotCategory:
+    """the category of the snapshot, the products are read
+    from the memory-mapped file on access
+        attributes:
+            name - the name of the category
+            description - the description of the category
+        methods:
+            to_category - create the Category backed by the ProductTable"""
+
+    def __init__(self, snapshot: "Snapshot", name: str, description: str,
+                 first: int, count: int) -> None:
+        self._snapshot = snapshot
+        self.name = name
+        self.description = description
+        self._first = first
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> Product:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Product]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]
+                    ) -> Union[Product, list[Product]]:
+        """returns the product (or the list of products) built
+        from the row of the snapshot"""
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("product index out of range")
+        return self._snapshot._product(self._first + index)
+
+    def __iter__(self) -> Iterator[Product]:
+        for index in range(self._count):
+            yield self._snapshot._product(self._first + index)
+
+    def to_category(self,
+                    registry: Optional[CatalogRegistry] = None) -> Category:
+        """create the Category backed by the ProductTable filled
+        from the columns of the snapshot"""
+
+        snapshot = self._snapshot
+        stop = self._first + self._count
+        rows = range(self._first, stop)
+        table = ProductTable.from_columns(
+            [snapshot._string(snapshot._name_ids[row]) for row in rows],
+            [snapshot._string(snapshot._description_ids[row])
+             for row in rows],
+            snapshot._prices[self._first:stop],
+            snapshot._quantities[self._first:stop],
+        )
+        return Category(self.name, self.description, table,
+                        registry=registry)
+
+
+class Snapshot:
+    """the memory-mapped binary snapshot of the categories,
+    see load_snapshot
+        attributes:
+            categories - the list of the SnapshotCategory
+        methods:
+            to_categories - create the Categories from the snapshot
+            close - unmap the file"""
+
+    def __init__(self, filename: str) -> None:
+        """constructor for the Snapshot class"""
+
+        with open(filename, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            self._load()
+        except BaseException:
+            self.close()
+            raise
+
+    def _load(self) -> None:
+        """read the header and the category table"""
+
+        (magic, category_count, product_count, string_count,
+         categories_at, prices_at, quantities_at, names_at,
+         descriptions_at, offsets_at, strings_at,
+         strings_size) = _HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            raise ValueError("not a catalog snapshot file")
+        view = self._view
+        self._prices = view[prices_at:prices_at + 8 * product_count].cast("d")
+        self._quantities = view[quantities_at:
+                                quantities_at + 8 * product_count].cast("q")
+        self._name_ids = view[names_at:names_at + 4 * product_count].cast("I")
+        self._description_ids = view[
+            descriptions_at:descriptions_at + 4 * product_count].cast("I")
+        self._offsets = view[offsets_at:
+                             offsets_at + 8 * (string_count + 1)].cast("Q")
+        self._strings = view[strings_at:strings_at + strings_size]
+        self._cache: dict[int, str] = {}
+        self.categories: list[SnapshotCategory] = []
+        for i in range(category_count):
+            name_id, description_id, first, count = _CATEGORY.unpack_from(
+                view, categories_at + i * _CATEGORY.size)
+            self.categories.append(SnapshotCategory(
+                self, self._string(name_id), self._string(description_id),
+                first, count))
+
+    def _string(self, string_id: int) -> str:
+        """returns the string from the string table"""
+
+        value = self._cache.get(string_id)
+        if value is None:
+            start = self._offsets[string_id]
+            stop = self._offsets[string_id + 1]
+            value = str(self._strings[start:stop], "utf-8")
+            self._cache[string_id] = value
+        return value
+
+    def _product(self, row: int) -> Product:
+        """returns the product built from the row in the quiet mode"""
+
+        with quiet_mode():
+            return Product(self._string(self._name_ids[row]),
+                           self._string(self._description_ids[row]),
+                           self._prices[row],
+                           self._quantities[row])
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def __getitem__(self, index: int) -> SnapshotCategory:
+        return self.categories[index]
+
+    def __iter__(self) -> Iterator[SnapshotCategory]:
+        return iter(self.categories)
+
+    def to_categories(self,
+                      registry: Optional[CatalogRegistry] = None
+                      ) -> list[Category]:
+        """create the Categories backed by the ProductTables"""
+        return [c.to_category(registry) for c in self.categories]
+
+    def close(self) -> None:
+        """release the views and unmap the file"""
+
+        for name in ("_prices", "_quantities", "_name_ids",
+                     "_description_ids", "_offsets", "_strings"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def load_snapshot(filename: str) -> Snapshot:
+    """maps the snapshot file to memory and returns the Snapshot,
+    only the header and the category table are read, the products
+    are read on access"""
+    return Snapshot(filename)
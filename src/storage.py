@@ -0,0 +1,422 @@
+import json
+import sqlite3
+import threading
+from array import array
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any, Optional, Union
+
+from src.products import (PRODUCT_FIELDS, PRODUCT_TYPE_KEY, Category,
+                          Observers, Product, Product_json,
+                          _product_type_of, product_type_name)
+from src.registry import CatalogRegistry
+from src.table import ProductTable
+
+BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL REFERENCES categories (id),
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    type TEXT NOT NULL DEFAULT 'product',
+    extra TEXT,
+    UNIQUE (category_id, name)
+);
+CREATE INDEX IF NOT EXISTS products_name ON products (name);
+CREATE INDEX IF NOT EXISTS products_price ON products (category_id, price);
+"""
+
+# the merge semantics of Category.add_product: the quantities are summed
+# and the higher price is kept
+_UPSERT = """
+INSERT INTO products (category_id, name, description, price, quantity,
+                      type, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (category_id, name) DO UPDATE SET
+    quantity = quantity + excluded.quantity,
+    price = MAX(price, excluded.price)
+"""
+
+_INSERT = """
+INSERT INTO products (category_id, name, description, price, quantity,
+                      type, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SELECT = ("SELECT p.name, p.description, p.price, p.quantity, p.type, "
+           "p.extra")
+
+Row = tuple[int, str, str, float, int, str, Optional[str]]
+
+
+def _product_row(category_id: int,
+                 item: Union[Product, Product_json]) -> Row:
+    """returns the row of the products table for the product
+    (or the Product_json), the fields of the subclasses are kept
+    as json in the extra column"""
+
+    if isinstance(item, Product):
+        type_name = product_type_name(item)
+        extra = {field: getattr(item, field)
+                 for field in _product_type_of(type(item)).fields
+                 if field not in PRODUCT_FIELDS}
+        name, description = item.name, item.description
+        price, quantity = item.price, item.quantity
+    elif isinstance(item, dict):
+        type_name = item.get(PRODUCT_TYPE_KEY, "product")
+        extra = {key: value for key, value in item.items()
+                 if key not in PRODUCT_FIELDS and key != PRODUCT_TYPE_KEY}
+        name, description = item["name"], item["description"]
+        price, quantity = item["price"], item["quantity"]
+    else:
+        raise TypeError
+    return (category_id, name, description, price, quantity, type_name,
+            json.dumps(extra, ensure_ascii=False) if extra else None)
+
+
+def _product_json(row: tuple[Any, ...]) -> Product_json:
+    """returns the Product_json of the selected row"""
+
+    name, description, price, quantity, type_name, extra = row
+    product: dict[str, Any] = json.loads(extra) if extra else {}
+    product.update(name=name, description=description, price=price,
+                   quantity=quantity)
+    product[PRODUCT_TYPE_KEY] = type_name
+    return product  # type: ignore[return-value]
+
+
+class CatalogStore:
+    """the persistent catalog in the SQLite database (in the WAL mode),
+    every thread uses its own connection of the pool
+        methods:
+            add_category - create or update the category
+            add_products - the bulk upsert with the add_product merge
+            save - replace the stored categories with the given ones
+            load_category - create the Category from the store,
+            eager or lazy (backed by the StoreTable)
+            find_by_name, find_by_price - the indexed queries
+            close - close the connections of all the threads"""
+
+    def __init__(self, filename: str) -> None:
+        """constructor for the CatalogStore class"""
+
+        self.filename = filename
+        self.__local = threading.local()
+        self.__connections: list[sqlite3.Connection] = []
+        self.__lock = threading.Lock()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """returns the connection of the current thread"""
+
+        connection: Optional[sqlite3.Connection] = getattr(
+            self.__local, "connection", None)
+        if connection is None:
+            # the connections are in the autocommit mode,
+            # the bulk writes open their transactions explicitly
+            connection = sqlite3.connect(self.filename,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self.__local.connection = connection
+            with self.__lock:
+                self.__connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """the transaction on the connection of the current thread"""
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self) -> None:
+        """close the connections of all the threads"""
+
+        with self.__lock:
+            for connection in self.__connections:
+                connection.close()
+            self.__connections.clear()
+        self.__local = threading.local()
+
+    def __enter__(self) -> "CatalogStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __category_id(self, connection: sqlite3.Connection,
+                      name: str, description: str) -> int:
+        """create or update the category and return its id"""
+
+        connection.execute(
+            "INSERT INTO categories (name, description) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET "
+            "description = excluded.description", (name, description))
+        category_id: int = connection.execute(
+            "SELECT id FROM categories WHERE name = ?", (name,)
+        ).fetchone()[0]
+        return category_id
+
+    def add_category(self, name: str, description: str) -> int:
+        """create the category or update its description,
+        returns the id of the category"""
+
+        with self._transaction() as connection:
+            return self.__category_id(connection, name, description)
+
+    def category_names(self) -> list[str]:
+        """returns the names of the stored categories"""
+
+        return [name for name, in self._connection().execute(
+            "SELECT name FROM categories ORDER BY id")]
+
+    def add_products(self,
+                     category: str,
+                     items: Iterable[Union[Product, Product_json]],
+                     batch_size: int = BATCH_SIZE) -> None:
+        """upsert the products (or Product_json rows) of the category
+        by executemany in batches of batch_size in one transaction:
+        the quantities of the products with the same name are summed
+        and the higher price is kept, as by Category.add_product"""
+
+        with self._transaction() as connection:
+            category_id = self.__id_of(connection, category)
+            batch = []
+            for item in items:
+                batch.append(_product_row(category_id, item))
+                if len(batch) >= batch_size:
+                    connection.executemany(_UPSERT, batch)
+                    batch.clear()
+            connection.executemany(_UPSERT, batch)
+
+    def __id_of(self, connection: sqlite3.Connection, category: str) -> int:
+        """returns the id of the category by the name,
+        KeyError is raised for an unknown category"""
+
+        row = connection.execute("SELECT id FROM categories WHERE name = ?",
+                                 (category,)).fetchone()
+        if row is None:
+            raise KeyError(category)
+        category_id: int = row[0]
+        return category_id
+
+    def save(self, categories: Iterable[Category],
+             batch_size: int = BATCH_SIZE) -> None:
+        """replace the stored products of the categories with
+        the products of the categories in one transaction"""
+
+        with self._transaction() as connection:
+            for category in categories:
+                category_id = self.__category_id(
+                    connection, category.name, category.description)
+                connection.execute(
+                    "DELETE FROM products WHERE category_id = ?",
+                    (category_id,))
+                batch = []
+                for product in category:
+                    batch.append(_product_row(category_id, product))
+                    if len(batch) >= batch_size:
+                        connection.executemany(_INSERT, batch)
+                        batch.clear()
+                connection.executemany(_INSERT, batch)
+
+    def load_category(self,
+                      name: str,
+                      lazy: bool = False,
+                      registry: Optional[CatalogRegistry] = None
+                      ) -> Category:
+        """create the Category from the store: the products are created
+        in the quiet mode or, if lazy, the category is backed
+        by the StoreTable which reads and writes the store on access
+        and keeps only the names of the products in memory (TypeError
+        is raised for the category with the products of the subclasses,
+        they are loaded eagerly only)"""
+
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT id, description FROM categories WHERE name = ?",
+            (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        category_id, description = row
+        products: Union[list[Product], ProductTable]
+        if lazy:
+            products = StoreTable(self, category_id)
+        else:
+            products = Product.bulk_new(
+                _product_json(product) for product in connection.execute(
+                    f"{_SELECT} FROM products p WHERE category_id = ? "
+                    "ORDER BY id", (category_id,)))
+        return Category(name, description, products, registry=registry)
+
+    def load_categories(self,
+                        lazy: bool = False,
+                        registry: Optional[CatalogRegistry] = None
+                        ) -> list[Category]:
+        """create all the stored categories, see load_category"""
+        return [self.load_category(name, lazy, registry)
+                for name in self.category_names()]
+
+    def find_by_name(self, name: str) -> list[tuple[str, Product]]:
+        """returns the (category name, product) of the products
+        with the name in all the categories"""
+
+        with_category = self._connection().execute(
+            f"{_SELECT}, c.name FROM products p "
+            "JOIN categories c ON c.id = p.category_id "
+            "WHERE p.name = ? ORDER BY p.id", (name,))
+        return self.__products(with_category)
+
+    def find_by_price(self,
+                      category: str,
+                      low: Optional[float] = None,
+                      high: Optional[float] = None,
+                      limit: Optional[int] = None
+                      ) -> list[tuple[str, Product]]:
+        """returns the (category name, product) of the products
+        of the category with low <= price <= high ordered by the price"""
+
+        low = float("-inf") if low is None else low
+        high = float("inf") if high is None else high
+        with_category = self._connection().execute(
+            f"{_SELECT}, c.name FROM products p "
+            "JOIN categories c ON c.id = p.category_id "
+            "WHERE c.name = ? AND p.price BETWEEN ? AND ? "
+            "ORDER BY p.price, p.id LIMIT ?",
+            (category, low, high, -1 if limit is None else limit))
+        return self.__products(with_category)
+
+    @staticmethod
+    def __products(rows: Iterable[tuple[Any, ...]]
+                   ) -> list[tuple[str, Product]]:
+        """returns the (category name, product) of the selected rows"""
+
+        rows = list(rows)
+        products = Product.bulk_new(_product_json(row[:-1]) for row in rows)
+        return [(row[-1], product) for row, product in zip(rows, products)]
+
+
+class _StoreColumn:
+    """the column of the products table addressed by the rows
+    of the StoreTable"""
+
+    def __init__(self, table: "StoreTable", column: str) -> None:
+        self._table = table
+        self._select = f"SELECT {column} FROM products WHERE id = ?"
+        self._update = f"UPDATE products SET {column} = ? WHERE id = ?"
+
+    def __getitem__(self, row: int) -> Any:
+        table = self._table
+        return table._store._connection().execute(
+            self._select, (table._ids[row],)).fetchone()[0]
+
+    def __setitem__(self, row: int, value: Any) -> None:
+        table = self._table
+        table._store._connection().execute(
+            self._update, (value, table._ids[row]))
+
+    def __len__(self) -> int:
+        return len(self._table._ids)
+
+
+class StoreTable(ProductTable):
+    """the ProductTable backed by the CatalogStore: only the names
+    and the ids of the products are kept in memory, the descriptions,
+    prices and quantities are read and written by the row on access,
+    the aggregates are computed by the database. As the ProductTable
+    it keeps the base Product only: the rows are viewed as Products,
+    so the category with the products of the subclasses (e.g.
+    Smartphone) is rejected with TypeError"""
+
+    def __init__(self, store: CatalogStore, category_id: int) -> None:
+        """constructor for the StoreTable class"""
+
+        typed = store._connection().execute(
+            "SELECT type FROM products WHERE category_id = ? "
+            "AND type != 'product' LIMIT 1", (category_id,)).fetchone()
+        if typed is not None:
+            raise TypeError(f"the products of the type {typed[0]} can't "
+                            "be kept by the StoreTable, only product can")
+        self._store = store
+        self._category_id = category_id
+        self._names: list[str] = []
+        self._ids = array("q")
+        for product_id, name in store._connection().execute(
+                "SELECT id, name FROM products WHERE category_id = ? "
+                "ORDER BY id", (category_id,)):
+            self._ids.append(product_id)
+            self._names.append(name)
+        self._descriptions = _StoreColumn(self, "description")  # type: ignore
+        self._prices = _StoreColumn(self, "price")  # type: ignore
+        self._quantities = _StoreColumn(self, "quantity")  # type: ignore
+        self._observers: Observers = []
+
+    def append(self, product: Product) -> None:
+        """insert the product into the store as a new row"""
+
+        cursor = self._store._connection().execute(
+            _INSERT, _product_row(self._category_id, product))
+        self._ids.append(cursor.lastrowid)  # type: ignore[arg-type]
+        self._names.append(product.name)
+
+    def _set_name(self, row: int, name: str) -> None:
+        """write the name of the product of the row to the store,
+        the names are kept in memory too"""
+
+        self._store._connection().execute(
+            "UPDATE products SET name = ? WHERE id = ?",
+            (name, self._ids[row]))
+        self._names[row] = name
+
+    def swap_remove(self, row: int) -> None:
+        """delete the product of the row from the store
+        and move the last row to its place"""
+
+        self._store._connection().execute(
+            "DELETE FROM products WHERE id = ?", (self._ids[row],))
+        ids, names = self._ids, self._names
+        ids[row], names[row] = ids[-1], names[-1]
+        ids.pop()
+        names.pop()
+
+    def price_quantity(self) -> Iterator[tuple[float, int]]:
+        """returns the iterator over the (price, quantity) of the rows"""
+
+        return iter(self._store._connection().execute(
+            "SELECT price, quantity FROM products WHERE category_id = ? "
+            "ORDER BY id", (self._category_id,)).fetchall())
+
+    def _numpy_columns(self) -> None:
+        """the columns aren't in memory"""
+        return None
+
+    def __aggregate(self, expression: str) -> Any:
+        """returns the aggregate over the products of the category"""
+
+        return self._store._connection().execute(
+            f"SELECT {expression} FROM products WHERE category_id = ?",
+            (self._category_id,)).fetchone()[0]
+
+    def total_quantity(self) -> int:
+        return int(self.__aggregate("COALESCE(SUM(quantity), 0)"))
+
+    def inventory_value(self) -> float:
+        return float(self.__aggregate("COALESCE(SUM(price * quantity), 0)"))
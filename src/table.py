@@ -0,0 +1,255 @@
+import functools
+from array import array
+from collections.abc import Iterable, Iterator, MutableSequence
+from operator import mul
+from typing import Any, Optional, Union, overload
+
+from src.products import (Observers, Product, _notify, _notify_field,
+                          _notify_renamed, _subscribe, _unsubscribe)
+
+try:
+    import numpy as np  # type: ignore[import-not-found]
+except ImportError:  # numpy is optional, the stdlib array is used then
+    np = None
+
+
+class ProductView(Product):
+    """the product as a lightweight view over a row of the ProductTable,
+    reading and writing the attributes goes to the table's columns"""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "ProductTable", row: int) -> None:
+        """constructor for the ProductView class,
+        the view doesn't print its repr to the console"""
+
+        self._table = table
+        self._row = row
+
+    @property  # type: ignore[override]
+    def name(self) -> str:
+        """returns the name of the product from the table"""
+        return self._table._names[self._row]
+
+    @name.setter
+    def name(self, name: str) -> None:
+        table = self._table
+        old_name = table._names[self._row]
+        table._set_name(self._row, name)
+        _notify_renamed(table._observers, self, old_name)
+
+    @property  # type: ignore[override]
+    def description(self) -> str:
+        """returns the description of the product from the table"""
+        return self._table._descriptions[self._row]
+
+    @description.setter
+    def description(self, description: str) -> None:
+        descriptions = self._table._descriptions
+        observers = self._table._observers
+        if not observers:
+            descriptions[self._row] = description
+            return
+        _notify_field(observers, self, "description", functools.partial(
+            descriptions.__setitem__, self._row, description))
+
+    @property  # type: ignore[override]
+    def quantity(self) -> int:
+        """returns the quantity of the product from the table"""
+        return self._table._quantities[self._row]
+
+    @quantity.setter
+    def quantity(self, quantity: int) -> None:
+        quantities = self._table._quantities
+        old_quantity = quantities[self._row]
+        quantities[self._row] = quantity
+        _notify(self._table._observers, self, self.price, old_quantity)
+
+    @property
+    def _observers(self) -> Observers:
+        """the views share the observers of the table"""
+        return self._table._observers
+
+    @_observers.setter
+    def _observers(self, value: Optional[Observers]) -> None:
+        pass
+
+    @property  # type: ignore[override]
+    def _str_cache(self) -> None:
+        """the views don't cache their str"""
+        return None
+
+    @_str_cache.setter
+    def _str_cache(self, value: Optional[str]) -> None:
+        pass
+
+    @property
+    def _Product__price(self) -> float:
+        """the storage of the Product.price property in the table"""
+        return self._table._prices[self._row]
+
+    @_Product__price.setter
+    def _Product__price(self, price: float) -> None:
+        self._table._prices[self._row] = price
+
+
+def _is_plain(product: Product) -> bool:
+    """returns True if the product has the base Product fields only:
+    the Product or the view over a row of the ProductTable"""
+    return type(product) is Product or isinstance(product, ProductView)
+
+
+class ProductTable:
+    """the columnar storage of the products: the names and descriptions
+    are kept in lists, the prices and quantities in contiguous typed
+    arrays, so the aggregates over a category are vectorised.
+    The table keeps the base Product columns only, the subclasses
+    of the Product are rejected with TypeError
+        methods:
+            append - add the product as a new row
+            total_quantity - the total quantity of the products in stock
+            inventory_value - the sum of price * quantity of the products
+            middle_price - the weighted average price of the products"""
+
+    def __init__(self, products: Iterable[Product] = ()) -> None:
+        """constructor for the ProductTable class"""
+
+        self._names: list[str] = []
+        self._descriptions: list[str] = []
+        self._prices = array("d")
+        self._quantities = array("q")
+        self._observers: Observers = []
+        for product in products:
+            self.append(product)
+
+    @classmethod
+    def from_columns(cls,
+                     names: Iterable[str],
+                     descriptions: Iterable[str],
+                     prices: Iterable[float],
+                     quantities: Iterable[int]) -> "ProductTable":
+        """create the table from the columns of the products"""
+
+        table = cls()
+        table._names.extend(names)
+        table._descriptions.extend(descriptions)
+        table._prices.extend(prices)
+        table._quantities.extend(quantities)
+        if not (len(table._names) == len(table._descriptions)
+                == len(table._prices) == len(table._quantities)):
+            raise ValueError("columns of different length")
+        return table
+
+    @property
+    def names(self) -> list[str]:
+        """returns the column of the product names"""
+        return self._names
+
+    def _check_product(self, product: Product) -> None:
+        """raise TypeError if the product can't be kept by the table:
+        the table has the base Product columns only, so the fields
+        of the subclasses (e.g. Smartphone.memory) would be lost"""
+
+        if not _is_plain(product):
+            raise TypeError(f"{type(product).__name__} can't be kept "
+                            "by the ProductTable, only Product can")
+
+    def append(self, product: Product) -> None:
+        """add the product as a new row of the table,
+        TypeError is raised for the subclasses of the Product"""
+
+        self._check_product(product)
+        self._names.append(product.name)
+        self._descriptions.append(product.description)
+        self._prices.append(product.price)
+        self._quantities.append(product.quantity)
+
+    def _set_name(self, row: int, name: str) -> None:
+        """set the name of the product of the row"""
+        self._names[row] = name
+
+    def swap_remove(self, row: int) -> None:
+        """remove the row moving the last row to its place,
+        the views of the removed and the last rows become invalid"""
+
+        last = len(self) - 1
+        columns: tuple[MutableSequence[Any], ...] = (
+            self._names, self._descriptions, self._prices, self._quantities)
+        for column in columns:
+            column[row] = column[last]
+            column.pop()
+
+    def _add_observer(self, observer: Any) -> None:
+        """subscribe the observer (e.g. the Category) to the changes
+        of the prices and the quantities of the table"""
+        _subscribe(self._observers, observer)
+
+    def _remove_observer(self, observer: Any) -> None:
+        """unsubscribe the observer from the changes of the table"""
+        _unsubscribe(self._observers, observer)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @overload
+    def __getitem__(self, index: int) -> ProductView:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[ProductView]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]
+                    ) -> Union[ProductView, list[ProductView]]:
+        """returns the view over the row or the list of views"""
+
+        if isinstance(index, slice):
+            return [ProductView(self, row)
+                    for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("product index out of range")
+        return ProductView(self, index)
+
+    def __iter__(self) -> Iterator[ProductView]:
+        for row in range(len(self)):
+            yield ProductView(self, row)
+
+    def price_quantity(self) -> Iterator[tuple[float, int]]:
+        """returns the iterator over the (price, quantity) of the rows"""
+        return zip(self._prices, self._quantities)
+
+    def _numpy_columns(self) -> Optional[tuple[Any, Any]]:
+        """returns the numpy views over the price and quantity columns
+        or None if numpy isn't installed"""
+
+        if np is None or not len(self):
+            return None
+        return (np.frombuffer(self._prices, dtype=np.float64),
+                np.frombuffer(self._quantities, dtype=np.int64))
+
+    def total_quantity(self) -> int:
+        """returns the total quantity of the products in stock"""
+
+        columns = self._numpy_columns()
+        if columns is not None:
+            return int(columns[1].sum())
+        return sum(self._quantities)
+
+    def inventory_value(self) -> float:
+        """returns the sum of price * quantity of the products"""
+
+        columns = self._numpy_columns()
+        if columns is not None:
+            return float(np.dot(columns[0], columns[1]))
+        return float(sum(map(mul, self._prices, self._quantities)))
+
+    def middle_price(self) -> float:
+        """returns the average price of the products
+        weighted by their quantity"""
+
+        quantity = self.total_quantity()
+        if not quantity:
+            return 0.0
+        return self.inventory_value() / quantity
@@ -0,0 +1,234 @@
+import json
+import sys
+from collections.abc import Iterable
+from typing import (Any, Callable, NamedTuple, Optional, Union, get_args,
+                    get_origin)
+
+# typing.get_type_hints doesn't strip typing_extensions.NotRequired
+if sys.version_info < (3, 11):
+    from typing_extensions import get_type_hints
+else:
+    from typing import get_type_hints
+
+from src.products import (NEGATIVE_ZERO_PRICE, PRODUCT_FIELDS,
+                          PRODUCT_TYPE_KEY, VALUE_ERR_MSG, Category,
+                          Category_json, LawnGrass_json, Product,
+                          Product_json, ProductType, ReprSink,
+                          Smartphone_json, get_product_type,
+                          iter_categories_json)
+from src.registry import CatalogRegistry
+
+# returns the reason why the row is invalid or None
+Validator = Callable[[Any], Optional[str]]
+
+# the accepted Python types of the values by the annotation,
+# bool isn't accepted as a number
+_TYPES: dict[Any, tuple[type, ...]] = {
+    str: (str,),
+    int: (int,),
+    float: (float, int),
+    list: (list,),
+    dict: (dict,),
+}
+
+_MISSING = object()
+
+
+class RowError(NamedTuple):
+    """the error of the Json file
+        file - the name of the file
+        category - the index of the category or None for the whole file
+        product - the index of the product or None for the category
+        reason - the message"""
+
+    file: str
+    category: Optional[int]
+    product: Optional[int]
+    reason: str
+
+
+class ValidationFailed(ValueError):
+    """the strict validation has found the error"""
+
+    def __init__(self, error: RowError) -> None:
+        super().__init__(
+            f"{error.file}: category {error.category}, "
+            f"product {error.product}: {error.reason}")
+        self.error = error
+
+
+class ValidatedLoad(NamedTuple):
+    """the result of read_json_validated
+        categories - the categories of the valid rows
+        errors - the errors of the skipped rows"""
+
+    categories: list[Category]
+    errors: list[RowError]
+
+
+def _product_rules(row: dict[str, Any]) -> Optional[str]:
+    """the rules of the Product constructor and of the price setter"""
+
+    if row["quantity"] <= 0:
+        return VALUE_ERR_MSG
+    if row["price"] <= 0:
+        return NEGATIVE_ZERO_PRICE
+    return None
+
+
+def compile_validator(schema: type,
+                      rules: Optional[Validator] = None) -> Validator:
+    """compile the validator of the rows from the TypedDict once:
+    the required keys must be present and the values of the keys
+    must have the annotated types, then the rules are checked"""
+
+    required = schema.__required_keys__  # type: ignore[attr-defined]
+    checks = []
+    for key, hint in get_type_hints(schema).items():
+        origin = get_origin(hint) or hint
+        if origin is Union:
+            types = tuple(t for arg in get_args(hint)
+                          for t in _TYPES[get_origin(arg) or arg])
+        else:
+            types = _TYPES[origin]
+        checks.append((key, types, key in required,
+                       "/".join(t.__name__ for t in types)))
+    checks_tuple = tuple(checks)
+
+    def validate(row: Any) -> Optional[str]:
+        if type(row) is not dict:
+            return "the row isn't an object"
+        for key, types, is_required, type_names in checks_tuple:
+            value = row.get(key, _MISSING)
+            if value is _MISSING:
+                if is_required:
+                    return f"missing key '{key}'"
+            elif type(value) not in types:
+                return f"'{key}' must be {type_names}"
+        return rules(row) if rules is not None else None
+
+    return validate
+
+
+validate_category = compile_validator(Category_json)
+_product_validators: dict[str, Validator] = {}
+
+
+def register_schema(type_name: str, schema: type) -> None:
+    """compile and register the validator of the rows of the product type
+    (the "type" key of the Json) from its TypedDict"""
+    _product_validators[type_name] = compile_validator(schema,
+                                                       _product_rules)
+
+
+register_schema("product", Product_json)
+register_schema("smartphone", Smartphone_json)
+register_schema("lawn_grass", LawnGrass_json)
+
+
+def _fields_validator(product_type: ProductType) -> Validator:
+    """the validator of the product type registered without the schema:
+    the row must be a valid Product row with the fields of the type"""
+
+    validate_product = _product_validators["product"]
+    fields = tuple(field for field in product_type.fields
+                   if field not in PRODUCT_FIELDS)
+
+    def validate(row: Any) -> Optional[str]:
+        reason = validate_product(row)
+        if reason is not None:
+            return reason
+        for field in fields:
+            if field not in row:
+                return f"missing key '{field}'"
+        return None
+
+    return validate
+
+
+def _get_validator(type_name: str) -> Optional[Validator]:
+    """returns the validator of the product type or None if the type
+    isn't registered by register_schema or register_product_type"""
+
+    validate = _product_validators.get(type_name)
+    if validate is None:
+        try:
+            validate = _fields_validator(get_product_type(type_name))
+        except ValueError:
+            return None
+    return validate
+
+
+def validate_products(rows: Iterable[Any]) -> tuple[list[Any],
+                                                    list[tuple[int, str]]]:
+    """validate the batch of the product rows, returns the valid rows
+    and the (index, reason) of the invalid ones; the rows of the types
+    registered by register_product_type only are checked as the Product
+    rows with the fields of the type"""
+
+    validators: dict[str, Optional[Validator]] = {}
+    valid = []
+    invalid = []
+    for index, row in enumerate(rows):
+        type_name = (row.get(PRODUCT_TYPE_KEY, "product")
+                     if type(row) is dict else "product")
+        if type(type_name) is not str:
+            invalid.append((index, f"'{PRODUCT_TYPE_KEY}' must be str"))
+            continue
+        if type_name not in validators:
+            validators[type_name] = _get_validator(type_name)
+        validate = validators[type_name]
+        if validate is None:
+            invalid.append((index, f"unknown product type: {type_name}"))
+            continue
+        reason = validate(row)
+        if reason is None:
+            valid.append(row)
+        else:
+            invalid.append((index, reason))
+    return valid, invalid
+
+
+def read_json_validated(filename: str,
+                        strict: bool = False,
+                        sink: Optional[ReprSink] = None,
+                        registry: Optional[CatalogRegistry] = None
+                        ) -> ValidatedLoad:
+    """reads the Categories from the Json file checking every row
+    by the validators compiled from the TypedDicts, the products
+    are created in the quiet mode. In the lenient mode the invalid
+    categories and products are skipped and their errors are collected
+    (a missing or broken file is an error too, the categories read
+    before the broken place are kept), in the strict mode
+    ValidationFailed is raised on the first error"""
+
+    categories: list[Category] = []
+    errors: list[RowError] = []
+
+    def error(category: Optional[int], product: Optional[int],
+              reason: str) -> None:
+        row_error = RowError(filename, category, product, reason)
+        if strict:
+            raise ValidationFailed(row_error)
+        errors.append(row_error)
+
+    index = -1
+    try:
+        for index, category_dict in enumerate(
+                iter_categories_json(filename)):
+            reason = validate_category(category_dict)
+            if reason is not None:
+                error(index, None, reason)
+                continue
+            rows, invalid = validate_products(category_dict["products"])
+            for product_index, reason in invalid:
+                error(index, product_index, reason)
+            products = Product.bulk_new(rows, sink)
+            categories.append(Category(category_dict["name"],
+                                       category_dict["description"],
+                                       products, registry=registry))
+    except OSError as e:
+        error(None, None, f"{type(e).__name__}: {e}")
+    except json.JSONDecodeError as e:
+        error(index + 1, None, f"JSONDecodeError: {e}")
+    return ValidatedLoad(categories, errors)
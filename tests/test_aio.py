@@ -0,0 +1,123 @@
+import asyncio
+import json
+from typing import Any
+
+from pytest import CaptureFixture
+
+import src.aio
+from src.aio import AsyncCategory, aiter_categories, aread_catalogs, aread_json
+from src.products import Category, Product, quiet_mode
+from src.registry import CatalogRegistry
+
+
+def write_catalog(path: Any, products: int) -> str:
+    """write the catalog with one category of the products"""
+
+    data = [{"name": "A", "description": "category A", "products": [
+        {"name": f"A{i}", "description": "a", "price": 1.0 + i,
+         "quantity": 1} for i in range(products)]}]
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_aread_json(tmp_path, capsys: CaptureFixture[Any]) -> None:
+    """testing the chunks of the products are built in the executor
+    while the event loop keeps running other tasks"""
+
+    filename = write_catalog(tmp_path / "catalog.json", 25)
+    ticks = []
+
+    async def ticker() -> None:
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def main() -> list[Category]:
+        task = asyncio.create_task(ticker())
+        categories = await aread_json(filename, quiet=True, chunk_size=5)
+        task.cancel()
+        return categories
+
+    categories = asyncio.run(main())
+    assert [c.name for c in categories] == ["A"]
+    assert categories[0].total_quantity == 25
+    assert len(ticks) > 5
+    assert capsys.readouterr().out == ""
+    assert asyncio.run(aread_json(str(tmp_path / "missing.json"))) == []
+    (tmp_path / "bad.json").write_text("[{", encoding="utf-8")
+    assert asyncio.run(aread_json(str(tmp_path / "bad.json"))) == []
+
+
+def test_aread_json_quiet_mode(tmp_path, capsys: CaptureFixture[Any]) -> None:
+    """testing the quiet mode of the caller applies in the executor"""
+
+    filename = write_catalog(tmp_path / "catalog.json", 2)
+
+    async def main() -> list[Category]:
+        with quiet_mode():
+            return [c async for c in aiter_categories(filename)]
+
+    assert len(asyncio.run(main())) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_aread_json_no_side_effects(tmp_path,
+                                    capsys: CaptureFixture[Any]) -> None:
+    """testing the categories before the broken place of the file
+    aren't counted and printed"""
+
+    filename = tmp_path / "broken.json"
+    filename.write_text('[{"name": "A", "description": "a", "products": ['
+                        '{"name": "A1", "description": "a1", "price": 1.0,'
+                        ' "quantity": 1}]}, {"name": "B", "description": ',
+                        encoding="utf-8")
+    registry = CatalogRegistry()
+    assert asyncio.run(aread_json(str(filename), registry=registry)) == []
+    assert (registry.category_count, registry.product_count) == (0, 0)
+    assert capsys.readouterr().out == ""
+    filename = write_catalog(tmp_path / "catalog.json", 2)
+    categories = asyncio.run(aread_json(filename, registry=registry))
+    assert (registry.category_count, registry.product_count) == (1, 2)
+    assert categories[0].registry is registry
+    assert capsys.readouterr().out == "".join(
+        f"{product!r}\n" for product in categories[0])
+
+
+def test_aread_catalogs(tmp_path, monkeypatch) -> None:
+    """testing the concurrency limit of loading many catalogs"""
+
+    paths = [write_catalog(tmp_path / f"catalog{i}.json", i + 1)
+             for i in range(5)]
+    in_flight = peak = 0
+
+    async def counted_read_json(*args: Any) -> list[Category]:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return await read_json(*args)
+        finally:
+            in_flight -= 1
+
+    read_json = src.aio.aread_json
+    monkeypatch.setattr(src.aio, "aread_json", counted_read_json)
+    result = asyncio.run(aread_catalogs(paths, limit=2, quiet=True))
+    assert [c[0].total_quantity for c in result] == [1, 2, 3, 4, 5]
+    assert peak == 2
+
+
+def test_async_category(category_a: Category) -> None:
+    """testing `async for` over the products and the rendering"""
+
+    for i in range(4):
+        category_a.add_product(Product(f"B{i}", "b", 1.0, 1))
+
+    async def main() -> tuple[list[str], str]:
+        acategory = AsyncCategory(category_a, chunk_size=2)
+        names = [product.name async for product in acategory]
+        return names, await acategory.products()
+
+    names, products = asyncio.run(main())
+    assert names == ["A", "B0", "B1", "B2", "B3"]
+    assert products == category_a.products
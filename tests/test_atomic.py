@@ -0,0 +1,36 @@
+import os
+import stat
+
+import pytest
+
+from src.atomic import FILE_MODE, atomic_write
+
+
+def test_atomic_write_mode(tmp_path) -> None:
+    """testing the file gets the mode of open() limited by the umask"""
+
+    umask = os.umask(0o022)
+    try:
+        filename = str(tmp_path / "data.txt")
+        with atomic_write(filename) as temp_name:
+            with open(temp_name, "w", encoding="utf-8") as f:
+                f.write("data")
+            assert not os.path.exists(filename)
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(filename).st_mode) == FILE_MODE & ~0o022
+    assert [p.name for p in tmp_path.iterdir()] == ["data.txt"]
+
+
+def test_atomic_write_error(tmp_path) -> None:
+    """testing the old file is kept and the temporary file is removed"""
+
+    path = tmp_path / "data.txt"
+    path.write_text("old", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as temp_name:
+            with open(temp_name, "w", encoding="utf-8") as f:
+                f.write("new")
+            raise RuntimeError("broken")
+    assert path.read_text(encoding="utf-8") == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.txt"]
@@ -0,0 +1,28 @@
+import io
+import json
+
+from benchmarks.bench_products import main
+from benchmarks.generate import generate_catalog, write_catalog
+
+
+def test_generate_catalog() -> None:
+    """testing the synthetic catalog generator"""
+
+    catalog = generate_catalog(25, categories=4)
+    assert len(catalog) == 4
+    assert sum(len(c["products"]) for c in catalog) == 25
+    stream = io.StringIO()
+    write_catalog(stream, 25, categories=4)
+    assert json.loads(stream.getvalue()) == catalog
+
+
+def test_bench_products(tmp_path) -> None:
+    """testing the benchmark suite runs and writes the json report"""
+
+    output = tmp_path / "results.json"
+    report = main(["-s", "20", "-r", "1", "-o", str(output)])
+    assert json.loads(output.read_text()) == report
+    assert set(report["results"]["20"]) >= {
+        "read_json", "new_product_per_call", "add_product_new_per_call",
+        "add_product_merge_per_call", "middle_price", "products_cold",
+        "str", "category_iter", "peak_bytes_per_product"}
@@ -0,0 +1,161 @@
+import pytest
+
+from src.delta import apply_delta
+from src.pricing import ACCEPT_ALL, RejectAllPolicy
+from src.products import Category, Product, Smartphone
+from src.table import ProductTable
+
+
+def test_apply_delta(categories: list[Category], smartphone_dict) -> None:
+    """testing the operations of the delta and the event log"""
+
+    events = apply_delta(categories, [
+        {"op": "set", "category": "A", "name": "A1",
+         "price": 12.0, "quantity": 4},
+        {"op": "upsert", "category": "A",
+         "product": {"name": "A2", "description": "new",
+                     "price": 10.0, "quantity": 1}},
+        {"op": "upsert", "category": "A",
+         "product": {"name": "A3", "description": "product A",
+                     "price": 1.0, "quantity": 2}},
+        {"op": "remove", "category": "B", "name": "B1"},
+        {"op": "add_category", "name": "C", "description": "category C"},
+        {"op": "upsert", "category": "C",
+         "product": {**smartphone_dict, "type": "smartphone"}},
+        {"op": "set", "category": "B", "name": "B9", "quantity": 1},
+        {"op": "remove", "category": "D", "name": "D1"},
+    ])
+    assert [(e["event"], e["category"], e["name"]) for e in events] == [
+        ("product_changed", "A", "A1"),
+        ("product_changed", "A", "A2"),
+        ("product_added", "A", "A3"),
+        ("product_removed", "B", "B1"),
+        ("category_added", "C", ""),
+        ("product_added", "C", smartphone_dict["name"]),
+        ("missing", "B", "B9"),
+        ("missing", "D", "D1"),
+    ]
+    assert events[0]["changes"] == {"quantity": (10, 4),
+                                    "price": (10.0, 12.0)}
+    assert events[1]["changes"] == {"description": ("product A", "new"),
+                                    "quantity": (10, 1)}
+    category_a, category_b, category_c = categories
+    assert category_a.products == (
+        "A1, 12.0 руб. Остаток: 4 шт.\n"
+        "A2, 10.0 руб. Остаток: 1 шт.\n"
+        "A3, 1.0 руб. Остаток: 2 шт.\n"
+    )
+    assert category_a.total_value == 60.0
+    assert [p.name for p in category_b] == ["B2"]
+    assert isinstance(category_c.get_product(smartphone_dict["name"]),
+                      Smartphone)
+    for category in categories:
+        category.check_totals()
+
+
+def test_apply_delta_price_policy(categories: list[Category]) -> None:
+    """testing the lower prices of the delta go through the policy"""
+
+    events = apply_delta(categories, [
+        {"op": "set", "category": "A", "name": "A1",
+         "price": 5.0, "quantity": 1},
+    ], policy=RejectAllPolicy())
+    assert [e["event"] for e in events] == ["price_rejected",
+                                            "product_changed"]
+    assert events[0]["changes"] == {"price": (10.0, 5.0)}
+    assert categories[0].get_product("A1").price == 10.0  # type: ignore
+
+
+def test_apply_delta_subclass_fields(smartphone_dict) -> None:
+    """testing the changed fields of the subclass keep the hash index"""
+
+    category = Category("C", "category C", [])
+    apply_delta([category], [{"op": "upsert", "category": "C",
+                              "product": {**smartphone_dict,
+                                          "type": "smartphone"}}])
+    category.add_index("color")
+    name = smartphone_dict["name"]
+    events = apply_delta([category], [{"op": "upsert", "category": "C",
+                                       "product": {"name": name,
+                                                   "color": "black",
+                                                   "price": 1.0}}],
+                         policy=ACCEPT_ALL)
+    assert events[0]["changes"] == {"color": ("gold", "black"),
+                                    "price": (111_111.99, 1.0)}
+    assert category.find_by(color="gold") == []
+    assert [p.name for p in category.find_by(color="black")] == [name]
+    assert category.get_product(name).memory == 512  # type: ignore
+
+
+def test_apply_delta_keeps_order(smartphone_dict) -> None:
+    """testing the changed description and fields of the subclass
+    don't move the product"""
+
+    category = Category("A", "category A", [
+        Product(f"A{i}", "product A", 10.0, 1) for i in (1, 2, 3)])
+    category.add_index("text")
+    apply_delta([category], [
+        {"op": "upsert", "category": "A",
+         "product": {"name": "A1", "description": "fresh",
+                     "price": 10.0, "quantity": 1}},
+        {"op": "upsert", "category": "A",
+         "product": {**smartphone_dict, "type": "smartphone"}},
+        {"op": "upsert", "category": "A",
+         "product": {"name": smartphone_dict["name"], "color": "black",
+                     "price": 1_000_000.0}},
+    ])
+    assert [p.name for p in category] == ["A1", "A2", "A3",
+                                          smartphone_dict["name"]]
+    assert [hit.product.name for hit in category.search("fresh")] == ["A1"]
+    assert category.get_product(
+        smartphone_dict["name"]).color == "black"  # type: ignore
+
+
+def test_apply_delta_invalid_quantity(categories: list[Category]) -> None:
+    """testing the operations with a bad quantity are skipped
+    and reported"""
+
+    events = apply_delta(categories, [
+        {"op": "set", "category": "A", "name": "A1", "quantity": -5,
+         "price": 20.0},
+        {"op": "set", "category": "A", "name": "A2", "quantity": 0},
+        {"op": "upsert", "category": "A",
+         "product": {"name": "A1", "description": "product A",
+                     "price": 10.0,
+                     "quantity": 1.5}},  # type: ignore[typeddict-item]
+        {"op": "upsert", "category": "B",
+         "product": {"name": "B3", "description": "product B",
+                     "price": 10.0, "quantity": 0}},
+    ])
+    assert [(e["event"], e["name"], e["changes"]) for e in events] == [
+        ("invalid", "A1", {"quantity": (10, -5)}),
+        ("invalid", "A2", {"quantity": (10, 0)}),
+        ("invalid", "A1", {"quantity": (10, 1.5)}),
+        ("invalid", "B3", {"quantity": (None, 0)}),
+    ]
+    assert [c.total_quantity for c in categories] == [20, 25]
+    assert categories[0].get_product("A1").price == 10.0  # type: ignore
+    assert categories[1].get_product("B3") is None
+
+
+def test_apply_delta_type_change_table(smartphone_dict) -> None:
+    """testing the product of the other type isn't put into the table
+    and the old product is kept"""
+
+    category = Category("A", "category A", ProductTable([
+        Product("P", "product P", 10.0, 3)]))
+    events = apply_delta([category], [
+        {"op": "upsert", "category": "A",
+         "product": {**smartphone_dict, "name": "P", "type": "smartphone"}},
+    ])
+    assert [(e["event"], e["changes"]) for e in events] == [
+        ("invalid", {"type": ("product", "smartphone")})]
+    assert [str(p) for p in category] == ["P, 10.0 руб, Остаток: 3 шт"]
+    assert category.total_quantity == 3
+
+
+def test_apply_delta_unknown_op(categories: list[Category]) -> None:
+    """testing the unknown operation of the delta"""
+
+    with pytest.raises(ValueError):
+        apply_delta(categories, [{"op": "merge"}])
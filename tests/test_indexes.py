@@ -0,0 +1,84 @@
+import pytest
+
+from src.indexes import SortedIndex
+from src.products import Category, Product, Smartphone
+
+
+@pytest.fixture
+def shop(smartphone_dict) -> Category:
+    """the fixture of the category with the smartphones"""
+
+    phones = []
+    for i, (memory, color) in enumerate([(256, "gray"), (512, "gold"),
+                                         (512, "gray"), (1024, "blue")]):
+        phone = dict(smartphone_dict, name=f"phone {i}", memory=memory,
+                     color=color, price=10_000.0 * (i + 1), quantity=i + 1)
+        phones.append(Smartphone(**phone))
+    return Category("Смартфоны", "smartphones", phones)
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_find(shop: Category, indexed: bool) -> None:
+    """testing the queries with and without the secondary indexes"""
+
+    if indexed:
+        shop.add_index("price", "quantity", "memory", "color")
+    names = [p.name for p in shop.find_by_price(high=30_000.0)]
+    assert names == ["phone 0", "phone 1", "phone 2"]
+    names = [p.name for p in shop.find_by_price(15_000.0, 30_000.0)]
+    assert names == ["phone 1", "phone 2"]
+    names = [p.name for p in shop.find_by_quantity(high=2)]
+    assert names == ["phone 0", "phone 1"]
+    names = [p.name for p in shop.find_by(memory=512)]
+    assert names == ["phone 1", "phone 2"]
+    names = [p.name for p in shop.find_by(memory=512, color="gray")]
+    assert names == ["phone 2"]
+    assert shop.find_by(country="Belgium") == []
+
+
+def test_indexes_maintained(shop: Category, smartphone_dict) -> None:
+    """testing the indexes are updated by add_product and the changes
+    of the products"""
+
+    shop.add_index("price", "quantity", "memory")
+    shop.add_product(Smartphone(**dict(smartphone_dict, name="new",
+                                       price=5_000.0, quantity=1,
+                                       memory=512)))
+    assert [p.name for p in shop.find_by_price(high=10_000.0)] == [
+        "new", "phone 0"]
+    assert len(shop.find_by(memory=512)) == 3
+    product = shop.find_by_price(high=5_000.0)[0]
+    product.price = 100_000.0
+    product.quantity += 10
+    assert shop.find_by_price(low=50_000.0) == [product]
+    assert shop.find_by_quantity(low=10) == [product]
+    assert shop.find_by_price(high=5_000.0) == []
+
+
+def test_indexes_direct_set(shop: Category) -> None:
+    """testing the hash and the text indexes follow the fields
+    set directly on the products"""
+
+    shop.add_index("color", "text")
+    phone = shop.find_by(color="gold")[0]
+    phone.color = "red"
+    phone.description = "новинка"
+    assert shop.find_by(color="gold") == []
+    assert shop.find_by(color="red") == [phone]
+    assert [h.product for h in shop.search("новинка")] == [phone]
+    twin = Smartphone(phone.name, "twin", 1.0, 1, 1.0, "S", 64, "red")
+    other = Category("other", "", [twin, phone])
+    other.add_index("color")
+    twin.color = "green"
+    assert other.find_by(color="green") == [twin]
+    assert shop.find_by(color="red") == [phone]
+
+
+def test_sorted_index_attribute() -> None:
+    """testing the sorted index supports the price and the quantity only"""
+
+    with pytest.raises(ValueError):
+        SortedIndex("color")
+    index = SortedIndex("price")
+    index.add(0, Product("A", "a", 1.0, 1))
+    assert index.range(1.0, 1.0) == [0]
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from src.ingest import read_catalogs
+from src.products import Smartphone
+
+
+@pytest.fixture
+def supplier_files(tmp_path) -> list[str]:
+    """the fixture of the supplier files with the same categories"""
+
+    supplier_a = [
+        {"name": "Смартфоны", "description": "phones", "products": [
+            {"name": "Iphone 15", "description": "512GB",
+             "price": 210000.0, "quantity": 8},
+            {"name": "Xiaomi", "description": "1024GB",
+             "price": 31000.0, "quantity": 14},
+        ]},
+    ]
+    supplier_b = [
+        {"name": "Телевизоры", "description": "tv", "products": [
+            {"name": "QLED", "description": "4K",
+             "price": 123000.0, "quantity": 7},
+        ]},
+        {"name": "Смартфоны", "description": "phones", "products": [
+            {"name": "Iphone 15", "description": "512GB",
+             "price": 220000.0, "quantity": 2},
+            {"name": "Xiaomi", "description": "1024GB",
+             "price": 30000.0, "quantity": 1},
+        ]},
+    ]
+    paths = []
+    for i, data in enumerate([supplier_a, supplier_b]):
+        path = tmp_path / f"supplier_{i}.json"
+        path.write_text(json.dumps(data), encoding="utf-8")
+        paths.append(str(path))
+    bad = tmp_path / "bad.json"
+    bad.write_text('[{"name": "A", "description": "a", "products": [',
+                   encoding="utf-8")
+    zero = tmp_path / "zero.json"
+    zero.write_text(json.dumps([{"name": "A", "description": "a",
+                                 "products": [{"name": "A1",
+                                               "description": "a",
+                                               "price": 1.0,
+                                               "quantity": 0}]}]),
+                    encoding="utf-8")
+    return paths + [str(bad), str(zero), str(tmp_path / "missing.json")]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_read_catalogs(supplier_files: list[str], workers: int) -> None:
+    """testing the merge of the supplier files and the errors per file"""
+
+    result = read_catalogs(supplier_files, workers=workers)
+    assert [c.name for c in result.categories] == ["Смартфоны",
+                                                   "Телевизоры"]
+    phones = result.categories[0]
+    assert phones.products == (
+        "Iphone 15, 220000.0 руб. Остаток: 10 шт.\n"
+        "Xiaomi, 31000.0 руб. Остаток: 15 шт.\n"
+    )
+    assert sorted(result.errors) == sorted(supplier_files[2:])
+    assert result.errors[supplier_files[2]].startswith("JSONDecodeError")
+    assert result.errors[supplier_files[3]].startswith("ValueError")
+    assert result.errors[supplier_files[4]].startswith("FileNotFoundError")
+
+
+def test_read_catalogs_types(tmp_path, smartphone_dict) -> None:
+    """testing the typed products in the worker rows"""
+
+    path = tmp_path / "phones.json"
+    path.write_text(json.dumps([{
+        "name": "Смартфоны", "description": "phones",
+        "products": [dict(smartphone_dict, type="smartphone")],
+    }]), encoding="utf-8")
+    result = read_catalogs([str(path)], workers=0)
+    assert not result.errors
+    (phone,) = result.categories[0]
+    assert isinstance(phone, Smartphone)
+    assert phone.memory == smartphone_dict["memory"]
@@ -0,0 +1,82 @@
+import json
+from collections.abc import Iterator
+
+import pytest
+
+from src.metrics import (PrometheusFileExporter, enable_metrics,
+                         export_metrics, metrics, metrics_snapshot,
+                         to_prometheus)
+from src.products import Category, Product, read_json
+
+
+@pytest.fixture
+def enabled_metrics() -> Iterator[None]:
+    """the fixture turns the metrics on for the test"""
+
+    metrics.reset()
+    enable_metrics()
+    yield
+    enable_metrics(False)
+    metrics.reset()
+
+
+def test_metrics_disabled(product_a: Product) -> None:
+    """testing the instrumented methods aren't wrapped when disabled"""
+
+    metrics.reset()
+    price = Product.__dict__["price"]
+    enable_metrics()
+    assert Product.__dict__["price"] is not price
+    enable_metrics(False)
+    assert Product.__dict__["price"] is price
+    assert product_a.price == 10.0
+    assert metrics_snapshot()["histograms"] == {}
+
+
+def test_metrics_snapshot(enabled_metrics: None, tmp_path,
+                          categories: list[Category]) -> None:
+    """testing the counters and the histograms of the hot paths"""
+
+    path = tmp_path / "catalog.json"
+    data = [{"name": "A", "description": "Ёлки", "products": [
+        {"name": "A1", "description": "a", "price": 1.0, "quantity": 1}]}]
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    read_json(str(path), quiet=True)
+    category = categories[0]
+    category.add_product(Product("A1", "a", 1.0, 1))
+    category.add_products([{"name": "A2", "description": "a",
+                            "price": 1.0, "quantity": 1},
+                           {"name": "A3", "description": "a",
+                            "price": 1.0, "quantity": 1}])
+    assert category.middle_price() == 221 / 23
+    snapshot = metrics_snapshot()
+    assert snapshot["enabled"]
+    assert snapshot["counters"] == {
+        "json_bytes_parsed": path.stat().st_size,
+        "products_merged": 2,
+        "products_inserted": 1,
+    }
+    histograms = snapshot["histograms"]
+    assert histograms["read_json"]["count"] == 1
+    assert histograms["category_add_product"]["count"] == 1
+    assert histograms["category_add_products"]["count"] == 1
+    assert histograms["category_middle_price"]["count"] == 1
+    assert histograms["product_price_get"]["count"] > 0
+    assert histograms["read_json"]["buckets"][-1] == (float("inf"), 1)
+
+
+def test_prometheus_exporter(enabled_metrics: None, tmp_path) -> None:
+    """testing the Prometheus text format written to the file"""
+
+    metrics.count("products_inserted", 3)
+    metrics.observe("read_json", 0.5)
+    text = to_prometheus(metrics_snapshot())
+    assert "# TYPE ecommerce_products_inserted_total counter\n" in text
+    assert "ecommerce_products_inserted_total 3\n" in text
+    assert 'ecommerce_read_json_seconds_bucket{le="0.1"} 0\n' in text
+    assert 'ecommerce_read_json_seconds_bucket{le="1.0"} 1\n' in text
+    assert 'ecommerce_read_json_seconds_bucket{le="+Inf"} 1\n' in text
+    assert "ecommerce_read_json_seconds_count 1\n" in text
+    path = tmp_path / "catalog.prom"
+    export_metrics(PrometheusFileExporter(str(path)))
+    assert path.read_text(encoding="utf-8") == text
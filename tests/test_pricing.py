@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+from src.pricing import (ACCEPT_ALL, REJECT_ALL, PriceDecision,
+                         ReviewQueuePolicy, ThresholdPolicy,
+                         get_price_policy, set_price_policy)
+from src.products import Category, Product
+
+
+def test_policies(product_a: Product) -> None:
+    """testing the decisions of the price policies"""
+
+    with patch("builtins.input") as mock_input:
+        assert product_a.apply_price(5.0, REJECT_ALL) is PriceDecision.REJECT
+        assert product_a.price == 10.0
+        assert product_a.apply_price(9.5,
+                                     ThresholdPolicy(0.1)) is \
+            PriceDecision.ACCEPT
+        assert product_a.apply_price(5.0, ThresholdPolicy(0.1)) is \
+            PriceDecision.REJECT
+        assert product_a.apply_price(5.0, ACCEPT_ALL) is PriceDecision.ACCEPT
+        assert product_a.price == 5.0
+        assert product_a.apply_price(-1.0, ACCEPT_ALL) is \
+            PriceDecision.REJECT
+        assert product_a.apply_price(7.0, REJECT_ALL) is PriceDecision.ACCEPT
+        assert product_a.price == 7.0
+        mock_input.assert_not_called()
+
+
+def test_process_policy(product_a: Product) -> None:
+    """testing the price policy of the process"""
+
+    policy = get_price_policy()
+    set_price_policy(REJECT_ALL)
+    try:
+        with patch("builtins.input") as mock_input:
+            product_a.price = 1.0
+            mock_input.assert_not_called()
+        assert product_a.price == 10.0
+    finally:
+        set_price_policy(policy)
+
+
+def test_reprice() -> None:
+    """testing the bulk repricing of the category"""
+
+    category = Category("R", "reprice", [Product("A", "a", 10.0, 1),
+                                         Product("B", "b", 10.0, 1),
+                                         Product("C", "c", 10.0, 1)],
+                        price_policy=ThresholdPolicy(0.2))
+    report = category.reprice({"A": 12.0, "B": 9.0, "C": 1.0, "D": 1.0})
+    assert report == {"accepted": ["A", "B"], "rejected": ["C"],
+                      "deferred": [], "missing": ["D"]}
+    assert category.total_value == 31.0
+    queue = ReviewQueuePolicy()
+    report = category.reprice([("A", 1.0), ("C", 2.0)], queue)
+    assert report["deferred"] == ["A", "C"]
+    assert len(queue.pending) == 2
+    report = queue.review(lambda product, price: product.name == "A")
+    assert report["accepted"] == ["A"]
+    assert report["rejected"] == ["C"]
+    assert not queue.pending
+    assert category.total_value == 20.0
@@ -1,12 +1,20 @@
+import gc
+import io
+import json
+from decimal import Decimal
 from typing import Any
 from unittest.mock import patch
 
 import pytest
 from pytest import CaptureFixture
 
+import src.products as products_module
 from src.products import (NEGATIVE_ZERO_PRICE, VALUE_ERR_MSG, Category,
-                          CategoryIter, LawnGrass, Product, Smartphone,
-                          read_json)
+                          CategoryIter, LawnGrass, Product, ReprSink,
+                          Smartphone, iter_categories, iter_categories_json,
+                          iter_products, product_type_name, quiet_mode,
+                          read_json, register_product_type, write_json)
+from src.registry import CatalogRegistry
 
 
 def test_product(product_a: Product) -> None:
@@ -73,6 +81,39 @@ def test_product_add(product_a: Product, product_b: Product) -> None:
     assert product_a + product_b == result
 
 
+def test_product_total_value(product_a: Product, product_b: Product,
+                             smartphone_dict, lawngrass_dict) -> None:
+    """testing the n-ary valuation of the products"""
+
+    product_c = Product("C", "product C", 0.1, 3)
+    products = [product_a, product_b, product_c]
+    assert Product.total_value(products) == 160.0 + 0.1 * 3
+    assert Product.total_value(iter(products), "decimal") == Decimal("160.3")
+    assert Product.total_value(products, "kopeck") == 16030
+    assert Product.total_value([]) == 0.0
+    with pytest.raises(ValueError):
+        Product.total_value(products, "cents")  # type: ignore[arg-type]
+    smartphone = Smartphone.new_product(smartphone_dict)
+    lawn_grass = LawnGrass.new_product(lawngrass_dict)
+    with pytest.raises(TypeError):
+        Product.total_value([smartphone, lawn_grass])
+    with pytest.raises(TypeError):
+        Smartphone.total_value([product_a])
+    assert Product.total_value([smartphone, smartphone]) == (
+        smartphone + smartphone)
+
+
+def test_category_inventory_value(categories: list[Category],
+                                  smartphone_dict) -> None:
+    """testing the inventory value of the category with the precisions"""
+
+    category = categories[0]
+    category.add_product(Smartphone.new_product(smartphone_dict))
+    assert category.inventory_value() == category.total_value
+    assert category.inventory_value("decimal") == Decimal("11000287.01")
+    assert category.inventory_value("kopeck") == 1100028701
+
+
 def test_category(category_a: Category, product_a: Product) -> None:
     """testing init Category"""
 
@@ -301,3 +342,485 @@ def test_middle_price_empty_category() -> None:
 
     category = Category("A", "a", [])
     assert category.middle_price() == 0.0
+
+
+def test_iter_categories_json_small_chunks(tmp_path) -> None:
+    """testing the streaming loader when items cross chunk boundaries"""
+
+    data = [
+        {"name": "A {[", "description": 'quote \\" and }',
+         "products": [{"name": "A1", "description": "Серый цвет, [200MP]",
+                       "price": 10.0, "quantity": 2}]},
+        {"name": "B", "description": "category B", "products": []},
+    ]
+    filename = tmp_path / "products.json"
+    filename.write_text(json.dumps(data, ensure_ascii=False, indent=2),
+                        encoding="utf-8")
+    for chunk_size in (1, 7, 4096):
+        result = list(iter_categories_json(str(filename), chunk_size))
+        assert result == data
+
+
+def test_iter_products(tmp_path) -> None:
+    """testing the streaming loader of products"""
+
+    filename = tmp_path / "products.json"
+    filename.write_text(json.dumps([
+        {"name": "A", "description": "a", "products": [
+            {"name": "A1", "description": "a1", "price": 1.0, "quantity": 1},
+            {"name": "A2", "description": "a2", "price": 2.0, "quantity": 2},
+        ]},
+        {"name": "B", "description": "b", "products": [
+            {"name": "B1", "description": "b1", "price": 3.0, "quantity": 3},
+        ]},
+    ]), encoding="utf-8")
+    products = list(iter_products(str(filename)))
+    assert [p.name for p in products] == ["A1", "A2", "B1"]
+    categories = list(iter_categories(str(filename), chunk_size=5))
+    assert [c.name for c in categories] == ["A", "B"]
+    assert categories[0].products == read_json(str(filename))[0].products
+
+
+def test_iter_categories_json_truncated(tmp_path) -> None:
+    """testing the streaming loader for a truncated json file"""
+
+    filename = tmp_path / "products.json"
+    filename.write_text('[{"name": "A", "description": "a", "products": [',
+                        encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_categories_json(str(filename), chunk_size=8))
+    assert read_json(str(filename)) == []
+
+
+def test_read_json_truncated_no_side_effects(tmp_path,
+                                             capsys: CaptureFixture[Any]
+                                             ) -> None:
+    """testing the categories before the broken place of the file
+    aren't created by read_json"""
+
+    filename = tmp_path / "products.json"
+    filename.write_text('[{"name": "A", "description": "a", "products": ['
+                        '{"name": "A1", "description": "a1", "price": 1.0,'
+                        ' "quantity": 1}]}, {"name": "B", "description": ',
+                        encoding="utf-8")
+    registry = CatalogRegistry()
+    assert read_json(str(filename), registry=registry) == []
+    assert (registry.category_count, registry.product_count) == (0, 0)
+    assert capsys.readouterr().out == ""
+    stream = io.StringIO()
+    with ReprSink(stream) as sink:
+        assert read_json(str(filename), quiet=True, sink=sink) == []
+    assert stream.getvalue() == ""
+    filename.write_text('[{"name": "A", "description": "a", "products": ['
+                        '{"name": "A1", "description": "a1", "price": 1.0,'
+                        ' "quantity": 1}]}]', encoding="utf-8")
+    categories = read_json(str(filename), registry=registry)
+    assert categories[0].registry is registry
+    assert (registry.category_count, registry.product_count) == (1, 1)
+    assert capsys.readouterr().out == f"{list(categories[0])[0]!r}\n"
+    with ReprSink(stream) as sink:
+        categories = read_json(str(filename), quiet=True, sink=sink)
+    assert stream.getvalue() == f"{list(categories[0])[0]!r}\n"
+
+
+def test_iter_categories_json_scaling(tmp_path) -> None:
+    """testing the streaming loader is linear in the size of one category:
+    the chars given to the json decoder are counted (the quadratic loader
+    decodes the whole buffer again after every chunk)"""
+
+    decode = products_module._decode_json
+
+    def decoded_chars(count: int) -> float:
+        filename = tmp_path / f"products_{count}.json"
+        filename.write_text(json.dumps([
+            {"name": "A", "description": "category A", "products": [
+                {"name": f"A{i}", "description": "product \\\" A",
+                 "price": 10.0, "quantity": 1} for i in range(count)]}
+        ]), encoding="utf-8")
+        chars = 0
+
+        def counting_decode(buf: str, pos: int) -> tuple[Any, int]:
+            nonlocal chars
+            chars += len(buf) - pos
+            return decode(buf, pos)
+
+        with patch("src.products._decode_json", counting_decode):
+            for _ in iter_categories_json(str(filename), chunk_size=64):
+                pass
+        return chars / filename.stat().st_size
+
+    assert decoded_chars(2000) < 4
+    assert decoded_chars(16000) < 4
+
+
+def test_bulk_new_quiet(capsys: CaptureFixture[Any]) -> None:
+    """testing for creating products without printing the repr"""
+
+    rows = [{"name": f"P{i}", "description": "p", "price": 1.0,
+             "quantity": 1} for i in range(3)]
+    products = Product.bulk_new(rows)
+    assert [p.name for p in products] == ["P0", "P1", "P2"]
+    assert capsys.readouterr().out == ""
+    _ = Product("A", "A", 1.0, 1)
+    assert capsys.readouterr().out != ""
+
+
+def test_repr_sink(capsys: CaptureFixture[Any]) -> None:
+    """testing the buffered, rate-limited sink for the reprs"""
+
+    stream = io.StringIO()
+    rows = [{"name": f"P{i}", "description": "p", "price": 1.0,
+             "quantity": 1} for i in range(5)]
+    with ReprSink(stream, rate=2.0, buffer_size=10) as sink:
+        products = Product.bulk_new(rows, sink)
+        assert stream.getvalue() == ""
+    lines = stream.getvalue().splitlines()
+    assert lines == [repr(products[0]), repr(products[1])]
+    assert sink.dropped == 3
+    assert capsys.readouterr().out == ""
+
+
+def test_read_json_quiet(tmp_path, capsys: CaptureFixture[Any]) -> None:
+    """testing the quiet mode of the read_json"""
+
+    filename = tmp_path / "products.json"
+    filename.write_text(json.dumps([
+        {"name": "A", "description": "a", "products": [
+            {"name": "A1", "description": "a1", "price": 1.0, "quantity": 1},
+        ]},
+    ]), encoding="utf-8")
+    categories = read_json(str(filename), quiet=True)
+    assert categories[0].products == "A1, 1.0 руб. Остаток: 1 шт.\n"
+    assert capsys.readouterr().out == ""
+    with quiet_mode():
+        _ = Product("A", "A", 1.0, 1)
+    assert capsys.readouterr().out == ""
+
+
+def test_products_slots(smartphone_dict, lawngrass_dict) -> None:
+    """testing that the products keep no __dict__"""
+
+    product = Product("A", "A", 1.0, 1)
+    smartphone = Smartphone(**smartphone_dict)
+    lawngrass = LawnGrass(**lawngrass_dict)
+    for item in (product, smartphone, lawngrass):
+        assert not hasattr(item, "__dict__")
+    assert "'color'='gold'" in repr(smartphone)
+    assert "'country'='Belgium'" in repr(lawngrass)
+
+
+def test_product_eq(product_a: Product, smartphone_dict) -> None:
+    """testing the slotted products compare by identity and are hashable"""
+
+    same = Product.new_product({"name": "A", "description": "product A",
+                                "price": 10.0, "quantity": 10})
+    assert product_a == product_a
+    assert product_a != same
+    smartphone = Smartphone(**smartphone_dict)
+    assert {product_a, same, smartphone, product_a} == {product_a, same,
+                                                        smartphone}
+    assert {smartphone: 1}[smartphone] == 1
+
+
+def test_category_running_totals(category_b: Category) -> None:
+    """testing the running totals of the Category"""
+
+    assert category_b.total_quantity == 18
+    assert category_b.total_value == 198.0
+    product = Product("New", "new product", 10.0, 2)
+    category_b.add_product(product)
+    assert category_b.total_quantity == 20
+    assert category_b.total_value == 218.0
+    product.quantity -= 1
+    product.price = 30.0
+    assert category_b.total_quantity == 19
+    assert category_b.total_value == 228.0
+    category_b.add_product(Product("New", "new product", 40.0, 1))
+    assert category_b.total_quantity == 20
+    assert category_b.total_value == 278.0
+    assert category_b.middle_price() == 278.0 / 20
+    category_b.check_totals()
+
+
+def test_category_observers_weak(category_a: Category,
+                                 product_a: Product) -> None:
+    """testing the freed categories don't keep observing the products"""
+
+    for _ in range(1000):
+        Category("tmp", "", [product_a])
+    gc.collect()
+    assert len(product_a._observers) <= 2  # type: ignore[arg-type]
+    product_a.quantity += 1
+    assert len(product_a._observers) == 1  # type: ignore[arg-type]
+    assert category_a.total_quantity == 11
+    twice = Category("twice", "", [product_a, product_a])
+    product_a.quantity += 1
+    twice.check_totals()
+    category_a.check_totals()
+
+
+def test_category_validate_totals(category_a: Category,
+                                  monkeypatch) -> None:
+    """testing the validation mode of the running totals"""
+
+    monkeypatch.setattr(Category, "validate_totals", True)
+    assert category_a.total_quantity == 10
+    category_a._product_changed(Product("X", "x", 1.0, 1), 1.0, 2)
+    with pytest.raises(AssertionError):
+        _ = category_a.total_quantity
+
+
+def test_category_nested_iteration(categories: list[Category]) -> None:
+    """testing the nested loops over the same category"""
+
+    category = categories[0]
+    pairs = [(a.name, b.name) for a in category for b in category]
+    assert pairs == [("A1", "A1"), ("A1", "A2"), ("A2", "A1"), ("A2", "A2")]
+    iter_a = CategoryIter(category).get_product()
+    iter_b = CategoryIter(category).get_product()
+    assert next(iter_a).name == "A1"
+    assert next(iter_b).name == "A1"
+    assert next(iter_a).name == "A2"
+
+
+def test_category_iter_range(categories: list[Category]) -> None:
+    """testing the iteration over a range of the products"""
+
+    category = categories[0]
+    category.add_product(Product("A3", "product A", 1.0, 1))
+    assert [p.name for p in category.iter_range(1)] == ["A2", "A3"]
+    assert [p.name for p in category.iter_range(0, 2)] == ["A1", "A2"]
+    assert [p.name for p in category.iter_range(-1)] == ["A3"]
+    assert list(category.iter_range(5, 10)) == []
+
+
+def test_category_iter_snapshot(categories: list[Category]) -> None:
+    """testing the snapshot iteration while adding the products"""
+
+    category = categories[0]
+    names = []
+    for product in CategoryIter(category, snapshot=True).get_product():
+        names.append(product.name)
+        category.add_product(Product(product.name + "+", "new", 1.0, 1))
+    assert names == ["A1", "A2"]
+    assert [p.name for p in category] == ["A1", "A2", "A1+", "A2+"]
+
+
+def test_products_cache(categories: list[Category]) -> None:
+    """testing the cached products str is updated by the changes"""
+
+    category = categories[1]
+    assert category.products == ("B1, 10.0 руб. Остаток: 5 шт.\n"
+                                 "B2, 10.0 руб. Остаток: 20 шт.\n")
+    assert category.products is category.products
+    product = next(category.iter_range(1))
+    product.quantity = 3
+    category.add_product(Product("B3", "product B", 1.0, 1))
+    assert category.products == ("B1, 10.0 руб. Остаток: 5 шт.\n"
+                                 "B2, 10.0 руб. Остаток: 3 шт.\n"
+                                 "B3, 1.0 руб. Остаток: 1 шт.\n")
+    assert str(category) == "B, количество продуктов: 9 шт"
+    category.add_product(Product("B3", "product B", 2.0, 1))
+    assert str(category) == "B, количество продуктов: 10 шт"
+    assert category.products.endswith("B3, 2.0 руб. Остаток: 2 шт.\n")
+    stream = io.StringIO()
+    category.write_products(stream, chunk_size=2)
+    assert stream.getvalue() == category.products
+
+
+def test_products_cache_same_names(category_b: Category) -> None:
+    """testing the cached products str of the products with
+    the same name"""
+
+    rendered = category_b.products
+    first = next(iter(category_b))
+    first.quantity += 1
+    assert category_b.products != rendered
+    assert category_b.products.startswith("A, 11.0 руб. Остаток: 4 шт.\n")
+
+
+def test_products_cache_rename(categories: list[Category]) -> None:
+    """testing the renamed product updates the cached products str,
+    the name index and the search index of the category"""
+
+    category = categories[1]
+    category.add_index("text")
+    rendered = category.products
+    product = category.get_product("B2")
+    assert product is not None
+    product.name = "Новый"
+    assert category.products == ("B1, 10.0 руб. Остаток: 5 шт.\n"
+                                 "Новый, 10.0 руб. Остаток: 20 шт.\n")
+    assert category.products != rendered
+    assert category.get_product("B2") is None
+    assert category.get_product("Новый") is product
+    assert [hit.product for hit in category.search("нов")] == [product]
+    assert category.search("B2") == []
+    category.add_product(Product("Новый", "product B", 10.0, 1))
+    assert product.quantity == 21
+
+
+def test_product_str_cache(product_a: Product) -> None:
+    """testing the cached str of the product is updated by the changes"""
+
+    assert str(product_a) == "A, 10.0 руб, Остаток: 10 шт"
+    product_a.quantity += 1
+    product_a.price = 20.0
+    product_a.name = "B"
+    assert str(product_a) == "B, 20.0 руб, Остаток: 11 шт"
+
+
+def test_add_products(categories: list[Category]) -> None:
+    """testing adding many products at once with de-duplication"""
+
+    category = categories[0]
+    category.add_index("price")
+    _ = category.products
+    product_count = Category.product_count
+    report = category.add_products([
+        Product("A1", "product A", 5.0, 1),
+        {"name": "A3", "description": "product A", "price": 3.0,
+         "quantity": 2},
+        Product("A1", "product A", 15.0, 2),
+        Product("A4", "product A", 4.0, 1),
+        {"name": "A3", "description": "product A", "price": 6.0,
+         "quantity": 1},
+        Product("A4", "product A", 1.0, 1),
+    ])
+    assert report == {"inserted": 2, "merged": 4}
+    assert Category.product_count == product_count + 2
+    assert category.products == ("A1, 15.0 руб. Остаток: 13 шт.\n"
+                                 "A2, 10.0 руб. Остаток: 10 шт.\n"
+                                 "A3, 6.0 руб. Остаток: 3 шт.\n"
+                                 "A4, 4.0 руб. Остаток: 2 шт.\n")
+    category.check_totals()
+    assert [p.name for p in category.find_by_price(high=6.0)] == ["A4",
+                                                                  "A3"]
+    with pytest.raises(TypeError):
+        category.add_products(["A5"])
+
+
+def test_add_products_all_or_nothing(categories: list[Category]) -> None:
+    """testing a bad item leaves the category unchanged"""
+
+    category = categories[0]
+    rendered = category.products
+    new = Product("A5", "product A", 1.0, 1)
+    for bad in ({"name": "A3", "description": "a", "price": 1.0,
+                 "quantity": 0},
+                {"name": "A3", "price": 1.0, "quantity": 1}):
+        with pytest.raises((ValueError, KeyError)):
+            category.add_products([Product("A1", "product A", 50.0, 5),
+                                   new, bad])
+    assert category.products == rendered
+    assert (new.quantity, category.get_product("A5")) == (1, None)
+    category.check_totals()
+
+
+def test_new_product_types(smartphone_dict, lawngrass_dict) -> None:
+    """testing the product type dispatch of the new_product"""
+
+    smartphone = Smartphone.new_product(smartphone_dict)
+    assert repr(smartphone) == repr(Smartphone(**smartphone_dict))
+    product = Product.new_product(dict(lawngrass_dict, type="lawn_grass"))
+    assert repr(product) == repr(LawnGrass(**lawngrass_dict))
+    with pytest.raises(ValueError):
+        Product.new_product(dict(lawngrass_dict, type="unknown"))
+    with pytest.raises(TypeError):
+        Smartphone.new_product(dict(lawngrass_dict, type="lawn_grass"))
+    assert product_type_name(product) == "lawn_grass"
+
+
+def test_register_product_type(tmp_path) -> None:
+    """testing the user's product type in the read_json"""
+
+    class Book(Product):
+        __slots__ = ("author",)
+
+        def __init__(self, name, description, price, quantity,
+                     author) -> None:
+            self.author = author
+            super().__init__(name, description, price, quantity)
+
+    register_product_type("book", Book, ["name", "description", "price",
+                                         "quantity", "author"])
+    filename = tmp_path / "products.json"
+    filename.write_text(json.dumps([
+        {"name": "A", "description": "a", "products": [
+            {"name": "A1", "description": "a1", "price": 1.0,
+             "quantity": 1, "type": "book", "author": "Пушкин"},
+            {"name": "A2", "description": "a2", "price": 1.0,
+             "quantity": 1},
+        ]},
+    ]), encoding="utf-8")
+    book, product = read_json(str(filename), quiet=True)[0]
+    assert isinstance(book, Book)
+    assert book.author == "Пушкин"
+    assert type(product) is Product
+    assert [type(p) for p in iter_products(str(filename), quiet=True)] == [
+        Book, Product]
+
+
+def test_category_remove_product(categories: list[Category]) -> None:
+    """testing the O(1) removal and the lookup by the name"""
+
+    category = categories[1]
+    category.add_index("price", "quantity")
+    assert category.products
+    removed = category.remove_product("B1")
+    assert removed is not None and removed.name == "B1"
+    assert category.remove_product("B1") is None
+    assert category.get_product("B1") is None
+    assert category.get_product("B2") is category.find_by_quantity()[0]
+    assert category.total_quantity == 20
+    assert category.products == "B2, 10.0 руб. Остаток: 20 шт.\n"
+    category.check_totals()
+    removed.quantity = 1
+    assert category.total_quantity == 20
+    category.add_product(removed)
+    category.get_product("B2").quantity = 3  # type: ignore[union-attr]
+    assert [p.name for p in category.find_by_quantity(2)] == ["B2"]
+    assert category.remove_product("B1") is removed
+    assert category.remove_product("B2") is not None
+    assert (list(category), category.total_value) == ([], 0.0)
+
+
+@pytest.mark.parametrize("filename", ["catalog.json", "catalog.json.gz"])
+def test_write_json(tmp_path, categories: list[Category], smartphone_dict,
+                    lawngrass_dict, filename: str) -> None:
+    """testing the written json round-trips through read_json"""
+
+    categories[0].add_product(Smartphone.new_product(smartphone_dict))
+    categories[1].add_product(LawnGrass.new_product(lawngrass_dict))
+    categories.append(Category("Пусто", "Ёмкость \"пустая\"", []))
+    path = tmp_path / filename
+    write_json(categories, path, chunk_size=2)
+    loaded = read_json(str(path), quiet=True)
+    assert [(c.name, c.description) for c in loaded] == [
+        (c.name, c.description) for c in categories]
+    for category, copy in zip(categories, loaded):
+        assert list(map(repr, copy)) == list(map(repr, category))
+    assert isinstance(loaded[1].get_product(lawngrass_dict["name"]),
+                      LawnGrass)
+    assert [p.name for p in tmp_path.iterdir()] == [filename]
+
+
+def test_write_json_compress(tmp_path, category_a: Category) -> None:
+    """testing the compressed file is read whatever its name is"""
+
+    path = tmp_path / "catalog.json"
+    write_json([category_a], path, compress=True)
+    assert path.read_bytes()[:2] == b"\x1f\x8b"
+    loaded = read_json(str(path), quiet=True)
+    assert [repr(p) for p in loaded[0]] == [repr(p) for p in category_a]
+
+
+def test_write_json_fp(category_a: Category) -> None:
+    """testing the json written to the file-like object"""
+
+    fp = io.StringIO()
+    write_json([category_a], fp)
+    assert json.loads(fp.getvalue()) == [{
+        "name": "C", "description": "category C", "products": [
+            {"name": "A", "description": "product A",
+             "price": 10.0, "quantity": 10}]}]
@@ -0,0 +1,66 @@
+import threading
+
+from src.products import Category, Product
+from src.registry import (CatalogRegistry, RegistryCount, ShardedCounter,
+                          default_registry)
+
+
+def test_sharded_counter_threads() -> None:
+    """testing the counter incremented from many threads"""
+
+    counter = ShardedCounter()
+
+    def work() -> None:
+        for _ in range(10_000):
+            counter.add()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value == 80_000
+    counter.reset()
+    assert counter.value == 0
+
+
+def test_catalog_registry() -> None:
+    """testing the independent counters of the catalogs"""
+
+    tenant_a = CatalogRegistry("A")
+    tenant_b = CatalogRegistry("B")
+    category_count = Category.category_count
+    product_count = Category.product_count
+    category = Category("A", "a", [Product("A1", "a", 1.0, 1)],
+                        registry=tenant_a)
+    category.add_product(Product("A2", "a", 1.0, 1))
+    Category("B", "b", [], registry=tenant_b)
+    assert (tenant_a.category_count, tenant_a.product_count) == (1, 2)
+    assert (tenant_b.category_count, tenant_b.product_count) == (1, 0)
+    assert category.product_count == 2
+    assert Category.category_count == category_count
+    assert Category.product_count == product_count
+    assert default_registry.product_count == product_count
+    tenant_a.reset()
+    assert tenant_a.product_count == 0
+
+
+def test_registry_count_assignment() -> None:
+    """testing the old resetting of the class counters keeps counting"""
+
+    category_count = Category.category_count
+    product_count = Category.product_count
+    try:
+        Category.category_count = 0
+        Category.product_count = 0
+        assert isinstance(Category.__dict__["category_count"], RegistryCount)
+        Category("A", "a", [Product("A1", "a", 1.0, 1)])
+        assert (Category.category_count, Category.product_count) == (1, 1)
+        assert default_registry.category_count == 1
+        tenant = CatalogRegistry("tenant")
+        category = Category("B", "b", [], registry=tenant)
+        category.product_count = 5
+        assert (tenant.product_count, Category.product_count) == (5, 1)
+    finally:
+        Category.category_count = category_count + 1
+        Category.product_count = product_count + 1
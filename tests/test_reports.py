@@ -0,0 +1,44 @@
+from src.products import Category, Product
+from src.reports import CategoryTotals, ReportEngine
+
+
+def test_report(categories: list[Category]) -> None:
+    """testing the totals, the top-N and the low stock of the catalog"""
+
+    categories[1].add_product(Product("B3", "product B", 100.0, 2))
+    engine = ReportEngine(categories, top_n=2, low_stock=5)
+    report = engine.report()
+    assert report.categories == [
+        CategoryTotals("A", 2, 20, 200.0, 10.0),
+        CategoryTotals("B", 3, 27, 450.0, 450.0 / 27),
+    ]
+    assert (report.quantity, report.value) == (47, 650.0)
+    assert report.middle_price == 650.0 / 47
+    assert [(p.category, p.name, p.value) for p in report.top] == [
+        ("B", "B2", 200.0), ("B", "B3", 200.0)]
+    assert [(p.name, p.quantity) for p in report.low_stock] == [
+        ("B3", 2), ("B1", 5)]
+    assert report.low_stock_categories == []
+    assert engine.scans == 2
+
+
+def test_report_cache(categories: list[Category]) -> None:
+    """testing only the changed categories are scanned again"""
+
+    engine = ReportEngine(categories, top_n=1)
+    first = engine.report()
+    assert engine.report() == first
+    assert engine.scans == 2
+    categories[0].get_product("A1").price = 50.0  # type: ignore
+    report = engine.report()
+    assert engine.scans == 3
+    assert report.top[0].name == "A1"
+    assert report.categories[0].value == 600.0
+    categories[1].get_product("B1").quantity = 1  # type: ignore
+    categories[1].remove_product("B2")
+    report = engine.report()
+    assert engine.scans == 4
+    assert report.low_stock_categories == ["B"]
+    categories[0].add_product(Product("A3", "product A", 1.0, 1))
+    assert engine.report().categories[0].products == 3
+    assert engine.scans == 5
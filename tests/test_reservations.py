@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from src.products import Category
+from src.reservations import InsufficientStock, ReservationEngine
+
+
+class Clock:
+    """the manual clock for testing the expiry"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_reserve_all_or_nothing(categories: list[Category]) -> None:
+    """testing the reservation takes all the quantities or nothing"""
+
+    engine = ReservationEngine(categories)
+    reservation = engine.reserve([("A", "A1", 3), ("B", "B2", 5),
+                                  ("A", "A1", 2)])
+    assert [tuple(line) for line in reservation.lines] == [
+        ("A", "A1", 5), ("B", "B2", 5)]
+    assert categories[0].total_quantity == 15
+    assert categories[1].total_quantity == 20
+    with pytest.raises(InsufficientStock) as error:
+        engine.reserve([("A", "A2", 1), ("B", "B1", 6)])
+    assert error.value.shortages == {("B", "B1"): (6, 5)}
+    assert categories[0].get_product("A2").quantity == 10  # type: ignore
+    with pytest.raises(KeyError):
+        engine.reserve([("A", "A9", 1)])
+    with pytest.raises(ValueError):
+        engine.reserve([("A", "A2", 0)])
+    assert engine.release(reservation.id)
+    assert not engine.release(reservation.id)
+    assert categories[0].total_quantity == 20
+    for category in categories:
+        category.check_totals()
+
+
+def test_reservation_commit_and_expiry(categories: list[Category]) -> None:
+    """testing the committed quantities are kept and the expired ones
+    are given back"""
+
+    clock = Clock()
+    engine = ReservationEngine(categories, ttl=60.0, clock=clock)
+    sold = engine.reserve([("A", "A1", 4)])
+    expiring = engine.reserve([("A", "A2", 6)], ttl=10.0)
+    assert engine.commit(sold.id)
+    assert not engine.commit(sold.id)
+    assert len(engine) == 1
+    clock.now = 10.0
+    assert engine.expire() == [expiring.id]
+    assert engine.get(expiring.id) is None
+    assert categories[0].products == (
+        "A1, 10.0 руб. Остаток: 6 шт.\n"
+        "A2, 10.0 руб. Остаток: 10 шт.\n"
+    )
+
+
+def test_concurrent_reservations(categories: list[Category]) -> None:
+    """testing the concurrent orders don't oversell"""
+
+    engine = ReservationEngine(categories)
+    reserved = []
+    failed = []
+
+    def order(lines: list[tuple[str, str, int]]) -> None:
+        for _ in range(50):
+            try:
+                reserved.append(engine.reserve(lines))
+            except InsufficientStock:
+                failed.append(lines)
+
+    threads = [threading.Thread(target=order, args=(lines,)) for lines in (
+        [("A", "A1", 1), ("B", "B2", 1)],
+        [("B", "B2", 1), ("A", "A1", 1)],
+        [("A", "A2", 1), ("B", "B1", 1)],
+    ) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(reserved) == 10 + 5
+    assert len(reserved) + len(failed) == 300
+    assert categories[0].total_quantity == 5
+    assert categories[1].total_quantity == 10
+    for category in categories:
+        category.check_totals()
@@ -0,0 +1,110 @@
+import pytest
+
+from src.delta import apply_delta
+from src.products import Category, Product
+from src.search import TextIndex, search_catalog, tokenize
+from src.table import ProductTable
+
+
+@pytest.fixture
+def phones() -> Category:
+    """the fixture of the category with the Russian descriptions"""
+
+    return Category("Смартфоны", "phones", ProductTable([
+        Product("Samsung Galaxy S23 Ultra", "Серый цвет, 200MP камера",
+                180000.0, 5),
+        Product("Iphone 15", "512GB, Gray space", 210000.0, 8),
+        Product("Xiaomi Redmi Note 11", "1024GB, Синий", 31000.0, 14),
+        Product("Ёлка", "Зелёная, серая подставка", 1000.0, 1),
+    ]))
+
+
+def test_tokenize() -> None:
+    """testing the normalization of the Cyrillic and Latin words"""
+
+    assert tokenize("Серый цвет, 200MP камера") == [
+        "серый", "цвет", "200mp", "камера"]
+    assert tokenize("ЁЛКА Зелёная") == ["елка", "зеленая"]
+
+
+def test_category_search(phones: Category) -> None:
+    """testing the prefix and AND queries and the ranking"""
+
+    assert [h.product.name for h in phones.search("Серый")] == [
+        "Samsung Galaxy S23 Ultra"]
+    assert [h.product.name for h in phones.search("сер")] == [
+        "Samsung Galaxy S23 Ultra", "Ёлка"]
+    assert [h.product.name for h in phones.search("сер", prefix=False)] == []
+    assert [h.product.name for h in phones.search("елка зелен")] == ["Ёлка"]
+    assert [h.product.name for h in phones.search("5* gray")] == [
+        "Iphone 15"]
+    assert phones.search("512gb синий") == []
+    assert phones.search("") == []
+    # the name is weighted higher than the description
+    phones.add_product(Product("Серый чехол", "чехол", 500.0, 2))
+    hits = phones.search("серый")
+    assert [h.product.name for h in hits] == ["Серый чехол",
+                                              "Samsung Galaxy S23 Ultra"]
+    assert hits[0].score > hits[1].score
+    assert len(phones.search("серый", limit=1)) == 1
+
+
+def test_search_incremental(phones: Category) -> None:
+    """testing the index is updated by add_product and remove_product"""
+
+    assert phones.search("pixel") == []
+    phones.add_product(Product("Google Pixel 8", "Серый", 70000.0, 3))
+    assert [h.product.name for h in phones.search("серый")] == [
+        "Samsung Galaxy S23 Ultra", "Google Pixel 8"]
+    phones.remove_product("Samsung Galaxy S23 Ultra")
+    assert [h.product.name for h in phones.search("серый")] == [
+        "Google Pixel 8"]
+    assert [h.product.name for h in phones.search("ёлка")] == ["Ёлка"]
+    apply_delta([phones], [{"op": "upsert", "category": "Смартфоны",
+                            "product": {"name": "Ёлка",
+                                        "description": "Синяя"}}])
+    assert [h.product.name for h in phones.search("синяя")] == ["Ёлка"]
+    assert phones.search("зеленая") == []
+
+
+def test_search_set_description(phones: Category) -> None:
+    """testing the description changed by the set operation is indexed"""
+
+    events = apply_delta([phones], [{"op": "set", "category": "Смартфоны",
+                                     "name": "Iphone 15",
+                                     "description": "Розовый"}])
+    assert events[0]["changes"] == {
+        "description": ("512GB, Gray space", "Розовый")}
+    assert [h.product.name for h in phones.search("розовый")] == [
+        "Iphone 15"]
+    assert phones.search("gray") == []
+    assert [p.name for p in phones][1] == "Iphone 15"
+
+
+def test_search_index_save_load(phones: Category, tmp_path) -> None:
+    """testing the index is saved and loaded for the same products"""
+
+    phones.add_index("text")
+    path = str(tmp_path / "phones.index.json")
+    index = phones.get_index("text")
+    assert isinstance(index, TextIndex)
+    index.save(path, phones)
+    loaded = TextIndex.load(path, phones)
+    assert loaded.search("сер") == index.search("сер")
+    phones.set_index("text", loaded)
+    assert phones.search("камера")[0].product.name == (
+        "Samsung Galaxy S23 Ultra")
+    phones.remove_product("Iphone 15")
+    with pytest.raises(ValueError):
+        TextIndex.load(path, phones)
+
+
+def test_search_catalog(phones: Category, categories: list[Category]) -> None:
+    """testing the search over all the categories"""
+
+    found = search_catalog(categories + [phones], "product", limit=3)
+    assert len(found) == 3
+    assert all(c.name in ("A", "B") for c, _ in found)
+    found = search_catalog(categories + [phones], "камера")
+    assert [(c.name, h.product.name) for c, h in found] == [
+        ("Смартфоны", "Samsung Galaxy S23 Ultra")]
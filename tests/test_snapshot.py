@@ -0,0 +1,50 @@
+import pytest
+
+from src.products import Category, Smartphone
+from src.snapshot import load_snapshot, save_snapshot
+from src.table import ProductTable
+
+
+def test_snapshot_round_trip(categories: list[Category], tmp_path) -> None:
+    """testing saving and loading the binary snapshot"""
+
+    categories.append(Category("Пустая", "без продуктов", []))
+    filename = str(tmp_path / "catalog.snap")
+    save_snapshot(categories, filename)
+    with load_snapshot(filename) as snapshot:
+        assert len(snapshot) == 3
+        assert [c.name for c in snapshot] == ["A", "B", "Пустая"]
+        assert snapshot[2].description == "без продуктов"
+        category = snapshot[1]
+        assert len(category) == 2
+        assert category[-1].name == "B2"
+        assert [str(p) for p in category] == [
+            str(p) for p in categories[1]]
+        loaded = snapshot.to_categories()
+    for original, copy in zip(categories, loaded):
+        assert copy.name == original.name
+        assert copy.products == original.products
+        assert copy.total_value == original.total_value
+    assert isinstance(loaded[0]._Category__products,  # type: ignore
+                      ProductTable)
+
+
+def test_snapshot_bad_file(tmp_path) -> None:
+    """testing loading the file which isn't a snapshot"""
+
+    filename = tmp_path / "bad.snap"
+    filename.write_bytes(b"x" * 128)
+    with pytest.raises(ValueError):
+        load_snapshot(str(filename))
+
+
+def test_snapshot_rejects_subclasses(categories: list[Category], tmp_path,
+                                     smartphone_dict) -> None:
+    """testing the products with the fields of the subclasses
+    aren't written without their fields"""
+
+    categories[0].add_product(Smartphone(**smartphone_dict))
+    filename = tmp_path / "catalog.snap"
+    with pytest.raises(TypeError):
+        save_snapshot(categories, str(filename))
+    assert list(tmp_path.iterdir()) == []
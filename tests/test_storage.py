@@ -0,0 +1,140 @@
+import threading
+
+import pytest
+
+from src.products import Category, Product, Smartphone
+from src.storage import CatalogStore, StoreTable
+
+
+@pytest.fixture
+def store(tmp_path, categories: list[Category], smartphone_dict):
+    """the fixture of the store with the categories and a smartphone"""
+
+    with CatalogStore(str(tmp_path / "catalog.db")) as store:
+        store.save(categories)
+        store.add_category("C", "category C")
+        store.add_products("C", [{**smartphone_dict, "type": "smartphone"}])
+        yield store
+
+
+def test_store_wal(store: CatalogStore) -> None:
+    """testing the database is in the WAL mode"""
+
+    mode = store._connection().execute("PRAGMA journal_mode").fetchone()
+    assert mode == ("wal",)
+
+
+def test_store_load(store: CatalogStore, smartphone_dict) -> None:
+    """testing the eager loading of the stored categories"""
+
+    loaded = store.load_categories()
+    assert [c.name for c in loaded] == ["A", "B", "C"]
+    assert loaded[1].products == (
+        "B1, 10.0 руб. Остаток: 5 шт.\n"
+        "B2, 10.0 руб. Остаток: 20 шт.\n"
+    )
+    phone = loaded[2].get_product(smartphone_dict["name"])
+    assert isinstance(phone, Smartphone)
+    assert (phone.color, phone.memory) == ("gold", 512)
+    with pytest.raises(KeyError):
+        store.load_category("D")
+
+
+def test_store_add_products_merge(store: CatalogStore) -> None:
+    """testing the bulk upsert keeps the add_product merge semantics"""
+
+    store.add_products("A", [
+        Product("A1", "product A", 12.0, 1),
+        {"name": "A1", "description": "product A",
+         "price": 5.0, "quantity": 2},
+        {"name": "A3", "description": "product A",
+         "price": 1.0, "quantity": 1},
+    ], batch_size=2)
+    assert store.load_category("A").products == (
+        "A1, 12.0 руб. Остаток: 13 шт.\n"
+        "A2, 10.0 руб. Остаток: 10 шт.\n"
+        "A3, 1.0 руб. Остаток: 1 шт.\n"
+    )
+    with pytest.raises(KeyError):
+        store.add_products("D", [])
+
+
+def test_store_queries(store: CatalogStore) -> None:
+    """testing the indexed queries by the name and the price"""
+
+    store.add_products("B", [{"name": "B3", "description": "product B",
+                              "price": 3.0, "quantity": 1}])
+    assert [(c, p.name) for c, p in store.find_by_name("B1")] == [("B",
+                                                                   "B1")]
+    assert [p.name for _, p in store.find_by_price("B", high=9.0)] == ["B3"]
+    assert [p.name for _, p in store.find_by_price("B", 5.0, limit=1)] == [
+        "B1"]
+    plan = store._connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM products WHERE name = ?", ("A1",)
+    ).fetchall()
+    assert "products_name" in str(plan)
+
+
+def test_store_lazy_category(store: CatalogStore) -> None:
+    """testing the category backed by the StoreTable"""
+
+    category = store.load_category("A", lazy=True)
+    table = category._Category__products  # type: ignore[attr-defined]
+    assert isinstance(table, StoreTable)
+    assert category.total_quantity == 20
+    assert category.middle_price() == 10.0
+    category.add_product(Product("A1", "product A", 15.0, 5))
+    category.add_product(Product("A3", "product A", 1.0, 1))
+    category.remove_product("A2")
+    category.check_totals()
+    assert category.products == (
+        "A1, 15.0 руб. Остаток: 15 шт.\n"
+        "A3, 1.0 руб. Остаток: 1 шт.\n"
+    )
+    assert store.load_category("A").products == category.products
+    assert category.inventory_value("kopeck") == 22600
+
+
+def test_store_lazy_typed(store: CatalogStore, smartphone_dict) -> None:
+    """testing the products of the subclasses aren't viewed lazily
+    as the plain products"""
+
+    with pytest.raises(TypeError):
+        store.load_category("C", lazy=True)
+    assert store.load_category("C").find_by(color="gold") != []
+    category = store.load_category("A", lazy=True)
+    with pytest.raises(TypeError):
+        category.add_product(Smartphone(**smartphone_dict))
+    assert [p.name for p in store.load_category("A")] == ["A1", "A2"]
+
+
+def test_store_lazy_rename(store: CatalogStore) -> None:
+    """testing the product renamed in the lazy category is written
+    to the store"""
+
+    category = store.load_category("A", lazy=True)
+    category.get_product("A1").name = "Renamed"  # type: ignore[union-attr]
+    assert category.get_product("Renamed") is not None
+    assert [p.name for p in store.load_category("A")] == ["Renamed", "A2"]
+    assert [p.name for p in store.load_category("A", lazy=True)] == [
+        "Renamed", "A2"]
+
+
+def test_store_connection_per_thread(store: CatalogStore) -> None:
+    """testing every thread uses its own connection"""
+
+    connections = []
+
+    def load() -> None:
+        connections.append(store._connection())
+        store.add_products("A", [{"name": "A1", "description": "product A",
+                                  "price": 10.0, "quantity": 1}])
+
+    threads = [threading.Thread(target=load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(c) for c in connections + [store._connection()]}) == 5
+    assert store.load_category("A").get_product(
+        "A1").quantity == 14  # type: ignore[union-attr]
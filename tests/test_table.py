@@ -0,0 +1,102 @@
+from typing import Any
+
+import pytest
+from pytest import CaptureFixture
+
+from src.products import Category, Product, Smartphone
+from src.table import ProductTable, ProductView
+
+
+def test_product_table(categories: list[Category]) -> None:
+    """testing the columns and the aggregates of the ProductTable"""
+
+    table = ProductTable.from_columns(["A", "B", "C"], ["a", "b", "c"],
+                                      [11.0, 20.0, 5.0], [3, 6, 9])
+    assert len(table) == 3
+    assert table.total_quantity() == 18
+    assert table.inventory_value() == 198.0
+    assert table.middle_price() == 11.0
+    assert ProductTable().middle_price() == 0.0
+    assert [p.name for p in table] == ["A", "B", "C"]
+    assert [p.name for p in table[1:]] == ["B", "C"]
+    assert table[-1].price == 5.0
+
+
+def test_product_view(capsys: CaptureFixture[Any]) -> None:
+    """testing the view over a row of the ProductTable"""
+
+    table = ProductTable([Product("A", "product A", 10.0, 2)])
+    capsys.readouterr()
+    view = table[0]
+    assert isinstance(view, ProductView)
+    assert isinstance(view, Product)
+    assert str(view) == "A, 10.0 руб, Остаток: 2 шт"
+    view.quantity += 3
+    view.price = 12.0
+    assert table.total_quantity() == 5
+    assert table.inventory_value() == 60.0
+    assert "'_Product__price'='12.0'" in repr(view)
+    assert capsys.readouterr().out == ""
+
+
+def test_category_with_table() -> None:
+    """testing the Category backed by the ProductTable"""
+
+    table = ProductTable.from_columns(["A", "B"], ["a", "b"],
+                                      [10.0, 20.0], [1, 1])
+    category = Category("T", "table", table)
+    category.add_product(Product("A", "a", 30.0, 2))
+    category.add_product(Product("C", "c", 10.0, 1))
+    assert len(table) == 3
+    assert category.products == ("A, 30.0 руб. Остаток: 3 шт.\n"
+                                 "B, 20.0 руб. Остаток: 1 шт.\n"
+                                 "C, 10.0 руб. Остаток: 1 шт.\n")
+    assert str(category) == "T, количество продуктов: 5 шт"
+    assert category.middle_price() == 24.0
+
+
+def test_table_category_remove_product() -> None:
+    """testing the removal of the rows of the table-backed category"""
+
+    table = ProductTable.from_columns(["A", "B", "C"], ["a", "b", "c"],
+                                      [11.0, 20.0, 5.0], [3, 6, 9])
+    category = Category("T", "table", table)
+    category.add_index("price")
+    removed = category.remove_product("A")
+    assert removed is not None and not isinstance(removed, ProductView)
+    assert (removed.name, removed.price, removed.quantity) == ("A", 11.0, 3)
+    assert table.names == ["C", "B"]
+    assert category.get_product("C").price == 5.0  # type: ignore
+    assert [p.name for p in category.find_by_price(10.0)] == ["B"]
+    assert category.total_quantity == 15
+    category.check_totals()
+
+
+def test_table_total_value() -> None:
+    """testing the valuation over the columns of the table"""
+
+    table = ProductTable.from_columns(["A", "B"], ["a", "b"],
+                                      [0.1, 20.0], [3, 6])
+    assert Product.total_value(table) == table.inventory_value()
+    assert Product.total_value(table, "kopeck") == 12030
+    category = Category("T", "table", table)
+    assert str(category.inventory_value("decimal")) == "120.3"
+
+
+def test_table_rejects_subclasses(smartphone_dict) -> None:
+    """testing the products with the fields of the subclasses
+    aren't added to the table silently"""
+
+    table = ProductTable.from_columns(["A"], ["a"], [1.0], [1])
+    category = Category("T", "table", table)
+    smartphone = Smartphone(**smartphone_dict)
+    with pytest.raises(TypeError):
+        ProductTable([smartphone])
+    with pytest.raises(TypeError):
+        category.add_product(smartphone)
+    with pytest.raises(TypeError):
+        category.add_products([Product("B", "b", 1.0, 1), smartphone])
+    assert table.names == ["A"]
+    assert category.get_product(smartphone.name) is None
+    category.add_product(category.get_product("A"))  # type: ignore
+    assert category.total_quantity == 2
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from src.products import (VALUE_ERR_MSG, Product, Product_json, Smartphone,
+                          register_product_type)
+from src.validation import (RowError, ValidationFailed, compile_validator,
+                            read_json_validated, validate_products)
+
+
+@pytest.fixture
+def supplier_file(tmp_path, smartphone_dict) -> str:
+    """the fixture of the file with the invalid categories and rows"""
+
+    data = [
+        {"name": "A", "description": "category A", "products": [
+            {"name": "A1", "description": "a", "price": 10.0,
+             "quantity": 2},
+            {"name": "A2", "description": "a", "price": 10.0,
+             "quantity": 0},
+            {"name": "A3", "description": "a", "price": 10},
+            {**smartphone_dict, "type": "smartphone"},
+            {**smartphone_dict, "type": "smartphone", "memory": "512"},
+            {"name": "A4", "description": "a", "price": 1.0,
+             "quantity": 1, "type": "tv"},
+            {"name": "A5", "description": "a", "price": 1.0,
+             "quantity": 1, "type": []},
+        ]},
+        {"name": "B", "description": "category B", "products": {}},
+        {"name": "C", "description": "category C", "products": []},
+    ]
+    path = tmp_path / "supplier.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_compile_validator() -> None:
+    """testing the validator compiled from the TypedDict"""
+
+    validate = compile_validator(Product_json)
+    assert validate({"name": "A", "description": "a", "price": 1,
+                     "quantity": 1}) is None
+    assert validate({"name": "A", "description": "a", "price": 1.0,
+                     "quantity": True}) == "'quantity' must be int"
+    assert validate({"name": "A", "price": 1.0,
+                     "quantity": 1}) == "missing key 'description'"
+    assert validate([]) == "the row isn't an object"
+    valid, invalid = validate_products([{"name": "A", "description": "a",
+                                         "price": -1.0, "quantity": 1}])
+    assert (valid, len(invalid)) == ([], 1)
+
+
+def test_read_json_validated(supplier_file: str) -> None:
+    """testing the lenient mode skips and reports the invalid rows"""
+
+    categories, errors = read_json_validated(supplier_file)
+    assert [c.name for c in categories] == ["A", "C"]
+    products = list(categories[0])
+    assert [p.name for p in products][0] == "A1"
+    assert isinstance(products[1], Smartphone)
+    assert errors == [
+        RowError(supplier_file, 0, 1, VALUE_ERR_MSG),
+        RowError(supplier_file, 0, 2, "missing key 'quantity'"),
+        RowError(supplier_file, 0, 4, "'memory' must be int"),
+        RowError(supplier_file, 0, 5, "unknown product type: tv"),
+        RowError(supplier_file, 0, 6, "'type' must be str"),
+        RowError(supplier_file, 1, None, "'products' must be list"),
+    ]
+
+
+def test_read_json_validated_strict(supplier_file: str) -> None:
+    """testing the strict mode fails on the first error"""
+
+    with pytest.raises(ValidationFailed) as error:
+        read_json_validated(supplier_file, strict=True)
+    assert error.value.error == RowError(supplier_file, 0, 1, VALUE_ERR_MSG)
+
+
+def test_read_json_validated_file_errors(tmp_path) -> None:
+    """testing the missing and the broken files are reported"""
+
+    missing = str(tmp_path / "missing.json")
+    categories, errors = read_json_validated(missing)
+    assert categories == []
+    assert errors[0][:3] == (missing, None, None)
+    assert errors[0].reason.startswith("FileNotFoundError")
+    broken = tmp_path / "broken.json"
+    broken.write_text('[{"name": "A", "description": "a", "products": []},'
+                      ' {"name": ', encoding="utf-8")
+    categories, errors = read_json_validated(str(broken))
+    assert [c.name for c in categories] == ["A"]
+    assert errors[0][1:3] == (1, None)
+
+
+def test_validate_registered_type() -> None:
+    """testing the rows of the type registered without the schema"""
+
+    class Album(Product):
+        __slots__ = ("artist",)
+
+        def __init__(self, name, description, price, quantity,
+                     artist) -> None:
+            self.artist = artist
+            super().__init__(name, description, price, quantity)
+
+    register_product_type("album", Album, ["name", "description", "price",
+                                           "quantity", "artist"])
+    row = {"name": "A", "description": "a", "price": 1.0, "quantity": 1,
+           "type": "album", "artist": "Цой"}
+    rows = [row, {**row, "quantity": 0}, {**row, "artist": None},
+            {key: value for key, value in row.items() if key != "artist"}]
+    valid, invalid = validate_products(rows)
+    assert valid == [rows[0], rows[2]]
+    assert invalid == [(1, VALUE_ERR_MSG), (3, "missing key 'artist'")]